@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Export of self-play positions into a fixed-width training dataset.
+
+Each position is one record of POSITION_DTYPE: the 45 board codes, the player to move, the credit,
+the turn, the search score of the played action and the final result from the player to move point of view.
+The records are appended in chunks to a raw file, which is read back without copy as a NumPy
+structured array by numpy.memmap, so that tens of millions of positions never exist as PijersiState objects.
+
+Requires numpy, listed with the other dependencies of this directory in its requirements.txt.
+"""
+
+import multiprocessing
+import os
+import random
+import sys
+
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+_package_home = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(_package_home)
+sys.path.append(os.path.join(_package_home, "..", "..", "pijersi_certu"))
+
+import pijersi_rules as rules
+
+
+BOARD_SIZE = len(rules.Hexagon.get_all())
+
+POSITION_DTYPE = np.dtype([('board_codes', np.uint8, (BOARD_SIZE,)),
+                           ('player', np.uint8),
+                           ('credit', np.uint8),
+                           ('turn', np.uint16),
+                           ('score', np.float32),
+                           ('result', np.int8)])
+
+
+class PositionWriter:
+    """Append positions to a raw file of POSITION_DTYPE records, one chunk at a time"""
+
+    __slots__ = ('__path', '__stream', '__chunk', '__chunk_count', '__position_count')
+
+
+    def __init__(self, path: str, chunk_size: int=65_536):
+        assert chunk_size > 0
+
+        self.__path = path
+        self.__stream = None
+        self.__chunk = np.zeros(chunk_size, dtype=POSITION_DTYPE)
+        self.__chunk_count = 0
+        self.__position_count = 0
+
+
+    def open(self):
+        assert self.__stream is None
+
+        # >> a record truncated by an interrupted writer is dropped before appending
+        if os.path.isfile(self.__path):
+            file_size = os.path.getsize(self.__path)
+            if file_size % POSITION_DTYPE.itemsize != 0:
+                os.truncate(self.__path, file_size - file_size % POSITION_DTYPE.itemsize)
+
+        self.__stream = open(self.__path, 'ab')
+
+
+    def close(self):
+        if self.__stream is not None:
+            self.flush()
+            self.__stream.close()
+            self.__stream = None
+
+
+    def __enter__(self):
+        self.open()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def append(self, positions: np.ndarray):
+        """Append an array of POSITION_DTYPE records, through the chunk buffer"""
+
+        assert positions.dtype == POSITION_DTYPE
+
+        position_index = 0
+        while position_index < len(positions):
+            copy_count = min(len(positions) - position_index, len(self.__chunk) - self.__chunk_count)
+            self.__chunk[self.__chunk_count:self.__chunk_count + copy_count] = positions[position_index:position_index + copy_count]
+            self.__chunk_count += copy_count
+            position_index += copy_count
+
+            if self.__chunk_count == len(self.__chunk):
+                self.flush()
+
+        self.__position_count += len(positions)
+
+
+    def flush(self):
+        if self.__chunk_count != 0:
+            self.__chunk[:self.__chunk_count].tofile(self.__stream)
+            self.__chunk_count = 0
+        self.__stream.flush()
+
+
+    def get_position_count(self) -> int:
+        """Number of positions appended since the opening"""
+        return self.__position_count
+
+
+def open_positions(path: str, mode: str='r') -> np.ndarray:
+    """Memory-mapped view of all the complete records of the file"""
+
+    position_count = os.path.getsize(path) // POSITION_DTYPE.itemsize
+
+    # >> numpy cannot map an empty file
+    if position_count == 0:
+        return np.zeros(0, dtype=POSITION_DTYPE)
+
+    return np.memmap(path, dtype=POSITION_DTYPE, mode=mode, shape=(position_count,))
+
+
+def make_positions(pijersi_states: Iterable[rules.PijersiState], scores: Iterable[float],
+                   rewards: Tuple[rules.Reward, rules.Reward]) -> np.ndarray:
+
+    pijersi_states = list(pijersi_states)
+    positions = np.zeros(len(pijersi_states), dtype=POSITION_DTYPE)
+
+    for (position_index, (pijersi_state, score)) in enumerate(zip(pijersi_states, scores)):
+        player = pijersi_state.get_current_player()
+
+        positions['board_codes'][position_index] = np.frombuffer(pijersi_state.get_board_codes(), dtype=np.uint8)
+        positions['player'][position_index] = player
+        positions['credit'][position_index] = pijersi_state.get_credit()
+        positions['turn'][position_index] = pijersi_state.get_turn()
+        positions['score'][position_index] = score
+        positions['result'][position_index] = rewards[player]
+
+    return positions
+
+
+def play_one_self_play_game(game_index: int, max_depth: int=2, random_turn_count: int=6,
+                            setup: rules.Setup.T=rules.Setup.T.FULL_RANDOM) -> np.ndarray:
+    """Positions of one self-play game, excluding its random first turns and its terminal state"""
+
+    random.seed(game_index)
+
+    searcher = rules.MinimaxSearcher(f"self-play-minimax-{max_depth}", max_depth=max_depth)
+
+    pijersi_state = rules.PijersiState(setup=setup)
+    pijersi_states = []
+    scores = []
+
+    while not pijersi_state.is_terminal():
+
+        # >> random first turns for diversity of the positions
+        if pijersi_state.get_turn() <= random_turn_count:
+            action = random.choice(pijersi_state.get_actions())
+
+        else:
+            action = searcher.search(pijersi_state)
+            pijersi_states.append(pijersi_state)
+            scores.append(np.nan if action.value is None else action.value)
+
+        pijersi_state = pijersi_state.take_action(action)
+
+    return make_positions(pijersi_states, scores, pijersi_state.get_rewards())
+
+
+def play_one_self_play_game_task(task: Tuple[int, int, int]) -> np.ndarray:
+    return play_one_self_play_game(*task)
+
+
+def export_self_play(path: str, game_count: int, first_game_index: int=0, max_depth: int=2,
+                     random_turn_count: int=6, process_count: Optional[int]=None) -> int:
+    """Play the games in parallel and append their positions as they complete"""
+
+    process_count = process_count if process_count is not None else os.cpu_count()
+
+    with PositionWriter(path) as writer:
+        with multiprocessing.Pool(processes=process_count) as pool:
+
+            tasks = ((game_index, max_depth, random_turn_count)
+                     for game_index in range(first_game_index, first_game_index + game_count))
+
+            for (done_count, positions) in enumerate(pool.imap_unordered(play_one_self_play_game_task, tasks), start=1):
+                writer.append(positions)
+
+                if done_count % 100 == 0:
+                    print(f"{done_count} / {game_count} games ; {writer.get_position_count()} positions")
+
+        return writer.get_position_count()
+
+
+if __name__ == "__main__":
+
+    dataset_path = os.path.join(_package_home, "training-positions.bin")
+
+    export_self_play(dataset_path, game_count=1_000)
+
+    positions = open_positions(dataset_path)
+    print(f"position_count={len(positions)} ; mean_result={positions['result'].mean():.3f}")
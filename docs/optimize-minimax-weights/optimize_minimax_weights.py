@@ -7,10 +7,13 @@ Created on Wed Feb 22 19:34:28 2023
 
 import math
 import os
+import pickle
 import sys
+import time
 
 from typing import Optional
 from typing import Sequence
+from typing import Tuple
 
 import multiprocessing
 
@@ -20,6 +23,11 @@ _package_home = os.path.abspath(os.path.dirname(__file__))
 sys.path.append(_package_home)
 
 import pijersi_rules as rules
+import pijersi_match as match
+
+
+# >> searchers built once per worker process by init_worker
+_worker_data = {}
 
 
 
@@ -110,21 +118,7 @@ def run_one_game(game_index, alt_searcher, std_searcher):
     return (game_alt_points, game_std_points)
 
 
-def run_games_against_standard_minimax(game_count: int=2, alt_weights: Optional[Sequence[float]]=None) -> float:
-
-    if False:
-        print("=======================================")
-        print(" run_games_against_standard_minimax ...")
-        print("=======================================")
-
-    assert game_count > 0
-    assert game_count % 2 == 0
-
-    max_depth = 4
-    std_searcher = rules.MinimaxSearcher(f"std-minimax-{max_depth}", max_depth=max_depth)
-
-    if alt_weights is None:
-        alt_weights = [16, 8, 4, 2, 2, 1]
+def make_alt_searcher(alt_weights: Sequence[float], max_depth: int=4) -> rules.MinimaxSearcher:
 
     assert len(alt_weights) == 6
     alt_state_evaluator = rules.StateEvaluator(fighter_weight=alt_weights[0],
@@ -134,38 +128,103 @@ def run_games_against_standard_minimax(game_count: int=2, alt_weights: Optional[
                                                dc_ave_weight=alt_weights[4],
                                                credit_weight=alt_weights[5])
 
-    alt_searcher = rules.MinimaxSearcher(f"alt-minimax-{max_depth}", max_depth=max_depth, state_evaluator=alt_state_evaluator)
+    return rules.MinimaxSearcher(f"alt-minimax-{max_depth}", max_depth=max_depth, state_evaluator=alt_state_evaluator)
 
 
+def init_worker(max_depth: int=4):
+    # >> paid once per worker and not once per generation
+    _worker_data['max_depth'] = max_depth
+    _worker_data['std_searcher'] = rules.MinimaxSearcher(f"std-minimax-{max_depth}", max_depth=max_depth)
 
-    with multiprocessing.Pool(processes=8) as pool:
-        game_points = pool.starmap(run_one_game, ((game_index, alt_searcher, std_searcher) for game_index in range(game_count)))
 
-    alt_points = 0
-    std_points = 0
+def run_one_game_task(task: Tuple[int, int, Sequence[float]]) -> Tuple[int, float, float]:
+    (solution_index, game_index, alt_weights) = task
 
-    for (alt_game_points, std_game_points) in game_points:
-        alt_points += alt_game_points
-        std_points += std_game_points
+    alt_searcher = make_alt_searcher(alt_weights, max_depth=_worker_data['max_depth'])
+    (game_alt_points, game_std_points) = run_one_game(game_index, alt_searcher, _worker_data['std_searcher'])
 
-    std_score = std_points/game_count
+    return (solution_index, game_alt_points, game_std_points)
 
-    print(f"game_count={game_count}" +
-          f" ; alt_points={alt_points:.3f} ; std_points={std_points:.3f} ; std_score={std_score:.3f}" +
-          " ; alt_weights=" + str([f"{x:.3f}" for x in alt_weights]))
 
-    if False:
-        print("========================================")
-        print(" run_games_against_standard_minimax done")
-        print("========================================")
+def evaluate_population(pool: multiprocessing.Pool, solutions: Sequence[Sequence[float]], game_count: int) -> Sequence[float]:
+    """Cost of each solution, by spreading all the games of the population across the pool"""
+
+    assert game_count > 0
+    assert game_count % 2 == 0
+
+    tasks = [(solution_index, game_index, list(solution))
+             for game_index in range(game_count)
+             for (solution_index, solution) in enumerate(solutions)]
+
+    alt_points = [0 for _ in solutions]
+    std_points = [0 for _ in solutions]
+    done_game_counts = [0 for _ in solutions]
+
+    # >> stream results as they finish, whatever the solution
+    for (solution_index, game_alt_points, game_std_points) in pool.imap_unordered(run_one_game_task, tasks):
+        alt_points[solution_index] += game_alt_points
+        std_points[solution_index] += game_std_points
+        done_game_counts[solution_index] += 1
+
+        if done_game_counts[solution_index] == game_count:
+            alt_weights = solutions[solution_index]
+            print(f"solution={solution_index} ; game_count={game_count}" +
+                  f" ; alt_points={alt_points[solution_index]:.3f} ; std_points={std_points[solution_index]:.3f}" +
+                  f" ; std_score={std_points[solution_index]/game_count:.3f}" +
+                  " ; alt_weights=" + str([f"{x:.3f}" for x in alt_weights]))
+
+    return [std_points[solution_index]/game_count for solution_index in range(len(solutions))]
+
+
+def run_games_against_standard_minimax(game_count: int=2, alt_weights: Optional[Sequence[float]]=None,
+                                       process_count: Optional[int]=None) -> float:
+
+    if alt_weights is None:
+        alt_weights = [16, 8, 4, 2, 2, 1]
+
+    process_count = process_count if process_count is not None else os.cpu_count()
+
+    with multiprocessing.Pool(processes=process_count, initializer=init_worker) as pool:
+        (std_score,) = evaluate_population(pool, [alt_weights], game_count)
 
     return std_score
 
 
-def optimize():
+def validate_against_standard_minimax(alt_weights: Sequence[float], max_game_count: int=2_000,
+                                      elo0: float=0., elo1: float=20., max_depth: int=4,
+                                      process_count: Optional[int]=None) -> match.Sprt.Decision:
+    """A/B test of tuned weights, stopped as soon as the SPRT decides"""
+
+    std_searcher = rules.MinimaxSearcher(f"std-minimax-{max_depth}", max_depth=max_depth)
+    alt_searcher = make_alt_searcher(alt_weights, max_depth=max_depth)
+
+    sprt = match.Sprt(elo0=elo0, elo1=elo1)
+
+    # >> random setups, because minimax searchers replay the same game from the same setup
+    stats = match.run_match(alt_searcher, std_searcher, game_count=max_game_count, setup=rules.Setup.T.FULL_RANDOM,
+                            sprt=sprt, process_count=process_count)
+
+    return sprt.get_decision(stats)
+
+
+def save_checkpoint(checkpoint_path: str, es: cma.CMAEvolutionStrategy):
+    # >> write then rename, so that an interruption never leaves a truncated checkpoint
+    temporary_path = checkpoint_path + ".tmp"
+    with open(temporary_path, 'wb') as checkpoint_file:
+        pickle.dump(es, checkpoint_file)
+    os.replace(temporary_path, checkpoint_path)
+
+
+def load_checkpoint(checkpoint_path: str) -> Optional[cma.CMAEvolutionStrategy]:
+    if not os.path.isfile(checkpoint_path):
+        return None
 
-    def my_cost(x):
-        return run_games_against_standard_minimax(game_count=4, alt_weights=x)
+    with open(checkpoint_path, 'rb') as checkpoint_file:
+        return pickle.load(checkpoint_file)
+
+
+def optimize(game_count: int=4, process_count: Optional[int]=None,
+             checkpoint_path: str=os.path.join(_package_home, "optimize-minimax-weights.pickle")):
 
     # Minimax-1
     # mean vector found at genration 139 using 1000 games per cost evaluation:
@@ -181,18 +240,35 @@ def optimize():
 
     # Minimax-4
 
+    es = load_checkpoint(checkpoint_path)
+
+    if es is not None:
+        print(f"resume from '{checkpoint_path}' at generation {es.countiter}")
+
+    else:
+        es = cma.CMAEvolutionStrategy([65.52573448992278,
+                                       4.61622799691101,
+                                       14.424683698727392,
+                                       19.619155464089044,
+                                       2.5543281621200737,
+                                       -1.202172844784375], 4.)
+
+    process_count = process_count if process_count is not None else os.cpu_count()
 
-    es = cma.CMAEvolutionStrategy([65.52573448992278,
-                                   4.61622799691101,
-                                   14.424683698727392,
-                                   19.619155464089044,
-                                   2.5543281621200737,
-                                   -1.202172844784375], 4.)
-    while not es.stop():
-        solutions = es.ask()
-        es.tell(solutions, [my_cost(x) for x in solutions])
-        es.logger.add()  # write data to disc to be plotted
-        es.disp()
+    with multiprocessing.Pool(processes=process_count, initializer=init_worker) as pool:
+
+        while not es.stop():
+            generation_start = time.time()
+
+            solutions = es.ask()
+            es.tell(solutions, evaluate_population(pool, solutions, game_count))
+            es.logger.add()  # write data to disc to be plotted
+            es.disp()
+
+            save_checkpoint(checkpoint_path, es)
+
+            print(f"generation {es.countiter} done after {time.time() - generation_start:.0f} seconds" +
+                  f" with {len(solutions)*game_count} games on {process_count} processes")
 
     es.result_pretty()
     cma.plot()  # shortcut for es.logger.plot()
@@ -204,6 +280,15 @@ if __name__ == "__main__":
         score = run_games_against_standard_minimax()
         print(f"__main__: score={score:.3f}")
 
+    if False:
+        decision = validate_against_standard_minimax([65.52573448992278,
+                                                      4.61622799691101,
+                                                      14.424683698727392,
+                                                      19.619155464089044,
+                                                      2.5543281621200737,
+                                                      -1.202172844784375])
+        print(f"__main__: decision={decision.name}")
+
     if True:
         optimize()
 
@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Texel-style tuning of the StateEvaluator weights.
+
+Positions and final results are extracted from self-play or archived games into a feature matrix,
+then the weights are fitted by minimizing the logistic loss between the evaluation of each position
+and the final result of its game, using a vectorized gradient descent.
+
+Compared with optimize_minimax_weights.py, which plays full games for each cost evaluation,
+the fit itself takes seconds ; only the extraction of positions plays games, and only once.
+
+Requires numpy, listed with the other dependencies of this directory in its requirements.txt.
+"""
+
+import glob
+import multiprocessing
+import os
+import random
+import sys
+
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+
+_package_home = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(_package_home)
+sys.path.append(os.path.join(_package_home, "..", "..", "pijersi_certu"))
+
+import pijersi_records as records
+import pijersi_rules as rules
+
+
+_games_home = os.path.join(_package_home, "..", "..", "games")
+
+FEATURE_COUNT = len(rules.StateEvaluator.FEATURE_NAMES)
+
+
+def result_for_player(rewards: Tuple[rules.Reward, rules.Reward], player: rules.Player.T) -> float:
+
+    if rewards[player] == rules.Reward.WIN:
+        return 1.
+
+    elif rewards[player] == rules.Reward.LOSS:
+        return 0.
+
+    else:
+        return 0.5
+
+
+def extract_positions(pijersi_states: Sequence[rules.PijersiState],
+                      rewards: Tuple[rules.Reward, rules.Reward],
+                      skip_turn_count: int=0) -> Tuple[Sequence[Sequence[float]], Sequence[float]]:
+    """Features of the non terminal states, from the player to move point of view, and its final result"""
+
+    features = []
+    results = []
+
+    for pijersi_state in pijersi_states:
+
+        if pijersi_state.get_turn() <= skip_turn_count or pijersi_state.is_terminal():
+            continue
+
+        player = pijersi_state.get_current_player()
+
+        features.append(rules.StateEvaluator.compute_features(pijersi_state, player))
+        results.append(result_for_player(rewards, player))
+
+    return (features, results)
+
+
+def play_one_self_play_game(game_index: int, max_depth: int=1, random_turn_count: int=6,
+                            setup: rules.Setup.T=rules.Setup.T.FULL_RANDOM) -> Tuple[Sequence[Sequence[float]], Sequence[float]]:
+
+    random.seed(game_index)
+
+    searcher = rules.MinimaxSearcher(f"self-play-minimax-{max_depth}", max_depth=max_depth)
+
+    pijersi_state = rules.PijersiState(setup=setup)
+    pijersi_states = [pijersi_state]
+
+    while not pijersi_state.is_terminal():
+
+        # >> random first turns for diversity of the positions
+        if pijersi_state.get_turn() <= random_turn_count:
+            action = random.choice(pijersi_state.get_actions())
+        else:
+            action = searcher.search(pijersi_state)
+
+        pijersi_state = pijersi_state.take_action(action)
+        pijersi_states.append(pijersi_state)
+
+    return extract_positions(pijersi_states, pijersi_state.get_rewards(), skip_turn_count=random_turn_count)
+
+
+def make_dataset_from_self_play(game_count: int, max_depth: int=1, random_turn_count: int=6,
+                                process_count: Optional[int]=None) -> Tuple[np.ndarray, np.ndarray]:
+
+    process_count = process_count if process_count is not None else os.cpu_count()
+
+    features = []
+    results = []
+
+    with multiprocessing.Pool(processes=process_count) as pool:
+        game_positions = pool.starmap(play_one_self_play_game,
+                                      ((game_index, max_depth, random_turn_count) for game_index in range(game_count)))
+
+    for (game_features, game_results) in game_positions:
+        features.extend(game_features)
+        results.extend(game_results)
+
+    return (np.array(features, dtype=np.float64).reshape(-1, FEATURE_COUNT), np.array(results, dtype=np.float64))
+
+
+def make_dataset_from_archive(games_home: str=_games_home, skip_turn_count: int=0) -> Tuple[np.ndarray, np.ndarray]:
+    """Positions of the archived games that are replayed up to a terminal state"""
+
+    features = []
+    results = []
+
+    for game_file_path in sorted(glob.glob(os.path.join(games_home, "*.txt"))):
+
+        with open(game_file_path, 'r') as game_file:
+            game_text = game_file.read()
+
+        try:
+            (board_codes, action_names) = records.read_game_text(game_text)
+
+            if board_codes is None:
+                pijersi_state = rules.PijersiState()
+            else:
+                pijersi_state = rules.PijersiState(board_codes=board_codes, setup=rules.Setup.T.GIVEN)
+
+            pijersi_states = [pijersi_state]
+            for action_name in action_names:
+                pijersi_state = pijersi_state.take_action_by_simple_name(action_name)
+                pijersi_states.append(pijersi_state)
+
+        except Exception as exception:
+            print(f"skip {os.path.basename(game_file_path)}: {exception!r}")
+            continue
+
+        if not pijersi_state.is_terminal():
+            print(f"skip {os.path.basename(game_file_path)}: no terminal state after {len(action_names)} actions")
+            continue
+
+        (game_features, game_results) = extract_positions(pijersi_states, pijersi_state.get_rewards(), skip_turn_count)
+        features.extend(game_features)
+        results.extend(game_results)
+
+    return (np.array(features, dtype=np.float64).reshape(-1, FEATURE_COUNT), np.array(results, dtype=np.float64))
+
+
+def sigmoid(x: np.ndarray) -> np.ndarray:
+    return 1/(1 + np.exp(-x))
+
+
+def logistic_loss(weights: np.ndarray, features: np.ndarray, results: np.ndarray, l2: float=0.) -> float:
+    predictions = np.clip(sigmoid(features @ weights), 1e-12, 1 - 1e-12)
+    loss = -np.mean(results*np.log(predictions) + (1 - results)*np.log(1 - predictions))
+    return float(loss + 0.5*l2*np.dot(weights, weights))
+
+
+def fit_weights(features: np.ndarray, results: np.ndarray,
+                initial_weights: Optional[Sequence[float]]=None,
+                learning_rate: float=1., iteration_count: int=5_000, l2: float=1e-4,
+                tolerance: float=1e-10) -> np.ndarray:
+    """Minimize the logistic loss by full batch gradient descent"""
+
+    assert features.shape[0] == results.shape[0] > 0
+
+    weights = np.zeros(FEATURE_COUNT) if initial_weights is None else np.array(initial_weights, dtype=np.float64)
+
+    position_count = features.shape[0]
+    loss = logistic_loss(weights, features, results, l2)
+
+    for iteration in range(iteration_count):
+        predictions = sigmoid(features @ weights)
+        gradient = features.T @ (predictions - results)/position_count + l2*weights
+
+        weights -= learning_rate*gradient
+
+        if iteration % 500 == 0 or iteration == iteration_count - 1:
+            next_loss = logistic_loss(weights, features, results, l2)
+            print(f"iteration={iteration} ; loss={next_loss:.6f}")
+
+            if abs(loss - next_loss) < tolerance:
+                break
+
+            loss = next_loss
+
+    return weights
+
+
+def make_state_evaluator_definition(name: str, weights: Sequence[float]) -> str:
+    """Python definition ready to paste after STATE_EVALUATOR_MM1..MM4 in pijersi_rules.py"""
+
+    lines = []
+    indent = " "*len(f"{name} = StateEvaluator(")
+
+    for (feature_index, (feature_name, weight)) in enumerate(zip(rules.StateEvaluator.FEATURE_NAMES, weights)):
+        prefix = f"{name} = StateEvaluator(" if feature_index == 0 else indent
+        suffix = ")" if feature_index == len(weights) - 1 else ","
+        lines.append(f"{prefix}{feature_name}_weight={weight!r}{suffix}")
+
+    return "\n".join(lines) + "\n"
+
+
+def tune(game_count: int=200, max_depth: int=1, use_archive: bool=True,
+         dataset_path: Optional[str]=None, output_path: Optional[str]=None,
+         evaluator_name: str="STATE_EVALUATOR_TEXEL") -> np.ndarray:
+
+    if dataset_path is not None and os.path.isfile(dataset_path):
+        dataset = np.load(dataset_path)
+        (features, results) = (dataset['features'], dataset['results'])
+
+    else:
+        (features, results) = make_dataset_from_self_play(game_count=game_count, max_depth=max_depth)
+
+        if use_archive:
+            (archive_features, archive_results) = make_dataset_from_archive()
+            features = np.concatenate((features, archive_features))
+            results = np.concatenate((results, archive_results))
+
+        if dataset_path is not None:
+            np.savez_compressed(dataset_path, features=features, results=results)
+
+    print(f"position_count={features.shape[0]}")
+
+    # >> start from the current MM3 weights, rescaled to the logistic scale
+    initial_weights = np.array(rules.STATE_EVALUATOR_MM3.get_weights())/64
+
+    weights = fit_weights(features, results, initial_weights=initial_weights)
+
+    for (feature_name, weight) in zip(rules.StateEvaluator.FEATURE_NAMES, weights):
+        print(f"{feature_name}_weight={weight:.6f}")
+
+    definition = make_state_evaluator_definition(evaluator_name, weights.tolist())
+    print(definition)
+
+    if output_path is not None:
+        with open(output_path, 'w') as output_file:
+            output_file.write(definition)
+
+    return weights
+
+
+if __name__ == "__main__":
+
+    tune(dataset_path=os.path.join(_package_home, "texel-dataset.npz"),
+         output_path=os.path.join(_package_home, "texel-state-evaluator.py"))
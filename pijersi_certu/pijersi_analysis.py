@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""pijersi_analysis.py analyses batches of positions of the PIJERSI boardgame, given as UGI fens, in parallel."""
+
+
+_COPYRIGHT_AND_LICENSE = """
+PIJERSI-CERTU implements a GUI and a rules engine for the PIJERSI boardgame.
+
+Copyright (C) 2019 Lucas Borboleta (lucas.borboleta@free.fr).
+
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program. If not, see <http://www.gnu.org/licenses>.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from typing import Any
+from typing import Iterable
+from typing import Mapping
+from typing import Optional
+from typing import TextIO
+
+import multiprocessing
+
+_package_home = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(_package_home)
+
+from pijersi_rules import MinimaxSearcher
+
+from pijersi_analysis_cache import AnalysisCache
+
+from pijersi_ugi import make_pijersi_state_from_ugi_fen
+
+
+def log(msg: str=None):
+    if msg is None:
+        print("", file=sys.stderr, flush=True)
+    else:
+        for line in msg.split('\n'):
+            print(f"{line}", file=sys.stderr, flush=True)
+
+
+AnalysisRecord = Mapping[str, Any]
+
+
+# >> searcher built once per worker process by init_worker, and reused for all its positions
+_worker_data = {}
+
+
+def make_analysis_searcher(max_depth: int, node_limit: Optional[int]=None, max_cached_nodes: Optional[int]=None,
+                           trace_memory: bool=False) -> MinimaxSearcher:
+    if node_limit is None:
+        return MinimaxSearcher(f"analysis-minimax{max_depth}", max_depth=max_depth,
+                               max_cached_nodes=max_cached_nodes, trace_memory=trace_memory)
+    else:
+        return MinimaxSearcher(f"analysis-minimax{max_depth}-nodes{node_limit}", max_depth=max_depth, node_limit=node_limit,
+                               max_cached_nodes=max_cached_nodes, trace_memory=trace_memory)
+
+
+def init_worker(max_depth: int, node_limit: Optional[int], cache_path: Optional[str]=None, max_cached_nodes: Optional[int]=None,
+                trace_memory: bool=False):
+    _worker_data['searcher'] = make_analysis_searcher(max_depth, node_limit, max_cached_nodes, trace_memory)
+
+    # >> the workers share the cache through its file
+    if cache_path is not None:
+        _worker_data['searcher'].set_analysis_cache(AnalysisCache(cache_path))
+
+
+def analyse_fen(searcher: MinimaxSearcher, line_index: int, line: str) -> AnalysisRecord:
+    """Analyse the fen of one input line ; a line that is not a fen gives a record with an error"""
+
+    fen = line.strip()
+    analysis_record = {'line':line_index, 'fen':fen}
+
+    try:
+        pijersi_state = make_pijersi_state_from_ugi_fen(fen.split())
+    except Exception as exception:
+        analysis_record['error'] = repr(exception)
+        return analysis_record
+
+    if pijersi_state.is_terminal():
+        analysis_record['terminal'] = True
+        return analysis_record
+
+    search_start = time.perf_counter()
+    action = searcher.search(pijersi_state, use_opening_file=False)
+    search_duration = time.perf_counter() - search_start
+
+    analysis_record['bestmove'] = pijersi_state.to_ugi_name(action)
+    analysis_record['action'] = str(action)
+    analysis_record['score'] = action.value
+    analysis_record['nodes'] = searcher.get_node_count()
+    analysis_record['time'] = round(search_duration, 3)
+
+    memory_stats = searcher.get_memory_stats()
+    if len(memory_stats) != 0:
+        analysis_record['memory'] = memory_stats
+
+    return analysis_record
+
+
+def analyse_fen_task(task: tuple) -> AnalysisRecord:
+    return analyse_fen(_worker_data['searcher'], *task)
+
+
+def analyse_fens(lines: Iterable[str], output_file: TextIO, max_depth: int=2, node_limit: Optional[int]=None,
+                 process_count: Optional[int]=None, chunk_size: int=4, cache_path: Optional[str]=None,
+                 max_cached_nodes: Optional[int]=None, trace_memory: bool=False) -> int:
+    """Analyse the fens in parallel and write their JSON records in the input order, as soon as each is available
+
+    The empty lines are skipped, but still counted in the line indices of the records.
+    With a cache_path, the searches already done by any tool sharing this cache are not done again.
+    With max_cached_nodes, the memory of each worker is bounded, and the records tell its use ;
+    with trace_memory, they also tell the memory allocated by each search.
+    """
+
+    process_count = process_count if process_count is not None else os.cpu_count()
+
+    tasks = ((line_index, line) for (line_index, line) in enumerate(lines) if len(line.strip()) != 0)
+
+    analysed_count = 0
+
+    with multiprocessing.Pool(processes=process_count, initializer=init_worker, initargs=(max_depth, node_limit, cache_path, max_cached_nodes, trace_memory)) as pool:
+
+        # >> "imap" keeps the input order while the workers run ahead of the writer
+        for analysis_record in pool.imap(analyse_fen_task, tasks, chunksize=chunk_size):
+            output_file.write(json.dumps(analysis_record) + "\n")
+            output_file.flush()
+            analysed_count += 1
+
+    return analysed_count
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Analyse UGI fens, one per line, and write one JSON record per fen")
+    parser.add_argument('input', nargs='?', default='-', help="file of fens, or '-' for stdin (default)")
+    parser.add_argument('-o', '--output', default='-', help="file of JSON lines, or '-' for stdout (default)")
+    parser.add_argument('-d', '--depth', type=int, help="search depth, or maximum depth with --nodes (default 2, or 4 with --nodes)")
+    parser.add_argument('-n', '--nodes', type=int, help="node budget of each search")
+    parser.add_argument('-p', '--processes', type=int, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument('-c', '--cache', help="sqlite file of the analysis cache, shared with the GUI and the UGI server")
+    parser.add_argument('-m', '--max-cached-nodes', type=int, help="maximum number of states kept in memory by each search")
+    parser.add_argument('--trace-memory', action='store_true', help="measure the memory allocated by each search (slower)")
+    args = parser.parse_args()
+
+    if args.depth is not None:
+        max_depth = args.depth
+    else:
+        max_depth = 2 if args.nodes is None else 4
+
+    input_file = sys.stdin if args.input == '-' else open(args.input, 'r')
+    output_file = sys.stdout if args.output == '-' else open(args.output, 'w')
+
+    try:
+        analysis_start = time.time()
+        analysed_count = analyse_fens(input_file, output_file, max_depth=max_depth, node_limit=args.nodes, process_count=args.processes,
+                                      cache_path=args.cache, max_cached_nodes=args.max_cached_nodes,
+                                      trace_memory=args.trace_memory)
+        log(f"{analysed_count} fens analysed in {time.time() - analysis_start:.1f} s")
+
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""pijersi_analysis_cache.py stores the results of position analyses of the PIJERSI boardgame, by position hash and search parameters."""
+
+
+_COPYRIGHT_AND_LICENSE = """
+PIJERSI-CERTU implements a GUI and a rules engine for the PIJERSI boardgame.
+
+Copyright (C) 2019 Lucas Borboleta (lucas.borboleta@free.fr).
+
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program. If not, see <http://www.gnu.org/licenses>.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from typing import Any
+from typing import Mapping
+from typing import Optional
+
+
+AnalysisResult = Mapping[str, Any]
+
+
+DEFAULT_ANALYSIS_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".pijersi-certu", "analysis-cache.sqlite")
+
+
+class AnalysisCache:
+    """SQLite table of JSON analysis results, keyed by (position hash, search parameters)
+
+    The position hash is the one of PijersiState.get_position_hash, so the board and the player to move.
+    Beyond max_entries, the least recently used tenth of the entries is evicted.
+    A cache may be shared by the threads of a process, and by processes through its file:
+    a pickled cache reopens its file in the receiving process.
+    """
+
+    __slots__ = ('__path', '__max_entries', '__connection', '__lock', '__hit_count', '__miss_count', '__put_count')
+
+
+    __SCHEMA = """
+        CREATE TABLE IF NOT EXISTS analyses (
+            position_hash INTEGER NOT NULL,
+            params TEXT NOT NULL,
+            result TEXT NOT NULL,
+            last_used REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (position_hash, params));
+        """
+
+    __INDEX = """
+        CREATE INDEX IF NOT EXISTS analyses_by_last_used ON analyses (last_used);
+        """
+
+    # >> the entry count is checked every so many insertions
+    __EVICTION_PERIOD = 100
+
+
+    def __init__(self, path: str, max_entries: int=1_000_000):
+        assert max_entries >= 1
+
+        self.__path = path
+        self.__max_entries = max_entries
+
+        directory = os.path.dirname(os.path.abspath(path))
+        if not os.path.isdir(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        # >> the timeout lets several processes share the file
+        self.__connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.__connection.executescript(AnalysisCache.__SCHEMA)
+
+        # >> a table created before the eviction gets its column
+        columns = [column[1] for column in self.__connection.execute("PRAGMA table_info(analyses)")]
+        if 'last_used' not in columns:
+            self.__connection.execute("ALTER TABLE analyses ADD COLUMN last_used REAL NOT NULL DEFAULT 0")
+
+        self.__connection.executescript(AnalysisCache.__INDEX)
+        self.__connection.commit()
+
+        self.__lock = threading.Lock()
+        self.__hit_count = 0
+        self.__miss_count = 0
+        self.__put_count = 0
+
+
+    def __reduce__(self):
+        return (AnalysisCache, (self.__path, self.__max_entries))
+
+
+    def close(self):
+        with self.__lock:
+            if self.__connection is not None:
+                self.__connection.close()
+                self.__connection = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def get_path(self) -> str:
+        return self.__path
+
+
+    def get_max_entries(self) -> int:
+        return self.__max_entries
+
+
+    def get_stats(self) -> Mapping[str, int]:
+        return dict(hits=self.__hit_count, misses=self.__miss_count, entries=self.get_entry_count())
+
+
+    def get_entry_count(self) -> int:
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+
+
+    def get(self, position_hash: int, params: str) -> Optional[AnalysisResult]:
+
+        with self.__lock:
+            row = self.__connection.execute("SELECT result FROM analyses WHERE position_hash = ? AND params = ?",
+                                            (position_hash, params)).fetchone()
+
+            if row is None:
+                self.__miss_count += 1
+                return None
+
+            self.__hit_count += 1
+
+            self.__connection.execute("UPDATE analyses SET last_used = ? WHERE position_hash = ? AND params = ?",
+                                      (time.time(), position_hash, params))
+            self.__connection.commit()
+
+        return json.loads(row[0])
+
+
+    def put(self, position_hash: int, params: str, result: AnalysisResult) -> None:
+
+        with self.__lock:
+            self.__connection.execute("INSERT OR REPLACE INTO analyses (position_hash, params, result, last_used) VALUES (?, ?, ?, ?)",
+                                      (position_hash, params, json.dumps(result), time.time()))
+
+            self.__put_count += 1
+            if self.__put_count % AnalysisCache.__EVICTION_PERIOD == 0 or self.__max_entries < AnalysisCache.__EVICTION_PERIOD:
+                self.__evict()
+
+            self.__connection.commit()
+
+
+    def __evict(self):
+        entry_count = self.__connection.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+
+        if entry_count > self.__max_entries:
+            # >> evict down to 90% of the limit, so that the next insertions do not evict again at once
+            evicted_count = entry_count - (self.__max_entries*9)//10
+            self.__connection.execute("""
+                DELETE FROM analyses WHERE rowid IN (
+                    SELECT rowid FROM analyses ORDER BY last_used LIMIT ?)""", (evicted_count,))
+
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__connection.execute("DELETE FROM analyses")
+            self.__connection.commit()
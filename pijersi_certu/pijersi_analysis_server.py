@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""pijersi_analysis_server.py serves position analyses of the PIJERSI boardgame as a local HTTP/JSON job service."""
+
+
+_COPYRIGHT_AND_LICENSE = """
+PIJERSI-CERTU implements a GUI and a rules engine for the PIJERSI boardgame.
+
+Copyright (C) 2019 Lucas Borboleta (lucas.borboleta@free.fr).
+
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program. If not, see <http://www.gnu.org/licenses>.
+"""
+
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+import itertools
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+
+from typing import Any
+from typing import Mapping
+from typing import Optional
+
+from multiprocessing import freeze_support
+
+_package_home = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(_package_home)
+
+from pijersi_rules import MinimaxSearcher
+
+from pijersi_analysis_cache import AnalysisCache
+from pijersi_analysis_cache import AnalysisResult
+from pijersi_analysis_cache import DEFAULT_ANALYSIS_CACHE_PATH
+
+from pijersi_ugi import make_pijersi_state_from_ugi_fen
+
+
+def log(msg: str=None):
+    if msg is None:
+        print("", file=sys.stderr, flush=True)
+    else:
+        for line in msg.split('\n'):
+            print(f"{line}", file=sys.stderr, flush=True)
+
+
+AnalysisRequest = Mapping[str, Any]
+
+
+# >> searchers and caches built by each process at first use, and reused for all its jobs with the same parameters
+_worker_data = {'searchers':{}, 'caches':{}}
+
+
+def get_worker_searcher(max_depth: int, time_limit: Optional[float], node_limit: Optional[int],
+                        multipv: Optional[int]=None, max_cached_nodes: Optional[int]=None) -> MinimaxSearcher:
+    searcher_key = (max_depth, time_limit, node_limit, multipv, max_cached_nodes)
+
+    if searcher_key not in _worker_data['searchers']:
+        # >> the names of pijersi_analysis, so that both tools share the analyses of their common cache
+        searcher_name = f"analysis-minimax{max_depth}" if node_limit is None else f"analysis-minimax{max_depth}-nodes{node_limit}"
+        _worker_data['searchers'][searcher_key] = MinimaxSearcher(searcher_name, max_depth=max_depth,
+                                                                  time_limit=time_limit, node_limit=node_limit,
+                                                                  multipv=multipv, max_cached_nodes=max_cached_nodes)
+    return _worker_data['searchers'][searcher_key]
+
+
+def get_worker_cache(cache_path: str, max_entries: int) -> AnalysisCache:
+    # >> the workers share the cache through its file, opened once per worker
+    if cache_path not in _worker_data['caches']:
+        _worker_data['caches'][cache_path] = AnalysisCache(cache_path, max_entries=max_entries)
+    return _worker_data['caches'][cache_path]
+
+
+def analyse_position(fen: str, max_depth: int, time_limit: Optional[float], node_limit: Optional[int], multipv: int,
+                     max_cached_nodes: Optional[int]=None, cache: Optional[AnalysisCache]=None,
+                     cached_only: bool=False) -> Optional[AnalysisResult]:
+    """Best action of the position, and with multipv > 1 the multipv best root actions and their exact values
+
+    The searcher consults and fills the cache, with the key of its analyses ;
+    with cached_only, the result is None unless it is found in the cache, without searching.
+    """
+
+    pijersi_state = make_pijersi_state_from_ugi_fen(fen.split())
+
+    if pijersi_state.is_terminal():
+        return dict(terminal=True)
+
+    searcher = get_worker_searcher(max_depth, time_limit, node_limit, multipv if multipv != 1 else None, max_cached_nodes)
+    searcher.set_analysis_cache(cache)
+
+    search_start = time.perf_counter()
+
+    if multipv == 1:
+        if cached_only:
+            action = searcher.load_cached_action(pijersi_state)
+            if action is None:
+                return None
+        else:
+            action = searcher.search(pijersi_state, use_opening_file=False)
+
+        pv = [(str(action), action.value)]
+
+    else:
+        # >> the multi-PV evaluation lists first the root actions with exact values, best first
+        if cached_only:
+            evaluated_actions = searcher.load_cached_evaluations(pijersi_state)
+            if evaluated_actions is None:
+                return None
+        else:
+            evaluated_actions = searcher.evaluate_actions(pijersi_state)
+
+        pv = list(evaluated_actions.items())[:multipv]
+        action = pijersi_state.get_action_by_name(pv[0][0])
+
+    search_duration = time.perf_counter() - search_start
+
+    return dict(bestmove=pijersi_state.to_ugi_name(action),
+                action=str(action),
+                score=pv[0][1],
+                pv=[dict(action=action_name, score=score) for (action_name, score) in pv],
+                nodes=searcher.get_node_count() if not cached_only else 0,
+                time=round(search_duration, 3))
+
+
+def analyse_position_in_worker(fen: str, max_depth: int, time_limit: Optional[float], node_limit: Optional[int], multipv: int,
+                               max_cached_nodes: Optional[int], cache_path: str, cache_max_entries: int) -> AnalysisResult:
+    return analyse_position(fen, max_depth, time_limit, node_limit, multipv, max_cached_nodes,
+                            cache=get_worker_cache(cache_path, cache_max_entries))
+
+
+class AnalysisService:
+    """Priority queue of analysis jobs, run by a pool of worker processes, with results memoised in an AnalysisCache
+
+    The searchers of the service and of its workers consult and fill the cache, so that its entries have
+    the key of the analyses made by any MinimaxSearcher, and are shared with the other tools using the same cache.
+
+    A lower priority value is served first, and jobs of the same priority in their submission order.
+    The pool keeps its processes, so the rules tables and the searchers are built once per worker.
+    """
+
+    __slots__ = ('__cache', '__process_count', '__executor', '__job_queue', '__jobs', '__jobs_lock', '__job_sequence',
+                 '__dispatchers', '__running', '__max_done_jobs', '__max_cached_nodes')
+
+
+    def __init__(self, cache: AnalysisCache, process_count: Optional[int]=None, max_done_jobs: int=10_000,
+                 max_cached_nodes: Optional[int]=None):
+        self.__cache = cache
+        # >> bound of the states kept in memory by each search of the workers
+        self.__max_cached_nodes = max_cached_nodes
+        self.__process_count = process_count if process_count is not None else os.cpu_count()
+        self.__executor = None
+        self.__job_queue = queue.PriorityQueue()
+        self.__jobs = OrderedDict()
+        self.__jobs_lock = threading.Lock()
+        self.__job_sequence = itertools.count()
+        self.__dispatchers = []
+        self.__running = False
+        self.__max_done_jobs = max_done_jobs
+
+
+    def start(self):
+        assert not self.__running
+        self.__running = True
+
+        self.__executor = ProcessPoolExecutor(max_workers=self.__process_count)
+
+        # >> one dispatcher per worker, so that the queue order decides which job runs next
+        for _ in range(self.__process_count):
+            dispatcher = threading.Thread(target=self.__dispatch, daemon=True)
+            dispatcher.start()
+            self.__dispatchers.append(dispatcher)
+
+
+    def stop(self):
+        if self.__running:
+            self.__running = False
+
+            for _ in self.__dispatchers:
+                self.__job_queue.put((float('inf'), next(self.__job_sequence), None))
+
+            for dispatcher in self.__dispatchers:
+                dispatcher.join()
+
+            self.__dispatchers = []
+            self.__executor.shutdown()
+            self.__executor = None
+
+
+    def submit(self, request: AnalysisRequest) -> Mapping[str, Any]:
+        """Check the request and queue its job, unless its result is already cached ; return the job"""
+
+        fen = request['fen']
+        node_limit = request.get('nodes')
+        time_limit = request.get('time')
+        max_depth = request.get('depth', 2 if node_limit is None and time_limit is None else 4)
+        multipv = request.get('multipv', 1)
+        priority = request.get('priority', 0)
+
+        assert multipv >= 1
+
+        # >> a wrong fen is reported to the client, before queueing
+        make_pijersi_state_from_ugi_fen(fen.split())
+
+        searcher = get_worker_searcher(max_depth, time_limit, node_limit, multipv if multipv != 1 else None,
+                                       self.__max_cached_nodes)
+        params = searcher.get_analysis_budget()
+
+        job = dict(job_id=uuid.uuid4().hex, fen=fen, params=params, status='queued', result=None, error=None)
+        job_done = threading.Event()
+
+        result = analyse_position(fen, max_depth, time_limit, node_limit, multipv, self.__max_cached_nodes,
+                                  cache=self.__cache, cached_only=True)
+        if result is not None:
+            job['status'] = 'done'
+            job['result'] = result
+            job['cached'] = True
+            job_done.set()
+
+        with self.__jobs_lock:
+            self.__jobs[job['job_id']] = (job, job_done)
+            self.__forget_done_jobs()
+            submitted_job = dict(job)
+
+        if result is None:
+            task = (fen, max_depth, time_limit, node_limit, multipv)
+            self.__job_queue.put((priority, next(self.__job_sequence), (job['job_id'], task)))
+
+        return submitted_job
+
+
+    def get_job(self, job_id: str, wait_timeout: Optional[float]=None) -> Optional[Mapping[str, Any]]:
+        """The job, after waiting at most wait_timeout seconds for its end ; None for an unknown job"""
+
+        with self.__jobs_lock:
+            if job_id not in self.__jobs:
+                return None
+            (job, job_done) = self.__jobs[job_id]
+
+        if wait_timeout is not None:
+            job_done.wait(wait_timeout)
+
+        # >> copied under the lock, so that a job is never seen half updated by its dispatcher
+        with self.__jobs_lock:
+            return dict(job)
+
+
+    def get_stats(self) -> Mapping[str, Any]:
+        with self.__jobs_lock:
+            status_counts = {}
+            for (job, _) in self.__jobs.values():
+                status_counts[job['status']] = status_counts.get(job['status'], 0) + 1
+
+        return dict(queued=self.__job_queue.qsize(), jobs=status_counts, cache=self.__cache.get_stats())
+
+
+    def __forget_done_jobs(self):
+        # >> the oldest jobs are forgotten first, but never before their end
+        while len(self.__jobs) > self.__max_done_jobs:
+            (job_id, (job, _)) = next(iter(self.__jobs.items()))
+            if job['status'] not in ('done', 'failed'):
+                break
+            del self.__jobs[job_id]
+
+
+    def __dispatch(self):
+        while True:
+            (_, _, item) = self.__job_queue.get()
+            if item is None:
+                break
+
+            (job_id, (fen, max_depth, time_limit, node_limit, multipv)) = item
+
+            with self.__jobs_lock:
+                (job, job_done) = self.__jobs[job_id]
+                job['status'] = 'running'
+
+            try:
+                result = self.__executor.submit(analyse_position_in_worker, fen, max_depth, time_limit, node_limit, multipv,
+                                                self.__max_cached_nodes,
+                                                self.__cache.get_path(), self.__cache.get_max_entries()).result()
+
+                with self.__jobs_lock:
+                    job['result'] = result
+                    job['status'] = 'done'
+
+            except Exception as exception:
+                with self.__jobs_lock:
+                    job['error'] = repr(exception)
+                    job['status'] = 'failed'
+
+            job_done.set()
+
+
+class AnalysisRequestHandler(BaseHTTPRequestHandler):
+    """POST /jobs queues a job, GET /jobs/<job_id> returns it, and GET /stats the counters of the service
+
+    The JSON body of POST /jobs has a "fen", optionally "depth", "time" or "nodes", "multipv" and "priority",
+    and "wait" in seconds to reply with the finished job when it ends within this delay.
+    """
+
+    service = None
+
+
+    def log_message(self, format, *args):
+        pass
+
+
+    def __reply(self, status: int, content: Any):
+        body = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+    def do_POST(self):
+        if self.path != '/jobs':
+            self.__reply(404, dict(error=f"unknown path '{self.path}'"))
+            return
+
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            job = self.service.submit(request)
+
+        except Exception as exception:
+            self.__reply(400, dict(error=repr(exception)))
+            return
+
+        if request.get('wait') is not None:
+            job = self.service.get_job(job['job_id'], wait_timeout=float(request['wait']))
+
+        self.__reply(200, job)
+
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self.__reply(200, self.service.get_stats())
+
+        elif self.path.startswith('/jobs/'):
+            job = self.service.get_job(self.path[len('/jobs/'):])
+
+            if job is None:
+                self.__reply(404, dict(error="unknown job"))
+            else:
+                self.__reply(200, job)
+
+        else:
+            self.__reply(404, dict(error=f"unknown path '{self.path}'"))
+
+
+def make_analysis_server(service: AnalysisService, host: str='127.0.0.1', port: int=5710) -> ThreadingHTTPServer:
+
+    class ServiceRequestHandler(AnalysisRequestHandler):
+        pass
+
+    ServiceRequestHandler.service = service
+
+    http_server = ThreadingHTTPServer((host, port), ServiceRequestHandler)
+    http_server.daemon_threads = True
+    return http_server
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON service analysing positions given as UGI fens")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5710)
+    parser.add_argument('--cache', default=DEFAULT_ANALYSIS_CACHE_PATH, help="sqlite file of the results")
+    parser.add_argument('--processes', type=int, help="number of worker processes (default: number of CPUs)")
+    parser.add_argument('--max-cached-nodes', type=int, help="maximum number of states kept in memory by each search")
+    args = parser.parse_args()
+
+    with AnalysisCache(args.cache) as cache:
+        service = AnalysisService(cache, process_count=args.processes, max_cached_nodes=args.max_cached_nodes)
+        service.start()
+
+        with make_analysis_server(service, host=args.host, port=args.port) as http_server:
+            log(f"analysis service listening at http://{args.host}:{args.port} with cache {args.cache}")
+
+            try:
+                http_server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+
+        service.stop()
+
+
+if __name__ == "__main__":
+    # >> "freeze_support()" is needed with using a single executable made by PyInstaller
+    freeze_support()
+
+    main()
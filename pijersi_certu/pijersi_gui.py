@@ -37,6 +37,7 @@ import os
 import platform
 import re
 import shutil
+import sqlite3
 import stat
 import time
 
@@ -61,8 +62,13 @@ sys.path.append(_package_home)
 
 import pijersi_rules as rules
 
+from pijersi_analysis_cache import AnalysisCache
+from pijersi_analysis_cache import DEFAULT_ANALYSIS_CACHE_PATH
+
 from pijersi_ugi import UgiClient
+from pijersi_ugi import UgiPooledClient
 from pijersi_ugi import NatselSearcher
+from pijersi_ugi import start_ugi_engine_pool
 
 
 _NATSEL_COPYRIGHT = "(c) 2024 Eclypse-Prime"
@@ -546,8 +552,26 @@ class CMCState(enum.Enum):
     SELECTING_3 = enum.auto()
 
 
-def search_task(searcher, pijersi_state):
-    action = searcher.search(pijersi_state)
+# >> pondering in the search process, which keeps running while the human player thinks
+_search_ponderer = rules.Ponderer()
+
+
+def search_task(searcher, pijersi_state, ponder=False):
+    # >> the searcher is a copy pickled at each submit ; the pondering searcher, whose tables have been filled
+    # >> by the pondering, is the one searching, so that a ponder miss too keeps its tables
+    pondering_searcher = _search_ponderer.get_searcher()
+    if (pondering_searcher is not None and pondering_searcher.get_name() == searcher.get_name() and
+            pondering_searcher.get_time_limit() == searcher.get_time_limit()):
+        searcher = pondering_searcher
+
+    action = _search_ponderer.take(searcher, pijersi_state)
+
+    if action is None:
+        action = searcher.search(pijersi_state)
+
+    if ponder:
+        _search_ponderer.start(searcher, pijersi_state, action)
+
     action_simple_name = str(action).replace("!", "")
     return action_simple_name
 
@@ -2560,17 +2584,27 @@ class GameGui(ttk.Frame):
                 if self.__backend_futures[player] is None:
                     ready_for_next_turn = False
 
-                    self.__backend_futures[player] = self.__concurrent_executor.submit(search_task,
-                                                                                       backend_searcher,
-                                                                                       self.__pijersi_state)
+                    # >> ponder on the time of a human opponent, who leaves the search process idle
+                    if True:
+                        opponent = rules.Player.T.BLACK if player == rules.Player.T.WHITE else rules.Player.T.WHITE
+                        ponder = self.__backend_searchers[opponent].is_interactive()
+                    else:
+                        ponder = False
 
+                    # >> the time limit is computed before submitting the searcher, which is then copied to the search process
                     if self.__game_time_control is None:
                         backend_searcher.unset_dynamic_time_limit()
                         self.__searcher_max_time = backend_searcher.get_time_limit()
 
                     else:
                         player_clocks = self.__game.get_clocks()
-                        self.__searcher_max_time = backend_searcher.compute_dynamic_time_limit(player_clocks[player])
+                        self.__searcher_max_time = backend_searcher.compute_dynamic_time_limit(player_clocks[player],
+                                                                                               self.__pijersi_state)
+
+                    self.__backend_futures[player] = self.__concurrent_executor.submit(search_task,
+                                                                                       backend_searcher,
+                                                                                       self.__pijersi_state,
+                                                                                       ponder)
 
                     if self.__searcher_max_time is None:
                         self.__progressbar['value'] = 10.
@@ -3897,6 +3931,34 @@ class GameGui(ttk.Frame):
                                      joinstyle=tk.ROUND,
                                      smooth=True)
 
+_UGI_ENGINE_POOL_SIZE = max(2, (os.cpu_count() or 2)//2)
+_ugi_engine_pool_manager = None
+_ugi_engine_pool = None
+
+
+def get_ugi_engine_pool():
+    """Start at first use the pool of natsel engines shared by the play and the review searchers"""
+    global _ugi_engine_pool_manager
+    global _ugi_engine_pool
+
+    if _ugi_engine_pool is None:
+        (_ugi_engine_pool_manager, _ugi_engine_pool) = start_ugi_engine_pool(
+            {_NATSEL_KEY: (_NATSEL_EXECUTABLE_PATH, _UGI_ENGINE_POOL_SIZE)})
+
+    return _ugi_engine_pool
+
+
+def stop_ugi_engine_pool():
+    global _ugi_engine_pool_manager
+    global _ugi_engine_pool
+
+    if _ugi_engine_pool is not None:
+        _ugi_engine_pool.close()
+        _ugi_engine_pool_manager.shutdown()
+        _ugi_engine_pool = None
+        _ugi_engine_pool_manager = None
+
+
 def make_ugi_clients():
 
     ugi_clients = {}
@@ -3914,7 +3976,10 @@ def make_ugi_clients():
             ugi_clients[ugi_client.get_name()] = ugi_client
 
     if os.path.isfile(_NATSEL_EXECUTABLE_PATH):
-        ugi_client = UgiClient(name=_NATSEL_KEY, server_executable_path=_NATSEL_EXECUTABLE_PATH)
+        if True:
+            ugi_client = UgiPooledClient(get_ugi_engine_pool(), _NATSEL_KEY)
+        else:
+            ugi_client = UgiClient(name=_NATSEL_KEY, server_executable_path=_NATSEL_EXECUTABLE_PATH)
         ugi_clients[ugi_client.get_name()] = ugi_client
 
     return ugi_clients
@@ -3927,7 +3992,7 @@ def make_searcher_catalog(ugi_clients):
 
     if True:
         searcher_catalog.add( rules.MinimaxSearcher("cmalo-2", max_depth=2) )
-        searcher_catalog.add( rules.MinimaxSearcher("cmalo-3", max_depth=3, clock_fraction=0.10) )
+        searcher_catalog.add( rules.MinimaxSearcher("cmalo-3", max_depth=3, time_manager=rules.TimeManager()) )
 
     if True:
         depth_list = [5]
@@ -3937,12 +4002,14 @@ def make_searcher_catalog(ugi_clients):
 
             for depth in depth_list:
                 depth_searcher_name = f"{ugi_client_name}-{depth}"
-                depth_searcher = NatselSearcher(name=depth_searcher_name, ugi_client=ugi_client, max_depth=depth, clock_fraction=0.10)
+                depth_searcher = NatselSearcher(name=depth_searcher_name, ugi_client=ugi_client, max_depth=depth,
+                                                time_manager=rules.TimeManager())
                 searcher_catalog.add(depth_searcher)
 
             for (time_limit, time_label) in time_list:
                 time_searcher_name = f"{ugi_client_name}-{time_label}"
-                time_searcher = NatselSearcher(name=time_searcher_name, ugi_client=ugi_client, time_limit=time_limit, clock_fraction=0.10)
+                time_searcher = NatselSearcher(name=time_searcher_name, ugi_client=ugi_client, time_limit=time_limit,
+                                               time_manager=rules.TimeManager())
                 searcher_catalog.add(time_searcher)
 
     if False:
@@ -3969,11 +4036,22 @@ def make_review_searcher():
     """Make the AI searchers for performing the action review"""
 
     if os.path.isfile(_NATSEL_EXECUTABLE_PATH):
-        ugi_client = UgiClient(name=_NATSEL_KEY, server_executable_path=_NATSEL_EXECUTABLE_PATH)
+        if True:
+            ugi_client = UgiPooledClient(get_ugi_engine_pool(), _NATSEL_KEY)
+        else:
+            ugi_client = UgiClient(name=_NATSEL_KEY, server_executable_path=_NATSEL_EXECUTABLE_PATH)
         review_searcher = NatselSearcher(name="natsel-5", ugi_client=ugi_client, max_depth=5)
 
     else:
-        review_searcher = rules.MinimaxSearcher("cmalo-3-sup", max_depth=3)
+        # >> exact scores for the three best actions, and upper bounds for the other ones
+        review_searcher = rules.MinimaxSearcher("cmalo-3-sup", max_depth=3, multipv=3)
+
+    # >> re-reviewing a game, or reviewing positions of other games, reuses the cached evaluations
+    if True:
+        try:
+            review_searcher.set_analysis_cache(AnalysisCache(DEFAULT_ANALYSIS_CACHE_PATH))
+        except (OSError, sqlite3.Error) as error:
+            print(f"analysis cache disabled: {error}")
 
     return review_searcher
 
@@ -4002,6 +4080,8 @@ def main():
 
     _ = GameGui()
 
+    stop_ugi_engine_pool()
+
     print("Bye")
 
 
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""pijersi_match.py runs engine matches with Elo estimates and SPRT early stopping for the PIJERSI boardgame."""
+
+
+_COPYRIGHT_AND_LICENSE = """
+PIJERSI-CERTU implements a GUI and a rules engine for the PIJERSI boardgame.
+
+Copyright (C) 2019 Lucas Borboleta (lucas.borboleta@free.fr).
+
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program. If not, see <http://www.gnu.org/licenses>.
+"""
+
+import enum
+import hashlib
+import math
+import os
+from statistics import NormalDist
+import sys
+import time
+
+from typing import Optional
+from typing import Tuple
+
+import multiprocessing
+
+_package_home = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(_package_home)
+
+from pijersi_rules import Game
+from pijersi_rules import Player
+from pijersi_rules import Reward
+from pijersi_rules import Searcher
+from pijersi_rules import Setup
+
+
+def log(msg: str=None):
+    if msg is None:
+        print("", file=sys.stderr, flush=True)
+    else:
+        for line in msg.split('\n'):
+            print(f"{line}", file=sys.stderr, flush=True)
+
+
+def score_to_elo(score: float) -> float:
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400*math.log10(1/score - 1)
+
+
+def elo_to_score(elo: float) -> float:
+    return 1/(1 + 10**(-elo/400))
+
+
+def reward_to_points(reward: Reward) -> int:
+    # >> same points as the studies: 2 for a win, 1 for a draw, 0 for a loss
+    return {Reward.WIN:2, Reward.DRAW:1, Reward.LOSS:0}[reward]
+
+
+def run_one_game(setup: Setup.T, white_searcher: Searcher, black_searcher: Searcher) -> Tuple[int, int, bytes]:
+    """Play one game and return the points of white and black, and a hash of the sequence of positions"""
+
+    game = Game(setup=setup)
+    game.enable_log(False)
+
+    game.set_white_searcher(white_searcher)
+    game.set_black_searcher(black_searcher)
+
+    game.start()
+    game_hasher = hashlib.sha256()
+
+    while game.has_next_turn():
+        game_hasher.update(game.get_state().get_board_codes())
+        game.next_turn()
+
+    game_hasher.update(game.get_state().get_board_codes())
+    game_hash = game_hasher.digest()
+
+    rewards = game.get_rewards()
+
+    return (reward_to_points(rewards[Player.T.WHITE]), reward_to_points(rewards[Player.T.BLACK]), game_hash)
+
+
+class MatchStats:
+    """Wins, draws and losses of a first searcher against a second one, and the derived Elo difference"""
+
+    __slots__ = ('__win_count', '__draw_count', '__loss_count', '__game_hashes')
+
+
+    def __init__(self):
+        self.__win_count = 0
+        self.__draw_count = 0
+        self.__loss_count = 0
+        self.__game_hashes = set()
+
+
+    def add_points(self, points: int, game_hash: Optional[bytes]=None):
+        assert points in (0, 1, 2)
+
+        if points == 2:
+            self.__win_count += 1
+
+        elif points == 1:
+            self.__draw_count += 1
+
+        else:
+            self.__loss_count += 1
+
+        if game_hash is not None:
+            self.__game_hashes.add(game_hash)
+
+
+    def get_counts(self) -> Tuple[int, int, int]:
+        return (self.__win_count, self.__draw_count, self.__loss_count)
+
+
+    def get_game_count(self) -> int:
+        return self.__win_count + self.__draw_count + self.__loss_count
+
+
+    def get_effective_game_count(self) -> int:
+        """Number of distinct games, because deterministic searchers may replay the same game"""
+        return len(self.__game_hashes)
+
+
+    def get_score(self) -> float:
+        game_count = self.get_game_count()
+        if game_count == 0:
+            return 0.5
+        return (self.__win_count + 0.5*self.__draw_count)/game_count
+
+
+    def get_score_variance(self) -> float:
+        """Variance of the score of one game"""
+        game_count = self.get_game_count()
+        if game_count == 0:
+            return 0.
+
+        score = self.get_score()
+        return (self.__win_count*(1 - score)**2 +
+                self.__draw_count*(0.5 - score)**2 +
+                self.__loss_count*(0 - score)**2)/game_count
+
+
+    def get_elo(self, confidence: float=0.95) -> Tuple[float, float, float]:
+        """Elo difference and its confidence interval, using a normal approximation of the mean score"""
+
+        game_count = self.get_game_count()
+        score = self.get_score()
+
+        if game_count == 0:
+            return (0., -math.inf, math.inf)
+
+        quantile = NormalDist().inv_cdf((1 + confidence)/2)
+        score_deviation = quantile*math.sqrt(self.get_score_variance()/game_count)
+
+        return (score_to_elo(score), score_to_elo(score - score_deviation), score_to_elo(score + score_deviation))
+
+
+    def get_summary(self) -> str:
+        (elo, elo_low, elo_high) = self.get_elo()
+        return (f"games {self.get_game_count()} (W {self.__win_count} / D {self.__draw_count} / L {self.__loss_count})" +
+                f" / score {self.get_score():.3f} / elo {elo:+.1f} [{elo_low:+.1f}, {elo_high:+.1f}]")
+
+
+class Sprt:
+    """Sequential probability ratio test between H0: elo = elo0 and H1: elo = elo1
+
+    The log-likelihood ratio uses the generalized SPRT approximation on the trinomial
+    win/draw/loss results, as in the testing frameworks of chess engines.
+    """
+
+    @enum.unique
+    class Decision(enum.IntEnum):
+        CONTINUE = 0
+        ACCEPT_H0 = 1
+        ACCEPT_H1 = 2
+
+
+    __slots__ = ('__elo0', '__elo1', '__lower_bound', '__upper_bound')
+
+
+    def __init__(self, elo0: float=0., elo1: float=10., alpha: float=0.05, beta: float=0.05):
+        assert elo0 < elo1
+        assert 0 < alpha < 1
+        assert 0 < beta < 1
+
+        self.__elo0 = elo0
+        self.__elo1 = elo1
+        self.__lower_bound = math.log(beta/(1 - alpha))
+        self.__upper_bound = math.log((1 - beta)/alpha)
+
+
+    def get_bounds(self) -> Tuple[float, float]:
+        return (self.__lower_bound, self.__upper_bound)
+
+
+    def get_llr(self, stats: MatchStats) -> float:
+        game_count = stats.get_game_count()
+
+        if game_count == 0:
+            return 0.
+
+        score = stats.get_score()
+        variance = stats.get_score_variance()
+
+        if variance == 0:
+            # >> all results are the same: regularize with half a game of each result
+            (win_count, draw_count, loss_count) = stats.get_counts()
+            (win_count, draw_count, loss_count) = (win_count + 0.5, draw_count + 0.5, loss_count + 0.5)
+            regularized_score = (win_count + 0.5*draw_count)/(game_count + 1.5)
+            variance = (win_count*(1 - regularized_score)**2 +
+                        draw_count*(0.5 - regularized_score)**2 +
+                        loss_count*(0 - regularized_score)**2)/(game_count + 1.5)
+
+        score0 = elo_to_score(self.__elo0)
+        score1 = elo_to_score(self.__elo1)
+
+        return game_count*(score1 - score0)*(2*score - score0 - score1)/(2*variance)
+
+
+    def get_decision(self, stats: MatchStats) -> Decision:
+        llr = self.get_llr(stats)
+
+        if llr >= self.__upper_bound:
+            return Sprt.Decision.ACCEPT_H1
+
+        elif llr <= self.__lower_bound:
+            return Sprt.Decision.ACCEPT_H0
+
+        else:
+            return Sprt.Decision.CONTINUE
+
+
+    def get_summary(self, stats: MatchStats) -> str:
+        return (f"sprt elo0 {self.__elo0:+.1f} elo1 {self.__elo1:+.1f}" +
+                f" / llr {self.get_llr(stats):+.3f} [{self.__lower_bound:+.3f}, {self.__upper_bound:+.3f}]" +
+                f" / {self.get_decision(stats).name}")
+
+
+def run_match(first_searcher: Searcher, second_searcher: Searcher,
+              game_count: int, setup: Setup.T=Setup.T.CLASSIC,
+              sprt: Optional[Sprt]=None, alternate_colors: bool=True,
+              process_count: Optional[int]=None, log_period: int=10) -> MatchStats:
+    """Play up to game_count games, as results stream in, and stop as soon as the SPRT decides
+
+    With alternate_colors, the first searcher plays white at even game indices and black at odd ones ;
+    otherwise it always plays white.
+    """
+
+    assert game_count > 0
+
+    process_count = process_count if process_count is not None else os.cpu_count()
+
+    stats = MatchStats()
+    match_start = time.time()
+
+    log(f"match {first_searcher.get_name()} versus {second_searcher.get_name()}" +
+        f" / setup {Setup.to_name(setup)} / at most {game_count} games on {process_count} processes")
+
+    def make_task(game_index):
+        if alternate_colors and game_index % 2 == 1:
+            return (game_index, setup, second_searcher, first_searcher)
+        else:
+            return (game_index, setup, first_searcher, second_searcher)
+
+    with multiprocessing.Pool(processes=process_count) as pool:
+
+        # >> imap_unordered consumes tasks lazily, so stopping early leaves unplayed games
+        for (game_index, white_points, black_points, game_hash) in pool.imap_unordered(run_one_game_task,
+                                                                                       map(make_task, range(game_count))):
+            if alternate_colors and game_index % 2 == 1:
+                stats.add_points(black_points, game_hash)
+            else:
+                stats.add_points(white_points, game_hash)
+
+            if stats.get_game_count() % log_period == 0:
+                log(stats.get_summary() + ("" if sprt is None else " / " + sprt.get_summary(stats)))
+
+            if sprt is not None and sprt.get_decision(stats) != Sprt.Decision.CONTINUE:
+                pool.terminate()
+                break
+
+    match_duration = time.time() - match_start
+
+    log(stats.get_summary() + ("" if sprt is None else " / " + sprt.get_summary(stats)))
+    log(f"effective game count {stats.get_effective_game_count()} / duration {match_duration:.0f} s")
+
+    return stats
+
+
+def run_one_game_task(task: Tuple[int, Setup.T, Searcher, Searcher]) -> Tuple[int, int, int, bytes]:
+    (game_index, setup, white_searcher, black_searcher) = task
+    (white_points, black_points, game_hash) = run_one_game(setup, white_searcher, black_searcher)
+    return (game_index, white_points, black_points, game_hash)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""pijersi_positions.py indexes the positions of archived games of the PIJERSI boardgame by their hashes."""
+
+
+_COPYRIGHT_AND_LICENSE = """
+PIJERSI-CERTU implements a GUI and a rules engine for the PIJERSI boardgame.
+
+Copyright (C) 2019 Lucas Borboleta (lucas.borboleta@free.fr).
+
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program. If not, see <http://www.gnu.org/licenses>.
+"""
+
+from dataclasses import dataclass
+import glob
+import json
+import os
+import sqlite3
+import sys
+
+from typing import Optional
+from typing import Sequence
+
+_package_home = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(_package_home)
+
+from pijersi_rules import BoardCodes
+from pijersi_rules import PijersiState
+from pijersi_rules import Player
+from pijersi_rules import Setup
+
+from pijersi_records import Result
+from pijersi_records import iterate_game_records
+from pijersi_records import read_game_text
+
+
+def log(msg: str=None):
+    if msg is None:
+        print("", file=sys.stderr, flush=True)
+    else:
+        for line in msg.split('\n'):
+            print(f"{line}", file=sys.stderr, flush=True)
+
+
+@dataclass
+class PositionStats:
+    """How often a position, or an action from it, was reached, and the results of its games"""
+
+    game_count: int = 0
+    white_win_count: int = 0
+    black_win_count: int = 0
+    draw_count: int = 0
+    unfinished_count: int = 0
+
+
+    def get_finished_count(self) -> int:
+        return self.white_win_count + self.black_win_count + self.draw_count
+
+
+    def get_score(self, player: Player.T) -> Optional[float]:
+        """Average points of the player, 1 for a win and 0.5 for a draw, over the finished games"""
+
+        finished_count = self.get_finished_count()
+        if finished_count == 0:
+            return None
+
+        win_count = self.white_win_count if player == Player.T.WHITE else self.black_win_count
+        return (win_count + 0.5*self.draw_count)/finished_count
+
+
+class PositionDatabase:
+    """SQLite index from position hash to (game, ply, next action), with the result of each game
+
+    A position is the board and the player to move, as hashed by PijersiState.get_position_hash.
+    Each game is identified by its source, so that ingesting the same file twice adds nothing.
+    """
+
+    __slots__ = ('__path', '__connection')
+
+
+    __SCHEMA = """
+        CREATE TABLE IF NOT EXISTS games (
+            game_id INTEGER PRIMARY KEY,
+            source TEXT NOT NULL UNIQUE,
+            result INTEGER NOT NULL,
+            ply_count INTEGER NOT NULL);
+
+        CREATE TABLE IF NOT EXISTS positions (
+            position_hash INTEGER NOT NULL,
+            game_id INTEGER NOT NULL,
+            ply INTEGER NOT NULL,
+            action_name TEXT);
+
+        CREATE INDEX IF NOT EXISTS positions_by_hash ON positions (position_hash);
+        """
+
+    __STATS_COLUMNS = """
+        COUNT(*),
+        SUM(games.result = 1),
+        SUM(games.result = 2),
+        SUM(games.result = 3),
+        SUM(games.result = 0)
+        """
+
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__connection = sqlite3.connect(path)
+        self.__connection.executescript(PositionDatabase.__SCHEMA)
+        self.__connection.commit()
+
+
+    def close(self):
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def has_game(self, source: str) -> bool:
+        cursor = self.__connection.execute("SELECT 1 FROM games WHERE source = ?", (source,))
+        return cursor.fetchone() is not None
+
+
+    def get_game_count(self) -> int:
+        return self.__connection.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+
+
+    def get_position_count(self) -> int:
+        return self.__connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+
+    def add_game(self, source: str, setup: Setup.T, board_codes: Optional[BoardCodes], action_names: Sequence[str],
+                 result: Optional[Result]=None, commit: bool=True) -> bool:
+        """Replay the game and index its positions ; return False if the source is already indexed
+
+        The action names may be full or simple names. Without a given result, the result is the one
+        of the last state, which is unfinished for a game stopped before its end.
+        """
+
+        if self.has_game(source):
+            return False
+
+        pijersi_state = PijersiState(board_codes=board_codes, setup=setup)
+        rows = []
+
+        for (ply, action_name) in enumerate(action_names):
+            action = pijersi_state.get_action_by_simple_name(action_name.replace('!', ''))
+            rows.append([pijersi_state.get_position_hash(), ply, str(action)])
+            pijersi_state = pijersi_state.take_action(action)
+
+        rows.append([pijersi_state.get_position_hash(), len(action_names), None])
+
+        if result is None:
+            result = Result.from_rewards(pijersi_state.get_rewards())
+
+        cursor = self.__connection.execute("INSERT INTO games (source, result, ply_count) VALUES (?, ?, ?)",
+                                           (source, int(result), len(action_names)))
+        game_id = cursor.lastrowid
+
+        self.__connection.executemany("INSERT INTO positions (position_hash, game_id, ply, action_name) VALUES (?, ?, ?, ?)",
+                                      ((position_hash, game_id, ply, action_name) for (position_hash, ply, action_name) in rows))
+
+        if commit:
+            self.__connection.commit()
+
+        return True
+
+
+    def add_text_file(self, path: str) -> int:
+        """Ingest a game text file, like those of the games folder"""
+
+        with open(path, 'r') as game_file:
+            (board_codes, action_names) = read_game_text(game_file.read())
+
+        setup = Setup.T.CLASSIC if board_codes is None else Setup.T.GIVEN
+
+        return int(self.add_game(os.path.abspath(path), setup, board_codes, action_names))
+
+
+    def add_record_file(self, path: str) -> int:
+        """Ingest a file written by GameRecordWriter, in a single transaction"""
+
+        added_count = 0
+
+        for (record_index, game_record) in enumerate(iterate_game_records(path)):
+            added_count += self.add_game(f"{os.path.abspath(path)}#{record_index}",
+                                         game_record.setup, game_record.board_codes, game_record.get_action_names(),
+                                         result=game_record.result, commit=False)
+
+        self.__connection.commit()
+        return added_count
+
+
+    def add_tournament_file(self, path: str) -> int:
+        """Ingest the JSON-lines file of a tournament, in a single transaction"""
+
+        added_count = 0
+
+        with open(path, 'r') as tournament_file:
+            for line in tournament_file:
+                try:
+                    game_record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                added_count += self.add_game(f"{os.path.abspath(path)}#{game_record['game_id']}",
+                                             Setup.from_name(game_record['setup']), bytearray(game_record['board_codes']),
+                                             game_record['actions'], commit=False)
+
+        self.__connection.commit()
+        return added_count
+
+
+    def add_files(self, paths: Sequence[str]) -> int:
+
+        added_count = 0
+
+        for path in paths:
+            try:
+                if path.endswith('.txt'):
+                    added_count += self.add_text_file(path)
+
+                elif path.endswith('.jsonl'):
+                    added_count += self.add_tournament_file(path)
+
+                else:
+                    added_count += self.add_record_file(path)
+
+            except Exception as exception:
+                log(f"skip {os.path.basename(path)}: {exception!r}")
+
+        return added_count
+
+
+    def get_position_stats(self, pijersi_state: PijersiState) -> PositionStats:
+
+        cursor = self.__connection.execute(f"""
+            SELECT {PositionDatabase.__STATS_COLUMNS}
+            FROM positions JOIN games ON positions.game_id = games.game_id
+            WHERE positions.position_hash = ?""", (pijersi_state.get_position_hash(),))
+
+        return PositionStats(*(count or 0 for count in cursor.fetchone()))
+
+
+    def get_action_stats(self, pijersi_state: PijersiState) -> Sequence[tuple]:
+        """Actions played from the position, with their stats, best score of the player to move first"""
+
+        cursor = self.__connection.execute(f"""
+            SELECT positions.action_name, {PositionDatabase.__STATS_COLUMNS}
+            FROM positions JOIN games ON positions.game_id = games.game_id
+            WHERE positions.position_hash = ? AND positions.action_name IS NOT NULL
+            GROUP BY positions.action_name""", (pijersi_state.get_position_hash(),))
+
+        player = pijersi_state.get_current_player()
+        action_stats = [(action_name, PositionStats(*counts)) for (action_name, *counts) in cursor.fetchall()]
+
+        def sort_key(item):
+            (_, stats) = item
+            score = stats.get_score(player)
+            return (1 if score is None else -score, -stats.game_count)
+
+        return sorted(action_stats, key=sort_key)
+
+
+    def get_games(self, pijersi_state: PijersiState, limit: int=100) -> Sequence[tuple]:
+        """(source, ply, result) of the games reaching the position"""
+
+        cursor = self.__connection.execute("""
+            SELECT games.source, positions.ply, games.result
+            FROM positions JOIN games ON positions.game_id = games.game_id
+            WHERE positions.position_hash = ?
+            LIMIT ?""", (pijersi_state.get_position_hash(), limit))
+
+        return [(source, ply, Result(result)) for (source, ply, result) in cursor.fetchall()]
+
+
+def main():
+
+    database_path = os.path.join(_package_home, "positions.sqlite")
+    games_home = os.path.join(_package_home, "..", "games")
+
+    with PositionDatabase(database_path) as database:
+
+        if True:
+            added_count = database.add_files(sorted(glob.glob(os.path.join(games_home, "*.txt"))))
+            log(f"{added_count} games added / {database.get_game_count()} games / {database.get_position_count()} positions")
+
+        if True:
+            pijersi_state = PijersiState()
+            log(f"start position: {database.get_position_stats(pijersi_state)}")
+            for (action_name, stats) in database.get_action_stats(pijersi_state):
+                log(f"{action_name}: {stats}")
+
+
+if __name__ == "__main__":
+
+    log()
+    log("Hello")
+    log()
+    log(f"Python sys.version = {sys.version}")
+
+    main()
+
+    log()
+    log("Bye")
@@ -0,0 +1,606 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""pijersi_records.py writes and reads compact binary records of games of the PIJERSI boardgame."""
+
+
+_COPYRIGHT_AND_LICENSE = """
+PIJERSI-CERTU implements a GUI and a rules engine for the PIJERSI boardgame.
+
+Copyright (C) 2019 Lucas Borboleta (lucas.borboleta@free.fr).
+
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program. If not, see <http://www.gnu.org/licenses>.
+"""
+
+import array
+from dataclasses import dataclass
+from dataclasses import field
+import enum
+import os
+import re
+import struct
+import sys
+
+from typing import BinaryIO
+from typing import Iterable
+from typing import Iterator
+from typing import Mapping
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+_package_home = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(_package_home)
+
+from pijersi_rules import BoardCodes
+from pijersi_rules import Cube
+from pijersi_rules import Game
+from pijersi_rules import Hexagon
+from pijersi_rules import HexState
+from pijersi_rules import Notation
+from pijersi_rules import PijersiState
+from pijersi_rules import Player
+from pijersi_rules import Reward
+from pijersi_rules import Setup
+
+import pijersi_setup_encoding as setup_encoding
+
+
+def log(msg: str=None):
+    if msg is None:
+        print("", file=sys.stderr, flush=True)
+    else:
+        for line in msg.split('\n'):
+            print(f"{line}", file=sys.stderr, flush=True)
+
+
+@enum.unique
+class Result(enum.IntEnum):
+    UNFINISHED = 0
+    WHITE_WIN = 1
+    BLACK_WIN = 2
+    DRAW = 3
+
+
+    @staticmethod
+    def from_rewards(rewards: Optional[Tuple[Reward, Reward]]) -> 'Result':
+
+        if rewards is None:
+            return Result.UNFINISHED
+
+        elif rewards[Player.T.WHITE] == Reward.WIN:
+            return Result.WHITE_WIN
+
+        elif rewards[Player.T.BLACK] == Reward.WIN:
+            return Result.BLACK_WIN
+
+        else:
+            return Result.DRAW
+
+
+@dataclass
+class GameRecord:
+    """One game: its setup, the index of each played action in the sorted legal action names, and its result"""
+
+    setup: Setup.T
+    board_codes: BoardCodes
+    action_indices: Sequence[int]
+    result: Result = Result.UNFINISHED
+    evaluations: Optional[Sequence[float]] = None
+    durations: Optional[Sequence[float]] = None
+    action_names: Optional[Sequence[str]] = field(default=None, compare=False)
+
+
+    def iterate_states(self) -> Iterator[PijersiState]:
+        """States from the setup to the last action, computed on demand"""
+
+        pijersi_state = PijersiState(board_codes=self.board_codes, setup=self.setup)
+        yield pijersi_state
+
+        for action_index in self.action_indices:
+            action_name = sorted(pijersi_state.get_action_names())[action_index]
+            pijersi_state = pijersi_state.take_action(pijersi_state.get_action_by_name(action_name))
+            yield pijersi_state
+
+
+    def get_action_names(self) -> Sequence[str]:
+
+        if self.action_names is None:
+            action_names = []
+            pijersi_state = None
+
+            for next_state in self.iterate_states():
+                if pijersi_state is not None:
+                    action_index = self.action_indices[len(action_names)]
+                    action_names.append(sorted(pijersi_state.get_action_names())[action_index])
+                pijersi_state = next_state
+
+            self.action_names = action_names
+
+        return self.action_names
+
+
+def make_game_record(setup: Setup.T, board_codes: BoardCodes, action_names: Sequence[str],
+                     evaluations: Optional[Sequence[float]]=None,
+                     durations: Optional[Sequence[float]]=None) -> GameRecord:
+    """Replay the actions to convert their names into indices and to find the result"""
+
+    assert evaluations is None or len(evaluations) == len(action_names)
+    assert durations is None or len(durations) == len(action_names)
+
+    pijersi_state = PijersiState(board_codes=board_codes, setup=setup)
+    action_indices = []
+
+    for action_name in action_names:
+        sorted_action_names = sorted(pijersi_state.get_action_names())
+        action_indices.append(sorted_action_names.index(action_name))
+        pijersi_state = pijersi_state.take_action(pijersi_state.get_action_by_name(action_name))
+
+    return GameRecord(setup=setup,
+                      board_codes=PijersiState.copy_board_codes(board_codes),
+                      action_indices=action_indices,
+                      result=Result.from_rewards(pijersi_state.get_rewards()),
+                      evaluations=evaluations,
+                      durations=durations,
+                      action_names=list(action_names))
+
+
+def make_game_record_from_game(game: Game, evaluations: Optional[Sequence[float]]=None) -> GameRecord:
+
+    action_names = game.get_played_actions()
+
+    # >> the durations are only kept by the game when its log or its virtual clock is enabled
+    turn_durations = game.get_turn_durations()
+    white_durations = turn_durations[Player.T.WHITE]
+    black_durations = turn_durations[Player.T.BLACK]
+
+    durations = None
+    if len(white_durations) + len(black_durations) == len(action_names):
+        durations = [white_durations[action_index//2] if action_index % 2 == 0 else black_durations[action_index//2]
+                     for action_index in range(len(action_names))]
+
+    return make_game_record(setup=game.get_setup(),
+                            board_codes=game.get_start_board_codes(),
+                            action_names=action_names,
+                            evaluations=evaluations,
+                            durations=durations)
+
+
+class SetupCodec:
+    """Setups whose cubes are at the places of the half-random setup use two base-26 numbers, one per player
+
+    Any other setup, like a full-random one, keeps its 45 board codes.
+    """
+
+    @enum.unique
+    class Kind(enum.IntEnum):
+        ENCODED = 0
+        RAW = 1
+
+
+    STACK_BOTTOM_POSITION = 'b4'
+    STACK_TOP_POSITION = 'b4t'
+
+
+    @staticmethod
+    def mirror_position(white_position: str) -> str:
+        """Position of black matching a position of white by the central symmetry of the board"""
+
+        row_name = white_position[0]
+        col_index = int(white_position[1])
+        top_suffix = white_position[2:]
+
+        if row_name == 'a':
+            return f"g{7 - col_index}{top_suffix}"
+
+        else:
+            assert row_name == 'b'
+            return f"f{8 - col_index}{top_suffix}"
+
+
+    @staticmethod
+    def extract_positions(board_codes: BoardCodes, player: Player.T) -> Optional[Mapping]:
+        """Cube names of the player at the white positions, in white letters, or None if not applicable"""
+
+        positions = {}
+
+        for white_position in setup_encoding.WHITE_POSITIONS:
+
+            if white_position == SetupCodec.STACK_TOP_POSITION:
+                continue
+
+            position = white_position if player == Player.T.WHITE else SetupCodec.mirror_position(white_position)
+            hex_state = HexState.decode(board_codes[Hexagon.get(position).index])
+
+            if hex_state.is_empty or hex_state.player != player:
+                return None
+
+            if white_position == SetupCodec.STACK_BOTTOM_POSITION:
+                if not hex_state.has_stack:
+                    return None
+                positions[SetupCodec.STACK_TOP_POSITION] = Cube.to_name(Player.T.WHITE, hex_state.top)
+
+            elif hex_state.has_stack:
+                return None
+
+            positions[white_position] = Cube.to_name(Player.T.WHITE, hex_state.bottom)
+
+        return positions
+
+
+    @staticmethod
+    def insert_positions(board_codes: BoardCodes, player: Player.T, positions: Mapping):
+
+        for white_position in setup_encoding.WHITE_POSITIONS:
+
+            if white_position == SetupCodec.STACK_TOP_POSITION:
+                continue
+
+            position = white_position if player == Player.T.WHITE else SetupCodec.mirror_position(white_position)
+            cube_name = positions[white_position] if player == Player.T.WHITE else positions[white_position].lower()
+
+            if white_position == SetupCodec.STACK_BOTTOM_POSITION:
+                top_name = positions[SetupCodec.STACK_TOP_POSITION]
+                top_name = top_name if player == Player.T.WHITE else top_name.lower()
+                PijersiState.set_stack_from_names(board_codes, position, bottom_name=cube_name, top_name=top_name)
+
+            else:
+                PijersiState.set_cube_from_names(board_codes, position, cube_name)
+
+
+    @staticmethod
+    def encoding_to_number(encoding: str) -> int:
+        number = 0
+        for digit in encoding:
+            number = number*setup_encoding.SETUP_BASE + setup_encoding.INVERSED_SETUP_DIGITS[digit]
+        return number
+
+
+    @staticmethod
+    def number_to_encoding(number: int) -> str:
+        encoding = ""
+        for _ in range(setup_encoding.SETUP_LENGTH):
+            encoding = setup_encoding.SETUP_DIGITS[number % setup_encoding.SETUP_BASE] + encoding
+            number = number // setup_encoding.SETUP_BASE
+        assert number == 0
+        return encoding
+
+
+    @staticmethod
+    def encode(board_codes: BoardCodes) -> Tuple[Kind, bytes]:
+
+        numbers = []
+
+        for player in Player.T:
+            positions = SetupCodec.extract_positions(board_codes, player)
+
+            if positions is None:
+                break
+
+            numbers.append(SetupCodec.encoding_to_number(setup_encoding.encode_white_positions(positions)))
+
+        if len(numbers) == len(Player.T):
+            # >> check that no other hexagon is occupied, the decoding must give back the same board
+            encoded = struct.pack('<II', *numbers)
+            if SetupCodec.decode(SetupCodec.Kind.ENCODED, encoded) == board_codes:
+                return (SetupCodec.Kind.ENCODED, encoded)
+
+        return (SetupCodec.Kind.RAW, bytes(board_codes))
+
+
+    @staticmethod
+    def decode(kind: Kind, payload: bytes) -> BoardCodes:
+
+        if kind == SetupCodec.Kind.RAW:
+            return bytearray(payload)
+
+        board_codes = PijersiState.empty_board_codes()
+
+        for (player, number) in zip(Player.T, struct.unpack('<II', payload)):
+            positions = setup_encoding.decode_white_positions(SetupCodec.number_to_encoding(number))
+            SetupCodec.insert_positions(board_codes, player, positions)
+
+        return board_codes
+
+
+    @staticmethod
+    def get_payload_size(kind: Kind) -> int:
+        return struct.calcsize('<II') if kind == SetupCodec.Kind.ENCODED else len(Hexagon.get_all())
+
+
+class GameRecordFormat:
+    """Layout of a file of game records
+
+    The file starts with a header, then each record is:
+    flags, setup kind, setup, result, action count ; setup payload ; action indices ;
+    optional evaluations ; optional durations.
+    All the numbers are little-endian, whatever the byte order of the machine:
+    the action indices as unsigned 16-bit integers, the evaluations and durations as 32-bit floats.
+    """
+
+    MAGIC = b'PGR1'
+    VERSION = 1
+
+    FILE_HEADER = struct.Struct('<4sH')
+    RECORD_HEADER = struct.Struct('<BBBBH')
+
+    FLAG_EVALUATIONS = 0x01
+    FLAG_DURATIONS = 0x02
+
+    # >> the number of legal actions is well below 2**16
+    INDEX_TYPECODE = 'H'
+    VALUE_TYPECODE = 'f'
+
+
+    @staticmethod
+    def write_file_header(stream: BinaryIO):
+        stream.write(GameRecordFormat.FILE_HEADER.pack(GameRecordFormat.MAGIC, GameRecordFormat.VERSION))
+
+
+    @staticmethod
+    def read_file_header(stream: BinaryIO):
+        data = stream.read(GameRecordFormat.FILE_HEADER.size)
+        (magic, version) = GameRecordFormat.FILE_HEADER.unpack(data)
+        assert magic == GameRecordFormat.MAGIC
+        assert version == GameRecordFormat.VERSION
+
+
+    @staticmethod
+    def pack_record(game_record: GameRecord) -> bytes:
+
+        flags = 0
+        if game_record.evaluations is not None:
+            flags |= GameRecordFormat.FLAG_EVALUATIONS
+        if game_record.durations is not None:
+            flags |= GameRecordFormat.FLAG_DURATIONS
+
+        (setup_kind, setup_payload) = SetupCodec.encode(game_record.board_codes)
+
+        chunks = [GameRecordFormat.RECORD_HEADER.pack(flags, setup_kind, game_record.setup, game_record.result,
+                                                      len(game_record.action_indices)),
+                  setup_payload,
+                  GameRecordFormat.pack_array(GameRecordFormat.INDEX_TYPECODE, game_record.action_indices)]
+
+        if game_record.evaluations is not None:
+            chunks.append(GameRecordFormat.pack_array(GameRecordFormat.VALUE_TYPECODE, game_record.evaluations))
+
+        if game_record.durations is not None:
+            chunks.append(GameRecordFormat.pack_array(GameRecordFormat.VALUE_TYPECODE, game_record.durations))
+
+        return b''.join(chunks)
+
+
+    @staticmethod
+    def pack_array(typecode: str, values: Sequence) -> bytes:
+        values = array.array(typecode, values)
+        if sys.byteorder != 'little':
+            values.byteswap()
+        return values.tobytes()
+
+
+    @staticmethod
+    def unpack_array(typecode: str, data: bytes) -> list:
+        values = array.array(typecode)
+        values.frombytes(data)
+        if sys.byteorder != 'little':
+            values.byteswap()
+        return values.tolist()
+
+
+    @staticmethod
+    def read_record(stream: BinaryIO) -> Optional[GameRecord]:
+        """Next record of the stream, or None at its end or at a truncated last record"""
+
+        data = stream.read(GameRecordFormat.RECORD_HEADER.size)
+        if len(data) < GameRecordFormat.RECORD_HEADER.size:
+            return None
+
+        (flags, setup_kind, setup, result, action_count) = GameRecordFormat.RECORD_HEADER.unpack(data)
+        setup_kind = SetupCodec.Kind(setup_kind)
+
+        payload_size = SetupCodec.get_payload_size(setup_kind)
+        payload = stream.read(payload_size)
+        if len(payload) < payload_size:
+            return None
+
+        def read_array(typecode):
+            data_size = array.array(typecode).itemsize*action_count
+            data = stream.read(data_size)
+            if len(data) < data_size:
+                return None
+            return GameRecordFormat.unpack_array(typecode, data)
+
+        action_indices = read_array(GameRecordFormat.INDEX_TYPECODE)
+        if action_indices is None:
+            return None
+
+        evaluations = None
+        if flags & GameRecordFormat.FLAG_EVALUATIONS:
+            evaluations = read_array(GameRecordFormat.VALUE_TYPECODE)
+            if evaluations is None:
+                return None
+
+        durations = None
+        if flags & GameRecordFormat.FLAG_DURATIONS:
+            durations = read_array(GameRecordFormat.VALUE_TYPECODE)
+            if durations is None:
+                return None
+
+        return GameRecord(setup=Setup.T(setup),
+                          board_codes=SetupCodec.decode(setup_kind, payload),
+                          action_indices=action_indices,
+                          result=Result(result),
+                          evaluations=evaluations,
+                          durations=durations)
+
+
+class GameRecordWriter:
+    """Append game records to a file, one write per record, so that an interrupted writer loses at most one game"""
+
+    __slots__ = ('__path', '__stream', '__record_count')
+
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__stream = None
+        self.__record_count = 0
+
+
+    def open(self):
+        assert self.__stream is None
+
+        is_new_file = not os.path.isfile(self.__path) or os.path.getsize(self.__path) == 0
+
+        self.__stream = open(self.__path, 'ab')
+
+        if is_new_file:
+            GameRecordFormat.write_file_header(self.__stream)
+
+
+    def close(self):
+        if self.__stream is not None:
+            self.__stream.close()
+            self.__stream = None
+
+
+    def __enter__(self):
+        self.open()
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+    def write(self, game_record: GameRecord):
+        assert self.__stream is not None
+        self.__stream.write(GameRecordFormat.pack_record(game_record))
+        self.__record_count += 1
+
+
+    def write_all(self, game_records: Iterable[GameRecord]):
+        for game_record in game_records:
+            self.write(game_record)
+
+
+    def flush(self):
+        assert self.__stream is not None
+        self.__stream.flush()
+
+
+    def get_record_count(self) -> int:
+        """Number of records written since the opening"""
+        return self.__record_count
+
+
+def iterate_game_records(path: str) -> Iterator[GameRecord]:
+    """Records of a file, read one at a time, so that huge archives can be scanned in constant memory"""
+
+    with open(path, 'rb') as stream:
+        GameRecordFormat.read_file_header(stream)
+
+        while True:
+            game_record = GameRecordFormat.read_record(stream)
+            if game_record is None:
+                break
+            yield game_record
+
+
+def read_game_text(game_text: str) -> Tuple[Optional[BoardCodes], Sequence[str]]:
+    """Setup and actions of a game text file, like those of the games folder, using the notation edited in the GUI
+
+    The setup is None when the text does not describe one, meaning the classic setup.
+    """
+
+    setup_items = []
+    action_names = []
+
+    items = game_text.split()
+
+    for item in items:
+        if re.match(r"^[a-g][1-9]:[a-zA-Z]{1,2}$", item) or re.match(r"^[a-g][1-9]{2}:[a-zA-Z]+$", item):
+            setup_items.append(item)
+
+    # >> the actions are the first sequence "1 action 2 action ..." with optional scores
+    item_index = 0
+    while item_index < len(items) - 1:
+        if items[item_index] == "1" and Notation.classify_simple_notation(items[item_index + 1].replace("!", "")) != Notation.SimpleCase.INVALID:
+            break
+        item_index += 1
+
+    while item_index < len(items) - 1 and items[item_index] == str(len(action_names) + 1):
+        action_name = items[item_index + 1].replace("!", "")
+
+        if Notation.classify_simple_notation(action_name) == Notation.SimpleCase.INVALID:
+            break
+
+        action_names.append(action_name)
+        item_index += 2
+
+        if item_index < len(items) and re.match(r"^[+-][0-9]+\*?$", items[item_index]):
+            item_index += 1
+
+    if len(setup_items) == 0:
+        return (None, action_names)
+
+    board_codes = PijersiState.empty_board_codes()
+
+    for setup_item in setup_items:
+        (hex_names, cube_names) = setup_item.split(':')
+
+        if len(hex_names) == 2:
+            if len(cube_names) == 1:
+                PijersiState.set_cube_from_names(board_codes, hex_names, cube_names)
+            else:
+                PijersiState.set_stack_from_names(board_codes, hex_names, bottom_name=cube_names[1], top_name=cube_names[0])
+
+        else:
+            (col_start, col_end) = (int(hex_names[1]), int(hex_names[2]))
+            for (col_index, cube_name) in zip(range(col_start, col_end + 1), cube_names):
+                PijersiState.set_cube_from_names(board_codes, f"{hex_names[0]}{col_index}", cube_name)
+
+    return (board_codes, action_names)
+
+
+def main():
+
+    records_path = os.path.join(_package_home, "self-play-records.pgr")
+
+    if True:
+        from pijersi_rules import RandomSearcher
+
+        with GameRecordWriter(records_path) as writer:
+            for setup in (Setup.T.CLASSIC, Setup.T.HALF_RANDOM, Setup.T.FULL_RANDOM):
+                game = Game(setup=setup)
+                game.enable_log(False)
+                game.set_white_searcher(RandomSearcher("random"))
+                game.set_black_searcher(RandomSearcher("random"))
+                game.start()
+                while game.has_next_turn():
+                    game.next_turn()
+                writer.write(make_game_record_from_game(game))
+
+    if True:
+        game_count = 0
+        action_count = 0
+        for game_record in iterate_game_records(records_path):
+            game_count += 1
+            action_count += len(game_record.action_indices)
+        log(f"{game_count} games / {action_count} actions / {os.path.getsize(records_path)} bytes")
+
+
+if __name__ == "__main__":
+
+    log()
+    log("Hello")
+    log()
+    log(f"Python sys.version = {sys.version}")
+
+    main()
+
+    log()
+    log("Bye")
@@ -20,15 +20,20 @@ You should have received a copy of the GNU General Public License along with thi
 
 import array
 from collections import Counter
+from collections import OrderedDict
 from dataclasses import dataclass
 import enum
+import hashlib
 import math
 import os
 import random
 import re
 from statistics import mean
+import struct
 import sys
+import threading
 import time
+import tracemalloc
 from typing import Iterable
 from typing import Mapping
 from typing import NewType
@@ -794,6 +799,7 @@ BoardStates = Sequence[HexState]
 class PijersiAction:
     Self = TypeVar("Self", bound="PijersiAction")
     PijersiState = TypeVar("PijersiState", bound="PijersiState")
+    MinimaxState = TypeVar("MinimaxState", bound="MinimaxState")
 
     next_board_codes: Optional[(BoardCodes)] = None
     path_vertices: Optional[Path] = None
@@ -801,6 +807,7 @@ class PijersiAction:
     move_code: Optional[MoveCode] = None
     value: Optional[float] = None
     next_state: Optional[PijersiState] = None
+    next_node: Optional[MinimaxState] = None
 
     __TABLE_MOVE_CODE_TO_NAMES = [None for _ in range(4)]
     __TABLE_MOVE_CODE_TO_NAMES[0] = ['-', '']
@@ -879,6 +886,10 @@ class PijersiState:
     __TABLE_MAKE_PATH1 = None
     __TABLE_MAKE_PATH2 = None
 
+    __TABLE_HEX_INDEX_BY_NAME = None
+    __TABLE_PATH1_DIRECTION = None
+    __TABLE_PATH2_DIRECTION = None
+
     __TABLE_GOAL_INDICES = None
     __TABLE_GOAL_DISTANCES = None
 
@@ -1038,6 +1049,24 @@ class PijersiState:
             return table
 
 
+        def create_table_hex_index_by_name() -> Mapping[str, HexIndex]:
+            return {hexagon.name:hexagon.index for hexagon in Hexagon.get_all()}
+
+
+        def create_table_path_direction(table_make_path: Sequence[Optional[Sequence[int]]]) -> Mapping[Tuple[HexIndex, HexIndex], int]:
+            """Direction of the path from its first hexagon to its last hexagon"""
+
+            table = {}
+
+            for source in Hexagon.get_all_indices():
+                for direction in Hexagon.Direction:
+                    path = table_make_path[source][direction]
+                    if path is not None:
+                        table[(source, path[-1])] = direction
+
+            return table
+
+
         def create_table_make_path2() -> Sequence[Optional[Sequence[int]]]:
 
             table = [[None for direction in Hexagon.Direction] for source in Hexagon.get_all_indices()]
@@ -1247,6 +1276,10 @@ class PijersiState:
             PijersiState.__TABLE_MAKE_PATH1 = create_table_make_path1()
             PijersiState.__TABLE_MAKE_PATH2 = create_table_make_path2()
 
+            PijersiState.__TABLE_HEX_INDEX_BY_NAME = create_table_hex_index_by_name()
+            PijersiState.__TABLE_PATH1_DIRECTION = create_table_path_direction(PijersiState.__TABLE_MAKE_PATH1)
+            PijersiState.__TABLE_PATH2_DIRECTION = create_table_path_direction(PijersiState.__TABLE_MAKE_PATH2)
+
             PijersiState.__TABLE_GOAL_INDICES = create_table_goal_indices()
             PijersiState.__TABLE_GOAL_DISTANCES = create_table_goal_distances()
             PijersiState.__TABLE_CENTER_DISTANCES = create_table_center_distances()
@@ -1439,7 +1472,7 @@ class PijersiState:
     def get_actions(self, use_cache: bool=True) -> Sequence[PijersiAction]:
 
         if not use_cache or self.__actions is None:
-            self.__actions = self.__find_all_actions()
+            self.__actions = PijersiState.find_board_actions(self.__board_codes, self.__player)
 
         return self.__actions
 
@@ -1471,20 +1504,162 @@ class PijersiState:
 
 
     def get_action_by_name(self, action_name: str) -> PijersiAction:
-        _ = self.get_action_names()
+
+        # >> without the dictionary of all actions, parsing the name avoids finding all the actions
+        if self.__actions_by_names is None:
+            action = self.parse_action_name(action_name)
+            if action is None or str(action) != action_name:
+                raise KeyError(action_name)
+            return action
+
         return self.__actions_by_names[action_name]
 
 
     def get_action_by_simple_name(self, action_name: str) -> PijersiAction:
-        _ = self.get_action_simple_names()
+
+        if self.__actions_by_simple_names is None:
+            action = self.parse_action_name(action_name)
+            if action is None or '!' in action_name:
+                raise KeyError(action_name)
+            return action
+
         return self.__actions_by_simple_names[action_name]
 
 
     def get_action_by_ugi_name(self, action_name: str) -> PijersiAction:
-        _ = self.get_action_ugi_names()
+
+        if self.__actions_by_ugi_names is None:
+            action = self.parse_action_ugi_name(action_name)
+            if action is None:
+                raise KeyError(action_name)
+            return action
+
         return self.__actions_by_ugi_names[action_name]
 
 
+    def is_legal(self, action_name: str) -> bool:
+        """Check a full, simple or UGI action name without finding all the actions"""
+
+        if '-' in action_name or '=' in action_name:
+            action = self.parse_action_name(action_name)
+            return action is not None and ('!' not in action_name or str(action) == action_name)
+
+        else:
+            return self.parse_action_ugi_name(action_name) is not None
+
+
+    def parse_action_name(self, action_name: str) -> Optional[PijersiAction]:
+        """Action of a full or simple name, like 'a5-b6=c6', or None if it is not a legal action"""
+
+        action_name = action_name.replace('!', '')
+        table_hex_index = PijersiState.__TABLE_HEX_INDEX_BY_NAME
+
+        if len(action_name) == 5 and action_name[2] in '-=':
+            hex_names = (action_name[0:2], action_name[3:5])
+            move_names = action_name[2]
+
+        elif len(action_name) == 8 and action_name[2] + action_name[5] in ('-=', '=-'):
+            hex_names = (action_name[0:2], action_name[3:5], action_name[6:8])
+            move_names = action_name[2] + action_name[5]
+
+        else:
+            return None
+
+        if not all(hex_name in table_hex_index for hex_name in hex_names):
+            return None
+
+        return self.__make_action([table_hex_index[hex_name] for hex_name in hex_names], move_names)
+
+
+    def parse_action_ugi_name(self, action_ugi_name: str) -> Optional[PijersiAction]:
+        """Action of a UGI name, like 'a5b6c6', or None if it is not a legal action
+
+        The ambiguity between a cube move followed by a stack move and the reverse order,
+        from a stack, is resolved like get_action_ugi_names: the stack move first wins.
+        """
+
+        table_hex_index = PijersiState.__TABLE_HEX_INDEX_BY_NAME
+
+        if len(action_ugi_name) not in (4, 6):
+            return None
+
+        hex_names = [action_ugi_name[index:index + 2] for index in range(0, len(action_ugi_name), 2)]
+
+        if not all(hex_name in table_hex_index for hex_name in hex_names):
+            return None
+
+        hex_indices = [table_hex_index[hex_name] for hex_name in hex_names]
+        source_has_stack = PijersiState.__TABLE_HAS_STACK[self.__player][self.__board_codes[hex_indices[0]]] != 0
+
+        if len(hex_indices) == 2:
+            # >> a cube alone; the top cube of a stack uses the 6 characters form
+            return None if source_has_stack else self.__make_action(hex_indices, '-')
+
+        elif hex_indices[0] == hex_indices[1]:
+            return self.__make_action(hex_indices[1:], '-') if source_has_stack else None
+
+        elif hex_indices[1] == hex_indices[2]:
+            return self.__make_action(hex_indices[:2], '=')
+
+        else:
+            action = self.__make_action(hex_indices, '=-') if source_has_stack else None
+            return action if action is not None else self.__make_action(hex_indices, '-=')
+
+
+    def __make_action(self, hex_indices: Sequence[HexIndex], move_names: str) -> Optional[PijersiAction]:
+        """Play the moves on the board through the tables, like find_board_actions does for one source"""
+
+        source = hex_indices[0]
+        source_code = self.__board_codes[source]
+
+        if move_names[0] == '-':
+            if PijersiState.__TABLE_HAS_CUBE[self.__player][source_code] == 0:
+                return None
+        else:
+            if PijersiState.__TABLE_HAS_STACK[self.__player][source_code] == 0:
+                return None
+
+        action1 = PijersiState.__try_move_action(self.__board_codes, hex_indices[0], hex_indices[1], move_names[0])
+
+        if action1 is None or len(move_names) == 1:
+            return action1
+
+        board_codes_1 = action1.next_board_codes
+
+        if move_names[1] == '=' and PijersiState.__TABLE_HAS_STACK[self.__player][board_codes_1[hex_indices[1]]] == 0:
+            return None
+
+        action2 = PijersiState.__try_move_action(board_codes_1, hex_indices[1], hex_indices[2], move_names[1])
+
+        if action2 is None:
+            return None
+
+        return PijersiAction(next_board_codes=action2.next_board_codes,
+                             path_vertices=action1.path_vertices + [action2.path_vertices[-1]],
+                             capture_code=action1.capture_code + 2*action2.capture_code,
+                             move_code=action1.move_code + 2*action2.move_code)
+
+
+    @staticmethod
+    def __try_move_action(board_codes: BoardCodes, source: HexIndex, destination: HexIndex, move_name: str) -> Optional[PijersiAction]:
+
+        direction = PijersiState.__TABLE_PATH1_DIRECTION.get((source, destination))
+
+        if move_name == '-':
+            if direction is None:
+                return None
+            return PijersiState.__try_cube_path1_action(board_codes, source, direction)
+
+        elif direction is not None:
+            return PijersiState.__try_stack_path1_action(board_codes, source, direction)
+
+        else:
+            direction = PijersiState.__TABLE_PATH2_DIRECTION.get((source, destination))
+            if direction is None:
+                return None
+            return PijersiState.__try_stack_path2_action(board_codes, source, direction)
+
+
 
     def to_ugi_name(self, action: PijersiAction) -> Optional[str]:
         action_name = str(action).replace('!', '')
@@ -1538,15 +1713,35 @@ class PijersiState:
 
 
     def get_fighter_counts(self)-> Sequence[int]:
-        return [sum((PijersiState.__TABLE_FIGHTER_COUNT[player][hex_code] for hex_code in self.__board_codes)) for player in Player.T]
+        return PijersiState.get_board_fighter_counts(self.__board_codes)
 
 
     def get_cube_counts(self)-> Sequence[int]:
-        return [sum((PijersiState.__TABLE_CUBE_COUNT[player][hex_code] for hex_code in self.__board_codes)) for player in Player.T]
+        return PijersiState.get_board_cube_counts(self.__board_codes)
 
 
     def get_distances_to_goal(self) -> Sequence[Sequence[int]]:
         """White and black distances to goal"""
+        return PijersiState.get_board_distances_to_goal(self.__board_codes)
+
+
+    def get_distances_to_center(self) -> Sequence[Sequence[int]]:
+        """White and black distances to center"""
+        return PijersiState.get_board_distances_to_center(self.__board_codes)
+
+
+    @staticmethod
+    def get_board_fighter_counts(board_codes: BoardCodes)-> Sequence[int]:
+        return [sum((PijersiState.__TABLE_FIGHTER_COUNT[player][hex_code] for hex_code in board_codes)) for player in Player.T]
+
+
+    @staticmethod
+    def get_board_cube_counts(board_codes: BoardCodes)-> Sequence[int]:
+        return [sum((PijersiState.__TABLE_CUBE_COUNT[player][hex_code] for hex_code in board_codes)) for player in Player.T]
+
+
+    @staticmethod
+    def get_board_distances_to_goal(board_codes: BoardCodes) -> Sequence[Sequence[int]]:
 
         distances_to_goal = [[] for player in Player.T]
 
@@ -1554,15 +1749,15 @@ class PijersiState:
             fighter_count = PijersiState.__TABLE_FIGHTER_COUNT[player]
             goal_distances = PijersiState.__TABLE_GOAL_DISTANCES[player]
 
-            for (hex_index, hex_code) in enumerate(self.__board_codes):
+            for (hex_index, hex_code) in enumerate(board_codes):
                 for _ in range(fighter_count[hex_code]):
                     distances_to_goal[player].append(goal_distances[hex_index])
 
         return distances_to_goal
 
 
-    def get_distances_to_center(self) -> Sequence[Sequence[int]]:
-        """White and black distances to center"""
+    @staticmethod
+    def get_board_distances_to_center(board_codes: BoardCodes) -> Sequence[Sequence[int]]:
 
         distances_to_center = [[] for player in Player.T]
 
@@ -1571,7 +1766,7 @@ class PijersiState:
         for player in Player.T:
             cube_count = PijersiState.__TABLE_CUBE_COUNT[player]
 
-            for (hex_index, hex_code) in enumerate(self.__board_codes):
+            for (hex_index, hex_code) in enumerate(board_codes):
                 for _ in range(cube_count[hex_code]):
                     distances_to_center[player].append(center_distances[hex_index])
 
@@ -1692,6 +1887,12 @@ class PijersiState:
         return self.__board_codes
 
 
+    def get_position_hash(self) -> int:
+        """Signed 64 bits hash of the board and of the player to move, the same in any process and any run"""
+        digest = hashlib.blake2b(bytes((self.__player,)) + self.__board_codes, digest_size=8).digest()
+        return int.from_bytes(digest, byteorder='little', signed=True)
+
+
     def show(self):
         log()
         log(self.get_show_text())
@@ -2002,14 +2203,8 @@ class PijersiState:
     def __player_is_arrived(self, player: Player.T, use_cache: bool=True) -> bool:
 
         if not use_cache or self.__player_is_arrived_cache is None:
-            self.__player_is_arrived_cache = [None for _ in Player.T]
-
-            for cache_player in Player.T:
-
-                goal_indices = PijersiState.__TABLE_GOAL_INDICES[cache_player]
-                has_fighter = PijersiState.__TABLE_HAS_FIGHTER[cache_player]
-
-                self.__player_is_arrived_cache[cache_player] = sum((has_fighter[self.__board_codes[hex_index]] for hex_index in goal_indices)) != 0
+            self.__player_is_arrived_cache = [PijersiState.__board_player_is_arrived(self.__board_codes, cache_player)
+                                              for cache_player in Player.T]
 
         return self.__player_is_arrived_cache[player]
 
@@ -2017,16 +2212,53 @@ class PijersiState:
     def __has_action(self, use_cache: bool=True) -> bool:
 
         if not use_cache or self.__has_action_cache is None:
+            self.__has_action_cache = PijersiState.__board_has_action(self.__board_codes, self.__player)
 
-            self.__has_action_cache = False
+        return self.__has_action_cache
 
-            for cube_source in PijersiState.__find_cube_sources(self.__board_codes, self.__player):
-                for cube_direction in Hexagon.DIRECTION_ITERATOR:
-                    if PijersiState.__try_cube_path1_action(self.__board_codes, cube_source, cube_direction) is not None:
-                        self.__has_action_cache = True
-                        break
 
-        return self.__has_action_cache
+    @staticmethod
+    def __board_player_is_arrived(board_codes: BoardCodes, player: Player.T) -> bool:
+        goal_indices = PijersiState.__TABLE_GOAL_INDICES[player]
+        has_fighter = PijersiState.__TABLE_HAS_FIGHTER[player]
+
+        return sum((has_fighter[board_codes[hex_index]] for hex_index in goal_indices)) != 0
+
+
+    @staticmethod
+    def __board_has_action(board_codes: BoardCodes, player: Player.T) -> bool:
+
+        for cube_source in PijersiState.__find_cube_sources(board_codes, player):
+            for cube_direction in Hexagon.DIRECTION_ITERATOR:
+                if PijersiState.__try_cube_path1_action(board_codes, cube_source, cube_direction) is not None:
+                    return True
+
+        return False
+
+
+    @staticmethod
+    def find_board_rewards(board_codes: BoardCodes, player: Player.T, credit: int) -> Optional[Tuple[Reward, Reward]]:
+        """Rewards of a terminal board, with the given player to move and credit, or None if not terminal"""
+
+        if PijersiState.__board_player_is_arrived(board_codes, Player.T.WHITE):
+            return (Reward.WIN, Reward.LOSS)
+
+        elif PijersiState.__board_player_is_arrived(board_codes, Player.T.BLACK):
+            return (Reward.LOSS, Reward.WIN)
+
+        elif credit == 0:
+            return (Reward.DRAW, Reward.DRAW)
+
+        elif not PijersiState.__board_has_action(board_codes, player):
+
+            if player == Player.T.WHITE:
+                return (Reward.LOSS, Reward.WIN)
+
+            elif player == Player.T.BLACK:
+                return (Reward.WIN, Reward.LOSS)
+
+        else:
+            return None
 
 
     @staticmethod
@@ -2035,22 +2267,24 @@ class PijersiState:
         return (hex_index for (hex_index, hex_code) in enumerate(board_codes) if table_code[hex_code] != 0)
 
 
-    def __find_all_actions(self) -> Sequence[PijersiAction]:
+    @staticmethod
+    def find_board_actions(board_codes: BoardCodes, player: Player.T) -> Sequence[PijersiAction]:
+        """All the actions of the player on the board, whatever the credit"""
 
         actions = []
 
-        for cube_source_1 in PijersiState.__find_cube_sources(self.__board_codes, self.__player):
+        for cube_source_1 in PijersiState.__find_cube_sources(board_codes, player):
 
             for cube_direction_1 in Hexagon.DIRECTION_ITERATOR:
 
                 #-- all first moves using a cube
-                action1 = PijersiState.__try_cube_path1_action(self.__board_codes, cube_source_1, cube_direction_1)
+                action1 = PijersiState.__try_cube_path1_action(board_codes, cube_source_1, cube_direction_1)
                 if action1 is not None:
                     actions.append(action1)
 
                     board_codes_1 = action1.next_board_codes
                     stack_source_1 = action1.path_vertices[-1]
-                    if PijersiState.__TABLE_HAS_STACK[self.__player][board_codes_1[stack_source_1]] != 0:
+                    if PijersiState.__TABLE_HAS_STACK[player][board_codes_1[stack_source_1]] != 0:
                         for stack_direction_1 in Hexagon.DIRECTION_ITERATOR:
                             action21 = PijersiState.__try_stack_path1_action(board_codes_1, stack_source_1, stack_direction_1)
                             if action21 is not None:
@@ -2072,8 +2306,8 @@ class PijersiState:
                     stack_source_2 = cube_source_1
                     stack_direction_2 = cube_direction_1
 
-                    if PijersiState.__TABLE_HAS_STACK[self.__player][self.__board_codes[stack_source_2]] != 0:
-                        action11 = PijersiState.__try_stack_path1_action(self.__board_codes, stack_source_2, stack_direction_2)
+                    if PijersiState.__TABLE_HAS_STACK[player][board_codes[stack_source_2]] != 0:
+                        action11 = PijersiState.__try_stack_path1_action(board_codes, stack_source_2, stack_direction_2)
                         if action11 is not None:
                             actions.append(action11)
 
@@ -2088,7 +2322,7 @@ class PijersiState:
                                                      move_code=action11.move_code + 2*action12.move_code)
                                     actions.append(action12)
 
-                            action21 = PijersiState.__try_stack_path2_action(self.__board_codes, stack_source_2, stack_direction_2)
+                            action21 = PijersiState.__try_stack_path2_action(board_codes, stack_source_2, stack_direction_2)
                             if action21 is not None:
                                 actions.append(action21)
 
@@ -2260,12 +2494,151 @@ class PijersiState:
         return action
 
 
+class TimeManager:
+    """Allocation of the thinking time of a searcher, for a game under time control
+
+    The optimum time of a turn is the remaining clock divided by the estimated number of moves to go,
+    which decreases with the fighters left on the board. During a search by increasing depths,
+    the optimum time is extended when the best action changes from one depth to the next,
+    or when its value drops ; and the search stops early when the next depth is predicted
+    not to end within the optimum time, from the growth of the duration from one depth to the next.
+    The maximum time bounds the extensions.
+    """
+
+    __slots__ = ('__min_moves_to_go', '__max_moves_to_go', '__max_clock_fraction', '__max_extension', '__score_drop',
+                 '__optimum_time', '__maximum_time', '__iterations')
+
+    # >> 12 fighters per player at start ; the wise are not fighters
+    __START_FIGHTER_COUNT = 24
+
+    __INSTABILITY_EXTENSION = 1.5
+    __SCORE_DROP_EXTENSION = 1.3
+
+    # >> duration ratio between two consecutive depths, before measuring it
+    __DEFAULT_DURATION_GROWTH = 8.
+
+
+    def __init__(self, min_moves_to_go: float=6, max_moves_to_go: float=20, max_clock_fraction: float=0.25,
+                 max_extension: float=3., score_drop: float=1.):
+
+        assert 1 <= min_moves_to_go <= max_moves_to_go
+        assert 0 < max_clock_fraction <= 1
+        assert max_extension >= 1
+        assert score_drop > 0
+
+        self.__min_moves_to_go = min_moves_to_go
+        self.__max_moves_to_go = max_moves_to_go
+        self.__max_clock_fraction = max_clock_fraction
+        self.__max_extension = max_extension
+        self.__score_drop = score_drop
+
+        self.__optimum_time = None
+        self.__maximum_time = None
+        self.__iterations = []
+
+
+    def estimate_moves_to_go(self, state: Optional[PijersiState]=None) -> float:
+        """Moves still to play by the player, from the fraction of fighters left ; the mean estimate without state"""
+
+        if state is None:
+            fighter_fraction = 0.5
+        else:
+            fighter_fraction = min(1., sum(state.get_fighter_counts())/TimeManager.__START_FIGHTER_COUNT)
+
+        return self.__min_moves_to_go + (self.__max_moves_to_go - self.__min_moves_to_go)*fighter_fraction
+
+
+    def start_turn(self, player_clock: float, state: Optional[PijersiState]=None, time_limit: Optional[float]=None) -> float:
+        """Allocate the time of the turn from the remaining clock ; return the optimum time"""
+
+        player_clock = max(0., player_clock)
+
+        self.__optimum_time = player_clock/self.estimate_moves_to_go(state)
+        self.__maximum_time = max(self.__optimum_time,
+                                  min(self.__max_clock_fraction*player_clock, self.__max_extension*self.__optimum_time))
+
+        if time_limit is not None:
+            self.__optimum_time = min(self.__optimum_time, time_limit)
+            self.__maximum_time = min(self.__maximum_time, time_limit)
+
+        self.__iterations = []
+
+        return self.__optimum_time
+
+
+    def reset(self):
+        self.__optimum_time = None
+        self.__maximum_time = None
+        self.__iterations = []
+
+
+    def is_started(self) -> bool:
+        return self.__optimum_time is not None
+
+
+    def get_optimum_time(self) -> Optional[float]:
+        return self.__optimum_time
+
+
+    def get_maximum_time(self) -> Optional[float]:
+        return self.__maximum_time
+
+
+    def add_iteration(self, action_name: str, value: Optional[float], duration: float):
+        """Account for the result of the search at the next depth, which lasted duration seconds"""
+
+        assert self.is_started()
+
+        if len(self.__iterations) != 0:
+            (previous_action_name, previous_value, _) = self.__iterations[-1]
+
+            if action_name != previous_action_name:
+                self.__optimum_time *= TimeManager.__INSTABILITY_EXTENSION
+
+            elif value is not None and previous_value is not None and value < previous_value - self.__score_drop:
+                self.__optimum_time *= TimeManager.__SCORE_DROP_EXTENSION
+
+            self.__optimum_time = min(self.__optimum_time, self.__maximum_time)
+
+        self.__iterations.append((action_name, value, duration))
+
+
+    def predict_next_duration(self) -> Optional[float]:
+        """Duration of the search at the next depth, or None before any search"""
+
+        if len(self.__iterations) == 0:
+            return None
+
+        last_duration = self.__iterations[-1][2]
+
+        if len(self.__iterations) >= 2 and self.__iterations[-2][2] > 0:
+            duration_growth = max(1., last_duration/self.__iterations[-2][2])
+        else:
+            duration_growth = TimeManager.__DEFAULT_DURATION_GROWTH
+
+        return last_duration*duration_growth
+
+
+    def should_stop(self, elapsed: float, next_start: float) -> bool:
+        """True when the search at the next depth, started at next_start seconds, cannot end in time"""
+
+        assert self.is_started()
+
+        if elapsed >= self.__optimum_time:
+            return True
+
+        next_duration = self.predict_next_duration()
+
+        return next_duration is not None and next_start + next_duration > self.__optimum_time
+
+
 class Searcher():
 
-    __slots__ = ('__name', '__time_limit', '__dynamic_time_limit', '__clock_fraction')
+    __slots__ = ('__name', '__time_limit', '__dynamic_time_limit', '__clock_fraction', '__analysis_cache', '__time_manager')
 
 
-    def __init__(self, name: str, time_limit: Optional[float]=None, clock_fraction: Optional[float]=None):
+    def __init__(self, name: str, time_limit: Optional[float]=None, clock_fraction: Optional[float]=None,
+                 time_manager: Optional[TimeManager]=None):
 
         if time_limit is not None:
             assert time_limit > 0
@@ -2273,31 +2646,101 @@ class Searcher():
         if clock_fraction is not None:
             assert 0 < clock_fraction <= 1
 
+        # >> the time manager allocates the time from the clock, instead of the fixed clock fraction
+        assert clock_fraction is None or time_manager is None
+
         self.__name = name
         self.__time_limit = time_limit
         self.__clock_fraction = clock_fraction
         self.__dynamic_time_limit = None
+        self.__analysis_cache = None
+        self.__time_manager = time_manager
 
 
     def get_name(self) -> str:
         return self.__name
 
 
+    def set_analysis_cache(self, analysis_cache):
+        """Cache of analyses, like pijersi_analysis_cache.AnalysisCache, consulted before and filled after each search ; None to disable"""
+        self.__analysis_cache = analysis_cache
+
+
+    def get_analysis_cache(self):
+        return self.__analysis_cache
+
+
+    def get_analysis_budget(self) -> str:
+        """Text of the search budget, which is part of the key of the cached analyses"""
+        return f"time={self.get_time_limit()}"
+
+
+    def __get_analysis_params(self, state: PijersiState, kind: str) -> str:
+        # >> the position hash ignores the credit, which matters to the search through the draw rule
+        return f"searcher={self.__name};kind={kind};credit={state.get_credit()};{self.get_analysis_budget()}"
+
+
+    def load_cached_action(self, state: PijersiState, kind: str='search') -> Optional[PijersiAction]:
+        if self.__analysis_cache is None:
+            return None
+
+        result = self.__analysis_cache.get(state.get_position_hash(), self.__get_analysis_params(state, kind))
+        if result is None:
+            return None
+
+        action = state.get_action_by_name(result['action'])
+        action.value = result['value']
+        return action
+
+
+    def save_cached_action(self, state: PijersiState, action: PijersiAction, kind: str='search'):
+        if self.__analysis_cache is not None:
+            self.__analysis_cache.put(state.get_position_hash(), self.__get_analysis_params(state, kind),
+                                      dict(action=str(action), value=action.value, nodes=self.get_node_count()))
+
+
+    def load_cached_evaluations(self, state: PijersiState) -> Optional[Mapping[str, float]]:
+        if self.__analysis_cache is None:
+            return None
+
+        result = self.__analysis_cache.get(state.get_position_hash(), self.__get_analysis_params(state, 'evaluate'))
+        if result is None:
+            return None
+
+        return result['evaluated_actions']
+
+
+    def save_cached_evaluations(self, state: PijersiState, evaluated_actions: Mapping[str, float]):
+        if self.__analysis_cache is not None:
+            self.__analysis_cache.put(state.get_position_hash(), self.__get_analysis_params(state, 'evaluate'),
+                                      dict(evaluated_actions=evaluated_actions, nodes=self.get_node_count()))
+
+
     def set_time_limit(self, time_limit: Optional[float]):
         if time_limit is not None:
             assert time_limit > 0
         self.__time_limit = time_limit
 
 
+    def get_time_manager(self) -> Optional[TimeManager]:
+        return self.__time_manager
+
+
     def unset_dynamic_time_limit(self):
         self.__dynamic_time_limit = None
 
+        if self.__time_manager is not None:
+            self.__time_manager.reset()
+
 
-    def compute_dynamic_time_limit(self, player_clock: float)-> Optional[float]:
+    def compute_dynamic_time_limit(self, player_clock: float, state: Optional[PijersiState]=None)-> Optional[float]:
         if player_clock < 0:
             player_clock = 0
 
-        if self.__clock_fraction is None:
+        if self.__time_manager is not None:
+            self.__dynamic_time_limit = self.__time_manager.start_turn(player_clock, state, time_limit=self.__time_limit)
+
+        elif self.__clock_fraction is None:
             self.__dynamic_time_limit =  self.__time_limit
 
         else:
@@ -2320,6 +2763,11 @@ class Searcher():
         return False
 
 
+    def get_node_count(self) -> Optional[int]:
+        """Number of nodes explored by the last search, or None when the searcher does not count nodes"""
+        return None
+
+
     def search(self, state: PijersiState) -> PijersiAction:
         actions = state.get_actions()
         action = actions[0]
@@ -2396,20 +2844,65 @@ class HumanSearcher(Searcher):
 
 
 class MinimaxState:
-    """Adaptater of PijersiState for MinixmaxSearcher"""
+    """Search node of MinimaxSearcher
+
+    A node holds just the board, the player to move and the credit of a PijersiState, and once computed
+    its actions and its rewards ; not the turn, the setup and the caches of action names, which are useless in the search.
+    Its board is an immutable copy of the board of the action making it, so that its bytes, with their cached hash,
+    are shared as keys by the transposition tables.
+    The PijersiState is kept by the root node ; for another node, it is built when asked, without turn and setup.
+    Given a PieceSquareStateEvaluator, a node carries its board value for the maximizer player, updated from
+    the one of its parent over the path_vertices of the action making it, instead of rescanning the whole board.
+    """
 
     Self = TypeVar("Self", bound="MinimaxState")
 
-    __slots__ = ('__pijersi_state', '__maximizer_player')
+    __slots__ = ('__board_codes', '__player', '__credit', '__maximizer_player', '__actions', '__rewards', '__pijersi_state',
+                 '__value_evaluator', '__board_value')
 
+    # >> rewards of a node that is known not to be terminal
+    __NO_REWARDS = ()
 
-    def __init__(self, pijersi_state: PijersiState, maximizer_player: Player.T):
-        self.__pijersi_state = pijersi_state
+
+    def __init__(self, pijersi_state: PijersiState, maximizer_player: Player.T,
+                 value_evaluator: Optional['PieceSquareStateEvaluator']=None):
+        self.__board_codes = bytes(pijersi_state.get_board_codes())
+        self.__player = pijersi_state.get_current_player()
+        self.__credit = pijersi_state.get_credit()
         self.__maximizer_player = maximizer_player
+        self.__actions = None
+        self.__rewards = None
+        self.__pijersi_state = pijersi_state
+        self.__value_evaluator = value_evaluator
+
+        if value_evaluator is not None:
+            self.__board_value = value_evaluator.evaluate_board_value(maximizer_player, self.__board_codes)
+        else:
+            self.__board_value = None
 
 
     def get_pijersi_state(self) -> PijersiState:
-        return self.__pijersi_state
+        if self.__pijersi_state is not None:
+            return self.__pijersi_state
+
+        return PijersiState(board_codes=bytearray(self.__board_codes), player=self.__player, credit=self.__credit)
+
+
+    def get_board_codes(self) -> bytes:
+        return self.__board_codes
+
+
+    def get_credit(self) -> int:
+        return self.__credit
+
+
+    def get_current_player(self) -> Player.T:
+        return self.__player
+
+
+    def get_board_value(self, value_evaluator: 'PieceSquareStateEvaluator') -> Optional[float]:
+        """Board value for the maximizer player carried by the node, if it has been computed by value_evaluator"""
+        return self.__board_value if value_evaluator is self.__value_evaluator else None
 
 
     def get_current_maximizer_player(self) -> Player.T:
@@ -2420,8 +2913,23 @@ class MinimaxState:
         return Player.T.BLACK if self.__maximizer_player == Player.T.WHITE else Player.T.WHITE
 
 
+    def is_opening(self) -> bool:
+        """True for the root node of the first state of a game in the classic setup"""
+        return (self.__pijersi_state is not None and
+                self.__pijersi_state.get_turn() == 1 and
+                self.__pijersi_state.get_setup() == Setup.T.CLASSIC)
+
+
     def is_terminal(self) -> bool:
-        return self.__pijersi_state.is_terminal()
+        return self.get_rewards() is not None
+
+
+    def get_rewards(self) -> Optional[Tuple[Reward, Reward]]:
+        if self.__rewards is None:
+            rewards = PijersiState.find_board_rewards(self.__board_codes, self.__player, self.__credit)
+            self.__rewards = rewards if rewards is not None else MinimaxState.__NO_REWARDS
+
+        return self.__rewards if len(self.__rewards) != 0 else None
 
 
     def get_reward(self) -> int:
@@ -2429,7 +2937,7 @@ class MinimaxState:
         positive for a win by maximizer player or negative for a win by the minimizer player.
         Only needed for terminal states."""
 
-        pijersi_rewards = self.__pijersi_state.get_rewards()
+        pijersi_rewards = self.get_rewards()
 
         if pijersi_rewards[self.__maximizer_player] == Reward.DRAW:
             minimax_reward = 0
@@ -2444,24 +2952,74 @@ class MinimaxState:
 
 
     def get_actions(self) -> Sequence[PijersiAction]:
-        return self.__pijersi_state.get_actions()
+        # >> the root node shares the actions of its PijersiState, so that the searched actions are the ones of the caller
+        if self.__actions is None:
+            if self.__pijersi_state is not None:
+                self.__actions = self.__pijersi_state.get_actions()
+            else:
+                self.__actions = PijersiState.find_board_actions(self.__board_codes, self.__player)
+
+        return self.__actions
 
 
     def take_action(self, action: PijersiAction, use_cache=False) -> Self:
-        return MinimaxState(self.__pijersi_state.take_action(action, use_cache), self.__maximizer_player)
+        if use_cache and action.next_node is not None:
+            return action.next_node
+
+        # >> no call to __init__, which makes a node from a PijersiState
+        child = MinimaxState.__new__(MinimaxState)
+        child.__board_codes = bytes(action.next_board_codes)
+        child.__player = Player.T.BLACK if self.__player == Player.T.WHITE else Player.T.WHITE
+        child.__credit = max(0, self.__credit - 1) if action.capture_code == 0 else PijersiState.get_max_credit()
+        child.__maximizer_player = self.__maximizer_player
+        child.__actions = None
+        child.__rewards = None
+        child.__pijersi_state = None
+
+        value_evaluator = self.__value_evaluator
+        child.__value_evaluator = value_evaluator
+
+        if value_evaluator is not None:
+            child.__board_value = value_evaluator.update_board_value(self.__maximizer_player, self.__board_value,
+                                                                     self.__board_codes, child.__board_codes,
+                                                                     action.path_vertices)
+        else:
+            child.__board_value = None
 
+        action.next_node = child if use_cache else None
 
-class StateEvaluator():
-    """State evaluator for MinimaxSearcher"""
+        return child
 
-    __slots__ = ('__cube_weight', '__fighter_weight',
-                 '__dg_min_weight', '__dg_ave_weight', '__dc_ave_weight', '__credit_weight',
-                 '__debugging')
 
+    def get_fighter_counts(self)-> Sequence[int]:
+        return PijersiState.get_board_fighter_counts(self.__board_codes)
 
-    def __init__(self, cube_weight: Optional[float]=None,
-                  fighter_weight: Optional[float]=None,
-                  dg_min_weight: Optional[float]=None,
+
+    def get_cube_counts(self)-> Sequence[int]:
+        return PijersiState.get_board_cube_counts(self.__board_codes)
+
+
+    def get_distances_to_goal(self) -> Sequence[Sequence[int]]:
+        return PijersiState.get_board_distances_to_goal(self.__board_codes)
+
+
+    def get_distances_to_center(self) -> Sequence[Sequence[int]]:
+        return PijersiState.get_board_distances_to_center(self.__board_codes)
+
+
+class StateEvaluator():
+    """State evaluator for MinimaxSearcher"""
+
+    FEATURE_NAMES = ('fighter', 'cube', 'dg_min', 'dg_ave', 'dc_ave', 'credit')
+
+    __slots__ = ('__cube_weight', '__fighter_weight',
+                 '__dg_min_weight', '__dg_ave_weight', '__dc_ave_weight', '__credit_weight',
+                 '__debugging')
+
+
+    def __init__(self, cube_weight: Optional[float]=None,
+                  fighter_weight: Optional[float]=None,
+                  dg_min_weight: Optional[float]=None,
                   dg_ave_weight: Optional[float]=None,
                   dc_ave_weight: Optional[float]=None,
                   credit_weight: Optional[float]=None):
@@ -2500,115 +3058,137 @@ class StateEvaluator():
         self.__credit_weight *= scale_weight
 
 
-    def evaluate_state_value(self, state: MinimaxState, depth: int) -> float:
-        # evaluate favorability for maximizer
+    def get_weights(self) -> Sequence[float]:
+        """Normalized weights in the order of FEATURE_NAMES"""
+        return (self.__fighter_weight, self.__cube_weight,
+                self.__dg_min_weight, self.__dg_ave_weight, self.__dc_ave_weight,
+                self.__credit_weight)
 
-        assert depth >= 0
 
-        value = 0
+    def get_fingerprint(self) -> str:
+        """Short hash of the weights, which is part of the key of the cached analyses"""
+        return hashlib.sha1(repr(self.get_weights()).encode()).hexdigest()[:16]
 
-        pijersi_state = state.get_pijersi_state()
 
-        maximizer = state.get_current_maximizer_player()
-        minimizer = state.get_current_minimizer_player()
+    @staticmethod
+    def compute_features(pijersi_state: PijersiState, maximizer: Player.T, debugging: bool=False) -> Sequence[float]:
+        """Normalized features of a non terminal PijersiState or MinimaxState, in the order of FEATURE_NAMES, from the maximizer point of view"""
 
+        minimizer = Player.T.BLACK if maximizer == Player.T.WHITE else Player.T.WHITE
 
-        if pijersi_state.is_terminal():
+        dg_min_norm = 8
+        dg_ave_norm = dg_min_norm
+        dc_ave_norm = 3
+        cube_norm = 14
+        fighter_norm = 12
+        credit_norm = PijersiState.get_max_credit()
 
-            # >> amplify terminal value using the depth (rationale: winning faster is safer)
+        # maximizer and minimizer distances to goal
+        distances_to_goal = pijersi_state.get_distances_to_goal()
 
-            maximizer_reward = pijersi_state.get_rewards()[maximizer]
+        if not distances_to_goal[maximizer]:
+            distances_to_goal[maximizer] = [dg_min_norm]
 
-            if maximizer_reward == Reward.WIN:
-                value = OMEGA_2*(depth + 1)
+        if not distances_to_goal[minimizer]:
+            distances_to_goal[minimizer] = [dg_min_norm]
 
-            elif maximizer_reward == Reward.LOSS:
-                value = (-OMEGA_2)*(depth + 1)
+        maximizer_dg_min = min(distances_to_goal[maximizer])
+        minimizer_dg_min = min(distances_to_goal[minimizer])
 
-            elif maximizer_reward == Reward.DRAW:
-                # >> no minus sign because the DRAW applies to both maximizer and minimizer
-                value = OMEGA*(depth + 1)
+        maximizer_ave_dg = mean(distances_to_goal[maximizer])
+        minimizer_ave_dg = mean(distances_to_goal[minimizer])
 
-        else:
+        dg_min_difference = (minimizer_dg_min - maximizer_dg_min)
+        dg_ave_difference = (minimizer_ave_dg - maximizer_ave_dg)
 
-            dg_min_norm = 8
-            dg_ave_norm = dg_min_norm
-            dc_ave_norm = 3
-            cube_norm = 14
-            fighter_norm = 12
-            credit_norm = PijersiState.get_max_credit()
+        # maximizer and minimizer distances to center
+        distances_to_center = pijersi_state.get_distances_to_center()
 
-            # maximizer and minimizer distances to goal
-            distances_to_goal = pijersi_state.get_distances_to_goal()
+        if not distances_to_center[maximizer]:
+            distances_to_center[maximizer] = [dc_ave_norm]
 
-            if not distances_to_goal[maximizer]:
-                distances_to_goal[maximizer] = [dg_min_norm]
+        if not distances_to_center[minimizer]:
+            distances_to_center[minimizer] = [dc_ave_norm]
 
-            if not distances_to_goal[minimizer]:
-                distances_to_goal[minimizer] = [dg_min_norm]
+        maximizer_ave_dc = mean(distances_to_center[maximizer])
+        minimizer_ave_dc = mean(distances_to_center[minimizer])
 
-            maximizer_dg_min = min(distances_to_goal[maximizer])
-            minimizer_dg_min = min(distances_to_goal[minimizer])
+        dc_ave_difference = (minimizer_ave_dc - maximizer_ave_dc)
 
-            maximizer_ave_dg = mean(distances_to_goal[maximizer])
-            minimizer_ave_dg = mean(distances_to_goal[minimizer])
 
-            dg_min_difference = (minimizer_dg_min - maximizer_dg_min)
-            dg_ave_difference = (minimizer_ave_dg - maximizer_ave_dg)
+        # white and black with alive cubes
+        cube_counts = pijersi_state.get_cube_counts()
+        cube_difference = (cube_counts[maximizer] - cube_counts[minimizer])
 
-            # maximizer and minimizer distances to center
-            distances_to_center = pijersi_state.get_distances_to_center()
+        # white and black with alive fighters
+        fighter_counts = pijersi_state.get_fighter_counts()
+        fighter_difference = (fighter_counts[maximizer] - fighter_counts[minimizer])
 
-            if not distances_to_center[maximizer]:
-                distances_to_center[maximizer] = [dc_ave_norm]
+        # credit acts symmetrically for white and black
+        credit = pijersi_state.get_credit()
 
-            if not distances_to_center[minimizer]:
-                distances_to_center[minimizer] = [dc_ave_norm]
+        # normalize each feature in the intervall [-1, +1]
 
-            maximizer_ave_dc = mean(distances_to_center[maximizer])
-            minimizer_ave_dc = mean(distances_to_center[minimizer])
+        if debugging:
+            assert dg_min_difference <= dg_min_norm
+            assert -dg_min_difference <= dg_min_norm
 
-            dc_ave_difference = (minimizer_ave_dc - maximizer_ave_dc)
+            assert dg_ave_difference <= dg_ave_norm
+            assert -dg_ave_difference <= dg_ave_norm
 
+            assert dc_ave_difference <= dc_ave_norm
+            assert -dc_ave_difference <= dc_ave_norm
 
-            # white and black with alive cubes
-            cube_counts = pijersi_state.get_cube_counts()
-            cube_difference = (cube_counts[maximizer] - cube_counts[minimizer])
+            assert cube_difference <= cube_norm
+            assert -cube_difference <= cube_norm
 
-            # white and black with alive fighters
-            fighter_counts = pijersi_state.get_fighter_counts()
-            fighter_difference = (fighter_counts[maximizer] - fighter_counts[minimizer])
+            assert fighter_difference <= fighter_norm
+            assert -fighter_difference <= fighter_norm
 
-            # credit acts symmetrically for white and black
-            credit = pijersi_state.get_credit()
+            assert credit <= credit_norm
+            assert -credit <= credit_norm
 
-            # normalize each feature in the intervall [-1, +1]
+        dg_min_difference = dg_min_difference/dg_min_norm
+        dg_ave_difference = dg_ave_difference/dg_ave_norm
+        dc_ave_difference = dc_ave_difference/dc_ave_norm
+        cube_difference = cube_difference/cube_norm
+        fighter_difference = fighter_difference/fighter_norm
+        credit = credit/credit_norm
 
-            if self.__debugging:
-                assert dg_min_difference <= dg_min_norm
-                assert -dg_min_difference <= dg_min_norm
+        return (fighter_difference, cube_difference,
+                dg_min_difference, dg_ave_difference, dc_ave_difference,
+                credit)
 
-                assert dg_ave_difference <= dg_ave_norm
-                assert -dg_ave_difference <= dg_ave_norm
 
-                assert dc_ave_difference <= dc_ave_norm
-                assert -dc_ave_difference <= dc_ave_norm
+    def evaluate_state_value(self, state: MinimaxState, depth: int) -> float:
+        # evaluate favorability for maximizer
 
-                assert cube_difference <= cube_norm
-                assert -cube_difference <= cube_norm
+        assert depth >= 0
 
-                assert fighter_difference <= fighter_norm
-                assert -fighter_difference <= fighter_norm
+        value = 0
+
+        maximizer = state.get_current_maximizer_player()
 
-                assert credit <= credit_norm
-                assert -credit <= credit_norm
+        if state.is_terminal():
 
-            dg_min_difference = dg_min_difference/dg_min_norm
-            dg_ave_difference = dg_ave_difference/dg_ave_norm
-            dc_ave_difference = dc_ave_difference/dc_ave_norm
-            cube_difference = cube_difference/cube_norm
-            fighter_difference = fighter_difference/fighter_norm
-            credit = credit/credit_norm
+            # >> amplify terminal value using the depth (rationale: winning faster is safer)
+
+            maximizer_reward = state.get_rewards()[maximizer]
+
+            if maximizer_reward == Reward.WIN:
+                value = OMEGA_2*(depth + 1)
+
+            elif maximizer_reward == Reward.LOSS:
+                value = (-OMEGA_2)*(depth + 1)
+
+            elif maximizer_reward == Reward.DRAW:
+                # >> no minus sign because the DRAW applies to both maximizer and minimizer
+                value = OMEGA*(depth + 1)
+
+        else:
+            (fighter_difference, cube_difference,
+             dg_min_difference, dg_ave_difference, dc_ave_difference,
+             credit) = StateEvaluator.compute_features(state, maximizer, debugging=self.__debugging)
 
             # synthesis
 
@@ -2646,6 +3226,338 @@ STATE_EVALUATOR_MM3 = StateEvaluator(fighter_weight=65.52573448992278,
 STATE_EVALUATOR_MM4 = STATE_EVALUATOR_MM3
 
 
+class PieceSquareStateEvaluator():
+    """Piece-square-table state evaluator for MinimaxSearcher
+
+    The value of a board for a maximizer player is the sum of one table entry per (hex index, hex code),
+    plus a few optional pairwise terms, each one applying when two hexagons hold two given codes.
+    The pairwise terms are indexed by hexagon, so that updating a value only rescans the terms touching the changed hexagons.
+    """
+
+    Self = TypeVar("Self", bound="PieceSquareStateEvaluator")
+
+    __slots__ = ('__tables', '__pair_terms', '__pair_terms_by_hex')
+
+    __FILE_MAGIC = b'PST1'
+    __FILE_HEADER_FORMAT = '<4sHHI'
+    __FILE_PAIR_FORMAT = '<BBBBBf'
+
+    __TABLE_OFFSETS = None
+
+
+    def __init__(self, tables: Optional[Sequence[Sequence[float]]]=None,
+                 pair_terms: Optional[Sequence[Sequence[Tuple[HexIndex, HexCode, HexIndex, HexCode, float]]]]=None):
+
+        table_size = len(Hexagon.get_all())*HexState.CODE_BASE
+
+        if PieceSquareStateEvaluator.__TABLE_OFFSETS is None:
+            PieceSquareStateEvaluator.__TABLE_OFFSETS = array.array('L', [hex_index*HexState.CODE_BASE
+                                                                          for hex_index in Hexagon.get_all_indices()])
+
+        if tables is None:
+            self.__tables = [array.array(ARRAY_TYPE_DISTANCE, [0 for _ in range(table_size)]) for _ in Player.T]
+        else:
+            assert len(tables) == len(Player.T)
+            self.__tables = [array.array(ARRAY_TYPE_DISTANCE, table) for table in tables]
+
+        for table in self.__tables:
+            assert len(table) == table_size
+
+        if pair_terms is None:
+            self.__pair_terms = [[] for _ in Player.T]
+        else:
+            assert len(pair_terms) == len(Player.T)
+            self.__pair_terms = [list(player_pair_terms) for player_pair_terms in pair_terms]
+
+        # >> for each player and each hex index, the indices of the pairwise terms involving that hex index
+        self.__pair_terms_by_hex = [[[] for _ in Hexagon.get_all_indices()] for _ in Player.T]
+        for player in Player.T:
+            for (pair_term_index, pair_term) in enumerate(self.__pair_terms[player]):
+                self.__index_pair_term(player, pair_term_index, pair_term)
+
+
+    @staticmethod
+    def make_from_weights(fighter_weight: float, cube_weight: float, dg_weight: float, dc_weight: float) -> Self:
+        """Tables approximating the additive part of StateEvaluator features"""
+
+        dg_norm = 8
+        dc_norm = 3
+        cube_norm = 14
+        fighter_norm = 12
+
+        center_indices = [Hexagon.get(hex_name).index for hex_name in ['d3', 'd4', 'd5']]
+
+        tables = [[0 for _ in range(len(Hexagon.get_all())*HexState.CODE_BASE)] for _ in Player.T]
+
+        for maximizer in Player.T:
+            for hex_state in HexState.iterate_hex_states():
+
+                if hex_state.is_empty:
+                    continue
+
+                hex_code = hex_state.encode()
+
+                cube_count = 2 if hex_state.has_stack else 1
+
+                if hex_state.has_stack:
+                    fighter_count = int(hex_state.bottom != Cube.T.WISE) + int(hex_state.top != Cube.T.WISE)
+                else:
+                    fighter_count = int(hex_state.bottom != Cube.T.WISE)
+
+                sign = 1 if hex_state.player == maximizer else -1
+
+                for hex_index in Hexagon.get_all_indices():
+                    goal_distance = Hexagon.get_distance_to_goal(hex_index, hex_state.player)
+                    center_distance = min(Hexagon.get_distance(hex_index, center_index) for center_index in center_indices)
+
+                    value = 0
+                    value += fighter_weight*fighter_count/fighter_norm
+                    value += cube_weight*cube_count/cube_norm
+                    value -= dg_weight*fighter_count*goal_distance/(dg_norm*fighter_norm)
+                    value -= dc_weight*cube_count*center_distance/(dc_norm*cube_norm)
+
+                    tables[maximizer][hex_index*HexState.CODE_BASE + hex_code] = sign*value
+
+        return PieceSquareStateEvaluator(tables=tables)
+
+
+    @staticmethod
+    def load(file_path: str) -> Self:
+
+        with open(file_path, 'rb') as stream:
+            header = stream.read(struct.calcsize(PieceSquareStateEvaluator.__FILE_HEADER_FORMAT))
+            (magic, hex_count, code_base, pair_count) = struct.unpack(PieceSquareStateEvaluator.__FILE_HEADER_FORMAT, header)
+
+            assert magic == PieceSquareStateEvaluator.__FILE_MAGIC
+            assert hex_count == len(Hexagon.get_all())
+            assert code_base == HexState.CODE_BASE
+
+            tables = []
+            for _ in Player.T:
+                table = array.array(ARRAY_TYPE_DISTANCE)
+                table.fromfile(stream, hex_count*code_base)
+                if sys.byteorder != 'little':
+                    table.byteswap()
+                tables.append(table)
+
+            pair_size = struct.calcsize(PieceSquareStateEvaluator.__FILE_PAIR_FORMAT)
+            pair_terms = [[] for _ in Player.T]
+            for _ in range(pair_count):
+                (player, hex_index_1, hex_code_1, hex_index_2, hex_code_2, value) = struct.unpack(
+                    PieceSquareStateEvaluator.__FILE_PAIR_FORMAT, stream.read(pair_size))
+                pair_terms[player].append((hex_index_1, hex_code_1, hex_index_2, hex_code_2, value))
+
+        return PieceSquareStateEvaluator(tables=tables, pair_terms=pair_terms)
+
+
+    def save(self, file_path: str):
+
+        pair_count = sum(len(player_pair_terms) for player_pair_terms in self.__pair_terms)
+
+        with open(file_path, 'wb') as stream:
+            stream.write(struct.pack(PieceSquareStateEvaluator.__FILE_HEADER_FORMAT, PieceSquareStateEvaluator.__FILE_MAGIC,
+                                     len(Hexagon.get_all()), HexState.CODE_BASE, pair_count))
+
+            for table in self.__tables:
+                if sys.byteorder != 'little':
+                    table = array.array(ARRAY_TYPE_DISTANCE, table)
+                    table.byteswap()
+                table.tofile(stream)
+
+            for player in Player.T:
+                for pair_term in self.__pair_terms[player]:
+                    stream.write(struct.pack(PieceSquareStateEvaluator.__FILE_PAIR_FORMAT, player, *pair_term))
+
+
+    def get_fingerprint(self) -> str:
+        """Short hash of the tables and of the pairwise terms, which is part of the key of the cached analyses"""
+        digest = hashlib.sha1()
+
+        for table in self.__tables:
+            digest.update(table.tobytes())
+
+        for player in Player.T:
+            digest.update(repr(self.__pair_terms[player]).encode())
+
+        return digest.hexdigest()[:16]
+
+
+    def get_table_value(self, player: Player.T, hex_index: HexIndex, hex_code: HexCode) -> float:
+        return self.__tables[player][hex_index*HexState.CODE_BASE + hex_code]
+
+
+    def set_table_value(self, player: Player.T, hex_index: HexIndex, hex_code: HexCode, value: float):
+        self.__tables[player][hex_index*HexState.CODE_BASE + hex_code] = value
+
+
+    def add_pair_term(self, player: Player.T, hex_index_1: HexIndex, hex_code_1: HexCode,
+                      hex_index_2: HexIndex, hex_code_2: HexCode, value: float):
+        assert hex_index_1 != hex_index_2
+        pair_term = (hex_index_1, hex_code_1, hex_index_2, hex_code_2, value)
+        self.__pair_terms[player].append(pair_term)
+        self.__index_pair_term(player, len(self.__pair_terms[player]) - 1, pair_term)
+
+
+    def __index_pair_term(self, player: Player.T, pair_term_index: int,
+                          pair_term: Tuple[HexIndex, HexCode, HexIndex, HexCode, float]):
+        pair_terms_by_hex = self.__pair_terms_by_hex[player]
+        pair_terms_by_hex[pair_term[0]].append(pair_term_index)
+        pair_terms_by_hex[pair_term[2]].append(pair_term_index)
+
+
+    def evaluate_board_value(self, player: Player.T, board_codes: BoardCodes) -> float:
+        table = self.__tables[player]
+        value = sum(table[offset + hex_code] for (offset, hex_code) in zip(PieceSquareStateEvaluator.__TABLE_OFFSETS, board_codes))
+
+        for (hex_index_1, hex_code_1, hex_index_2, hex_code_2, pair_value) in self.__pair_terms[player]:
+            if board_codes[hex_index_1] == hex_code_1 and board_codes[hex_index_2] == hex_code_2:
+                value += pair_value
+
+        return value
+
+
+    def update_board_value(self, player: Player.T, value: float,
+                           board_codes: BoardCodes, next_board_codes: BoardCodes, hex_indices: Sequence[HexIndex]) -> float:
+        """Value of next_board_codes knowing the value of board_codes and the only hexagons that have changed;
+        for a PijersiAction the changed hexagons are its path_vertices."""
+
+        table = self.__tables[player]
+        pair_terms = self.__pair_terms[player]
+        pair_terms_by_hex = self.__pair_terms_by_hex[player]
+
+        hex_indices = set(hex_indices)
+        pair_term_indices = set()
+
+        for hex_index in hex_indices:
+            offset = hex_index*HexState.CODE_BASE
+            value += table[offset + next_board_codes[hex_index]] - table[offset + board_codes[hex_index]]
+            pair_term_indices.update(pair_terms_by_hex[hex_index])
+
+        # >> a pairwise term not touching the changed hexagons keeps its contribution
+        for pair_term_index in pair_term_indices:
+            (hex_index_1, hex_code_1, hex_index_2, hex_code_2, pair_value) = pair_terms[pair_term_index]
+            if board_codes[hex_index_1] == hex_code_1 and board_codes[hex_index_2] == hex_code_2:
+                value -= pair_value
+
+            if next_board_codes[hex_index_1] == hex_code_1 and next_board_codes[hex_index_2] == hex_code_2:
+                value += pair_value
+
+        return value
+
+
+    def evaluate_state_value(self, state: MinimaxState, depth: int) -> float:
+        # evaluate favorability for maximizer
+
+        assert depth >= 0
+
+        maximizer = state.get_current_maximizer_player()
+
+        if state.is_terminal():
+
+            # >> amplify terminal value using the depth (rationale: winning faster is safer)
+
+            maximizer_reward = state.get_rewards()[maximizer]
+
+            if maximizer_reward == Reward.WIN:
+                value = OMEGA_2*(depth + 1)
+
+            elif maximizer_reward == Reward.LOSS:
+                value = (-OMEGA_2)*(depth + 1)
+
+            else:
+                # >> no minus sign because the DRAW applies to both maximizer and minimizer
+                value = OMEGA*(depth + 1)
+
+        else:
+            # >> a MinimaxState made with this evaluator carries its value, incrementally updated
+            value = state.get_board_value(self) if isinstance(state, MinimaxState) else None
+            if value is None:
+                value = self.evaluate_board_value(maximizer, state.get_board_codes())
+
+        return value
+
+
+class NodeLimitReached(Exception):
+    """Raised by MinimaxSearcher when its node budget is exhausted"""
+    pass
+
+
+class SearchAborted(Exception):
+    """Raised by MinimaxSearcher when its search is aborted by another thread"""
+    pass
+
+
+class ChildStateCache:
+    """Least recently used actions whose child state is kept on action.next_node during a search
+
+    The child states kept by a search hold in turn their actions and child states, so that without limit
+    a search keeps whole subtrees alive, notably the one of its pre-search at inferior depth.
+    Beyond max_size cached child states, the least recently used one is dropped from its action.
+    The dropped state is freed with its actions, except the ones still in the cache, which keep alive their own
+    child states until they are dropped in turn ; so the memory is bounded by about max_size child states,
+    not by max_size subtrees. A dropped state is rebuilt if needed, but without the values of its actions
+    used for sorting them, so a smaller cache costs time and may change the bounds returned for the non-best actions.
+    """
+
+    __slots__ = ('__max_size', '__actions', '__eviction_count', '__max_count')
+
+
+    def __init__(self, max_size: int):
+        assert max_size >= 1
+
+        self.__max_size = max_size
+        self.__actions = OrderedDict()
+        self.__eviction_count = 0
+        self.__max_count = 0
+
+
+    def get_max_size(self) -> int:
+        return self.__max_size
+
+
+    def take_action(self, state: MinimaxState, action: PijersiAction) -> MinimaxState:
+        child_state = state.take_action(action, use_cache=True)
+
+        # >> the cache holds the actions, so their ids are not reused while they are cached
+        action_key = id(action)
+
+        if action_key in self.__actions:
+            self.__actions.move_to_end(action_key)
+
+        else:
+            self.__actions[action_key] = action
+
+            if len(self.__actions) > self.__max_size:
+                (_, evicted_action) = self.__actions.popitem(last=False)
+                evicted_action.next_node = None
+                self.__eviction_count += 1
+
+            self.__max_count = max(self.__max_count, len(self.__actions))
+
+        return child_state
+
+
+    def release(self, action: PijersiAction):
+        action.next_node = None
+        self.__actions.pop(id(action), None)
+
+
+    def clear(self):
+        """Drop all the cached child states"""
+        for action in self.__actions.values():
+            action.next_node = None
+        self.__actions.clear()
+
+
+    def reset_stats(self):
+        self.__eviction_count = 0
+        self.__max_count = len(self.__actions)
+
+
+    def get_stats(self) -> Mapping[str, int]:
+        return dict(cached_nodes=len(self.__actions), max_cached_nodes=self.__max_count, evicted_nodes=self.__eviction_count)
+
+
 class MinimaxSearcher(Searcher):
 
     MinimaxSearcher = TypeVar("MinimaxSearcher", bound="MinimaxSearcher")
@@ -2653,23 +3565,41 @@ class MinimaxSearcher(Searcher):
     __slots__ = ('__max_depth', '__state_evaluator',
                  '__searcher_parent', '__transposition_table_depth_0', '__transposition_table_depth_n', '__null_windowing_count',
                  '__debugging', '__counting', '__logging',
-                 '__alpha_cuts', '__beta_cuts', '__evaluation_count', '__fun_evaluation_count')
+                 '__alpha_cuts', '__beta_cuts', '__evaluation_count', '__fun_evaluation_count',
+                 '__node_limit', '__node_counter', '__persistent_evaluations', '__depth_searchers', '__multipv',
+                 '__principal_variation', '__max_cached_nodes', '__child_cache', '__trace_memory', '__traced_memory',
+                 '__has_given_state_evaluator')
 
     __LOW_ALPHA_BETA_CUT = 0.50
     __LOW_ACTION_COUNT = int(1/__LOW_ALPHA_BETA_CUT)
 
     __NULL_ALPHA_BETA_WINDOW = 0.001
 
+    # >> node budget making the running search raise SearchAborted at its next node
+    __ABORTED_NODE_BUDGET = -1
+
 
     def __init__(self, name: str, max_depth: int=1, time_limit: Optional[float]=None, clock_fraction: Optional[float]=None,
                  state_evaluator: Optional[StateEvaluator]=None,
-                 searcher_parent: Optional[MinimaxSearcher]=None):
+                 searcher_parent: Optional[MinimaxSearcher]=None,
+                 node_limit: Optional[int]=None,
+                 persistent_evaluations: bool=False,
+                 multipv: Optional[int]=None,
+                 time_manager: Optional[TimeManager]=None,
+                 max_cached_nodes: Optional[int]=None,
+                 trace_memory: bool=False):
 
-        super().__init__(name, time_limit, clock_fraction)
+        super().__init__(name, time_limit, clock_fraction, time_manager)
 
         assert max_depth >= 1
         self.__max_depth = max_depth
 
+        assert node_limit is None or node_limit >= 1
+        self.__node_limit = node_limit
+
+        # >> a given evaluator is used at every depth of the iterative deepening, instead of the defaults by depth
+        self.__has_given_state_evaluator = state_evaluator is not None
+
         if state_evaluator is not None:
             self.__state_evaluator = state_evaluator
 
@@ -2693,6 +3623,19 @@ class MinimaxSearcher(Searcher):
         self.__transposition_table_depth_n = {}
         self.__null_windowing_count = 0
 
+        # >> with persistent evaluations, the depth-0 table is kept from one search to the next,
+        # >> typically along a game, until clear_tables is called
+        self.__persistent_evaluations = persistent_evaluations
+        self.__depth_searchers = {}
+
+        # >> with multipv, evaluate_actions gives exact values to the multipv best root actions
+        # >> and upper bounds to the other ones ; without it, the values come from a single alpha-beta search
+        assert multipv is None or multipv >= 1
+        self.__multipv = multipv
+
+        # >> action names of the best branch found by the last search, when known
+        self.__principal_variation = []
+
         self.__logging = False
         self.__debugging = False
         self.__counting = False
@@ -2702,10 +3645,179 @@ class MinimaxSearcher(Searcher):
         self.__evaluation_count = 0
         self.__fun_evaluation_count = 0
 
+        # >> [node count, node budget or None] shared with the searchers at inferior depth
+        if searcher_parent is not None:
+            self.__node_counter = searcher_parent.__node_counter
+        else:
+            self.__node_counter = [0, None]
+
+        # >> with max_cached_nodes, the child states kept during the search are bounded by a cache
+        # >> shared with the searchers at inferior depth ; without it, they are all kept until valued by the root searcher
+        assert max_cached_nodes is None or max_cached_nodes >= 1
+
+        if searcher_parent is not None:
+            self.__max_cached_nodes = searcher_parent.__max_cached_nodes
+            self.__child_cache = searcher_parent.__child_cache
+        else:
+            self.__max_cached_nodes = max_cached_nodes
+            self.__child_cache = ChildStateCache(max_cached_nodes) if max_cached_nodes is not None else None
+
+        # >> with trace_memory, tracemalloc measures the memory allocated by each search, at the cost of a slower search
+        self.__trace_memory = trace_memory
+        self.__traced_memory = {}
+
+
+    def get_node_limit(self) -> Optional[int]:
+        return self.__node_limit
+
+
+    def set_node_limit(self, node_limit: Optional[int]):
+        assert node_limit is None or node_limit >= 1
+        self.__node_limit = node_limit
+
+
+    def get_node_count(self) -> int:
+        return self.__node_counter[0]
+
+
+    def has_persistent_evaluations(self) -> bool:
+        return self.__persistent_evaluations
+
+
+    def get_multipv(self) -> Optional[int]:
+        return self.__multipv
+
+
+    def get_max_cached_nodes(self) -> Optional[int]:
+        return self.__max_cached_nodes
+
+
+    def get_memory_stats(self) -> Mapping[str, int]:
+        """Counters of the last search: cached child states with max_cached_nodes,
+        and with trace_memory the peak and retained memory in bytes allocated by the search"""
+
+        memory_stats = {} if self.__child_cache is None else self.__child_cache.get_stats()
+        memory_stats.update(self.__traced_memory)
+        return memory_stats
+
+
+    def __start_memory_trace(self) -> Optional[Tuple[bool, int]]:
+        if self.__child_cache is not None and self.__node_counter[1] is None:
+            self.__child_cache.reset_stats()
+
+        if not self.__trace_memory:
+            return None
+
+        # >> a tracing already started by the caller is left running
+        tracing_started = not tracemalloc.is_tracing()
+        if tracing_started:
+            tracemalloc.start()
+        else:
+            tracemalloc.reset_peak()
+
+        return (tracing_started, tracemalloc.get_traced_memory()[0])
+
+
+    def __stop_memory_trace(self, memory_trace: Optional[Tuple[bool, int]]):
+        # >> the child states are useless once the search is done
+        if self.__child_cache is not None:
+            self.__child_cache.clear()
+
+        if memory_trace is not None:
+            (tracing_started, start_memory) = memory_trace
+            (end_memory, peak_memory) = tracemalloc.get_traced_memory()
+
+            if tracing_started:
+                tracemalloc.stop()
+
+            self.__traced_memory = dict(traced_peak=peak_memory - start_memory, traced_retained=end_memory - start_memory)
+
+
+    def __take_child_action(self, state: MinimaxState, action: PijersiAction) -> MinimaxState:
+        if self.__child_cache is None:
+            return state.take_action(action, use_cache=True)
+        else:
+            return self.__child_cache.take_action(state, action)
+
+
+    def __release_child_state(self, action: PijersiAction):
+        if self.__child_cache is None:
+            action.next_node = None
+        else:
+            self.__child_cache.release(action)
+
+
+    def get_principal_variation(self) -> Sequence[str]:
+        """Action names of the best branch of the last search, starting by the searched action ; maybe empty or partial"""
+        return self.__principal_variation
+
+
+    def can_abort_search(self) -> bool:
+        # >> a search with a time limit runs in other processes
+        return self.get_time_limit() is None or self.__node_limit is not None
+
+
+    def abort_search(self):
+        """Make the search running in another thread raise SearchAborted at its next node"""
+        self.__node_counter[1] = MinimaxSearcher.__ABORTED_NODE_BUDGET
+
+
+    def clear_search_abort(self):
+        """Let the next search run, after its running search has been aborted"""
+        if self.__node_counter[1] == MinimaxSearcher.__ABORTED_NODE_BUDGET:
+            self.__node_counter[1] = None
+
+
+    def clear_tables(self):
+        self.__transposition_table_depth_0 = {}
+        self.__transposition_table_depth_n = {}
+        self.__depth_searchers = {}
+
+
+    def __reset_tables(self):
+        # >> The transpostion tables were valid just for the previous pijersi_state.
+        # >> So it is better to reset them ; except the depth-0 one whose keys hold the whole evaluation context.
+        if not self.__persistent_evaluations:
+            self.__transposition_table_depth_0 = {}
+        self.__transposition_table_depth_n = {}
+
+
+    def __get_value_evaluator(self) -> Optional[PieceSquareStateEvaluator]:
+        # >> only a piece-square-table evaluator can update its value incrementally along the search nodes
+        return self.__state_evaluator if isinstance(self.__state_evaluator, PieceSquareStateEvaluator) else None
+
+
+    def get_analysis_budget(self) -> str:
+        # >> the evaluator and the child state cap change the search results, so they are part of the budget
+        return (f"depth={self.__max_depth};time={self.get_time_limit()};nodes={self.__node_limit};multipv={self.__multipv}" +
+                f";evaluator={self.__state_evaluator.get_fingerprint()};cached_nodes={self.__max_cached_nodes}")
+
 
     def evaluate_actions(self, state: PijersiState) -> Mapping[PijersiAction, float]:
 
-        initial_state = MinimaxState(state, state.get_current_player())
+        evaluated_actions = self.load_cached_evaluations(state)
+
+        if evaluated_actions is None:
+            memory_trace = self.__start_memory_trace()
+            try:
+                if self.__multipv is None:
+                    evaluated_actions = self.__evaluate_actions(state)
+                else:
+                    evaluated_actions = self.__evaluate_actions_multipv(state, self.__multipv)
+            finally:
+                self.__stop_memory_trace(memory_trace)
+            self.save_cached_evaluations(state, evaluated_actions)
+
+        else:
+            self.__node_counter[0] = 0
+            self.__traced_memory = {}
+
+        return evaluated_actions
+
+
+    def __evaluate_actions(self, state: PijersiState) -> Mapping[PijersiAction, float]:
+
+        initial_state = MinimaxState(state, state.get_current_player(), value_evaluator=self.__get_value_evaluator())
 
         self.__alpha_cuts = []
         self.__beta_cuts = []
@@ -2713,21 +3825,142 @@ class MinimaxSearcher(Searcher):
         self.__fun_evaluation_count = 0
         self.__null_windowing_count = 0
 
-        # >> The transpostion tables were valid just for the previous pijersi_state.
-        # >> So it is better to reset them.
-        self.__transposition_table_depth_0 = {}
-        self.__transposition_table_depth_n = {}
+        self.__reset_tables()
+
+        self.__node_counter[0] = 0
 
         (_, _, valued_actions) = self.alphabeta_plus(state=initial_state, player=1, use_opening_file=False)
         evaluated_actions = { str(action):action.value for action in valued_actions }
         return evaluated_actions
 
 
+    def __evaluate_actions_multipv(self, state: PijersiState, multipv: int) -> Mapping[PijersiAction, float]:
+        """Exact values of the multipv best root actions, and upper bounds not above the multipv-th value for the other ones
+
+        The root actions are sorted by a search at inferior depth. The multipv first ones are searched with a full window.
+        Each next one is searched with a null window at the multipv-th best value, and searched again only when it beats it.
+        All these searches share the transposition tables of the searcher.
+        The returned mapping lists first the actions with exact values, best first, which breaks the ties with the bounds.
+        """
+
+        initial_state = MinimaxState(state, state.get_current_player(), value_evaluator=self.__get_value_evaluator())
+
+        self.__alpha_cuts = []
+        self.__beta_cuts = []
+        self.__evaluation_count = 0
+        self.__fun_evaluation_count = 0
+        self.__null_windowing_count = 0
+
+        self.__reset_tables()
+
+        self.__node_counter[0] = 1
+
+        # >> HF: search once the actions making the same state
+        actions = state.get_actions()
+        unique_actions = {}
+        for action in actions:
+            unique_actions.setdefault(bytes(action.next_board_codes), action)
+        unique_actions = list(unique_actions.values())
+
+        # >> HB: sort actions according to Minimax at inferior depth
+        if self.__max_depth >= 2:
+            pre_depth = self.__max_depth - 1
+            pre_minimax_searcher = MinimaxSearcher(f"minimax-pre-{pre_depth}", max_depth=pre_depth, searcher_parent=self)
+            (_, _, _) = pre_minimax_searcher.alphabeta_plus(state=initial_state, player=1, use_opening_file=False)
+
+            unique_actions.sort(key=lambda action: -math.inf if action.value is None else action.value, reverse=True)
+
+        exact_values = []
+        exact_boards = []
+        board_values = {}
+
+        for action in unique_actions:
+            child_state = self.__take_child_action(initial_state, action)
+
+            if len(exact_values) < multipv:
+                (child_value, _, _) = self.alphabeta_plus(state=child_state, player=-1, depth=self.__max_depth - 1,
+                                                          use_opening_file=False)
+                is_exact = True
+
+            else:
+                # >> HD: does the action beat the multipv-th best value ?
+                # >> The window is above this value, so that the actions just equal to it are cut at once ;
+                # >> typically the many winning actions of a won position.
+                threshold = exact_values[multipv - 1] + self.__NULL_ALPHA_BETA_WINDOW/2
+
+                self.__null_windowing_count += 1
+                (child_value, _, _) = self.alphabeta_plus(state=child_state, player=-1, depth=self.__max_depth - 1,
+                                                          alpha=threshold, beta=threshold + self.__NULL_ALPHA_BETA_WINDOW/2,
+                                                          use_opening_file=False)
+                self.__null_windowing_count -= 1
+
+                is_exact = child_value > threshold
+                if is_exact:
+                    (child_value, _, _) = self.alphabeta_plus(state=child_state, player=-1, depth=self.__max_depth - 1,
+                                                              alpha=threshold, use_opening_file=False)
+
+            if is_exact:
+                # >> HG: store value to avoid re-evaluation
+                child_key = (self.__max_depth - 1, child_state.get_credit(), child_state.get_board_codes())
+                self.__transposition_table_depth_n[child_key] = child_value
+
+                exact_values.append(child_value)
+                exact_values.sort(reverse=True)
+                exact_boards.append(child_state.get_board_codes())
+
+            board_values[child_state.get_board_codes()] = child_value
+
+            # >> free some memory once action is valued
+            self.__release_child_state(action)
+
+        exact_boards.sort(key=lambda board: board_values[board], reverse=True)
+        exact_boards = exact_boards[:multipv]
+
+        # >> a bound just above the multipv-th value, within the null window, is clipped to it
+        if len(exact_values) >= multipv:
+            for (board, value) in board_values.items():
+                if board not in exact_boards:
+                    board_values[board] = min(value, exact_values[multipv - 1])
+
+        exact_board_set = set(exact_boards)
+        actions = sorted(actions, key=lambda action: (bytes(action.next_board_codes) not in exact_board_set,
+                                                      -board_values[bytes(action.next_board_codes)]))
+
+        evaluated_actions = { str(action):board_values[bytes(action.next_board_codes)] for action in actions }
+        return evaluated_actions
+
+
     def search(self, state: PijersiState, use_opening_file=True) -> PijersiAction:
 
+        # >> an action from the opening file is not a searched one, hence a distinct kind of analysis
+        analysis_kind = 'search-opening' if use_opening_file else 'search'
+
+        action = self.load_cached_action(state, kind=analysis_kind)
+
+        if action is None:
+            memory_trace = self.__start_memory_trace()
+            try:
+                action = self.__search(state, use_opening_file=use_opening_file)
+            finally:
+                self.__stop_memory_trace(memory_trace)
+            self.save_cached_action(state, action, kind=analysis_kind)
+
+        else:
+            self.__node_counter[0] = 0
+            self.__traced_memory = {}
+            self.__principal_variation = [str(action)]
+
+        return action
+
+
+    def __search(self, state: PijersiState, use_opening_file=True) -> PijersiAction:
+
+        if self.__node_limit is not None:
+            return self.__search_with_node_limit(state, use_opening_file=use_opening_file)
+
         do_check = False
 
-        initial_state = MinimaxState(state, state.get_current_player())
+        initial_state = MinimaxState(state, state.get_current_player(), value_evaluator=self.__get_value_evaluator())
 
         self.__alpha_cuts = []
         self.__beta_cuts = []
@@ -2735,10 +3968,13 @@ class MinimaxSearcher(Searcher):
         self.__fun_evaluation_count = 0
         self.__null_windowing_count = 0
 
-        # >> The transpostion tables were valid just for the previous pijersi_state.
-        # >> So it is better to reset them.
-        self.__transposition_table_depth_0 = {}
-        self.__transposition_table_depth_n = {}
+        self.__reset_tables()
+
+        self.__principal_variation = []
+
+        # >> a search driven by __search_with_node_limit keeps counting against the shared budget
+        if self.__node_counter[1] is None:
+            self.__node_counter[0] = 0
 
         if self.get_time_limit() is None:
             (best_value, best_branch, valued_actions) = self.alphabeta_plus(state=initial_state, player=1, use_opening_file=use_opening_file)
@@ -2746,6 +3982,11 @@ class MinimaxSearcher(Searcher):
             best_actions = [action for action in valued_actions if action.value == best_value]
             best_action = random.choice(best_actions)
 
+            if len(best_branch) != 0 and best_branch[0] is best_action:
+                self.__principal_variation = [str(action) for action in best_branch]
+            else:
+                self.__principal_variation = [str(best_action)]
+
             if self.__counting:
 
                 if self.__alpha_cuts:
@@ -2794,17 +4035,43 @@ class MinimaxSearcher(Searcher):
             search_futures = [None for search_index in range(search_count)]
 
             for search_index in range(search_count):
-                search_futures[search_index] = concurrent_executor.submit(minimax_search_task, depth=search_index + 1, state=state)
+                search_futures[search_index] = concurrent_executor.submit(minimax_search_task, depth=search_index + 1, state=state,
+                                                                          max_cached_nodes=self.__max_cached_nodes)
 
-            #-- watch end of minimax of highest depth after each sleeping of "wait_slice" seconds
-            wait_slice_min = 0.01
-            wait_count = math.ceil(max(wait_slice_min, self.get_time_limit())/wait_slice_min)
+            time_manager = self.get_time_manager()
 
-            wait_slice = self.get_time_limit()/wait_count
-            for _ in range(wait_count):
-                time.sleep(wait_slice)
-                if search_futures[search_count - 1].done():
-                    break
+            if time_manager is None or not time_manager.is_started():
+                #-- watch end of minimax of highest depth after each sleeping of "wait_slice" seconds
+                wait_slice_min = 0.01
+                wait_count = math.ceil(max(wait_slice_min, self.get_time_limit())/wait_slice_min)
+
+                wait_slice = self.get_time_limit()/wait_count
+                for _ in range(wait_count):
+                    time.sleep(wait_slice)
+                    if search_futures[search_count - 1].done():
+                        break
+
+            else:
+                #-- watch the ends of the minimax by increasing depth, and let the time manager decide when to stop
+                wait_slice = 0.01
+                search_start = time.time()
+                reported_count = 0
+
+                while not search_futures[search_count - 1].done():
+                    time.sleep(wait_slice)
+                    elapsed = time.time() - search_start
+
+                    while reported_count < search_count and search_futures[reported_count].done():
+                        depth_action = search_futures[reported_count].result()
+                        time_manager.add_iteration(str(depth_action), depth_action.value, elapsed)
+                        reported_count += 1
+
+                    if elapsed >= time_manager.get_maximum_time():
+                        break
+
+                    # >> all the depths are searched concurrently, from the start
+                    if reported_count != 0 and time_manager.should_stop(elapsed, next_start=0.):
+                        break
 
             #-- collect the answer of the highest depth minmax that is finished
             action = None
@@ -2836,6 +4103,65 @@ class MinimaxSearcher(Searcher):
         return action
 
 
+    def __search_with_node_limit(self, state: PijersiState, use_opening_file=True) -> PijersiAction:
+        """Iterative deepening until max_depth or until the node budget is exhausted
+
+        The result only depends on the node budget and not on the machine load, which makes
+        matches reproducible and lets many games share the cores ; the time limit is ignored.
+        """
+
+        self.__node_counter[0] = 0
+        self.__node_counter[1] = self.__node_limit
+
+        self.__principal_variation = []
+
+        action = None
+        action_depth = None
+
+        try:
+            for depth in range(1, self.__max_depth + 1):
+                if depth in self.__depth_searchers:
+                    depth_searcher = self.__depth_searchers[depth]
+
+                else:
+                    depth_searcher = MinimaxSearcher(f"{self.get_name()}-depth-{depth}", max_depth=depth,
+                                                     state_evaluator=(self.__state_evaluator
+                                                                      if self.__has_given_state_evaluator or depth == self.__max_depth
+                                                                      else None),
+                                                     persistent_evaluations=self.__persistent_evaluations)
+                    depth_searcher.__node_counter = self.__node_counter
+                    depth_searcher.__max_cached_nodes = self.__max_cached_nodes
+                    depth_searcher.__child_cache = self.__child_cache
+
+                    if self.__persistent_evaluations:
+                        self.__depth_searchers[depth] = depth_searcher
+
+                action = depth_searcher.search(state, use_opening_file=use_opening_file)
+                action_depth = depth
+                self.__principal_variation = depth_searcher.get_principal_variation()
+
+        except NodeLimitReached:
+            pass
+
+        finally:
+            self.__node_counter[1] = None
+
+        #-- ensure an action can be returned; at least by minimax-1
+        if action is None:
+            log()
+            log("no action found within node limit ; force new search by minimax-1")
+            fallback_minimax_searcher = MinimaxSearcher("minimax-1", max_depth=1)
+            action = fallback_minimax_searcher.search(state, use_opening_file=use_opening_file)
+            self.__node_counter[0] += fallback_minimax_searcher.get_node_count()
+            self.__principal_variation = [str(action)]
+
+        elif action_depth != self.__max_depth and self.__logging:
+            log()
+            log(f"node limit reached ; action returned by minimax at depth {action_depth}")
+
+        return action
+
+
     def check(self, initial_state: PijersiState, best_value: float, valued_actions: Sequence[PijersiAction]):
 
         (best_value_ref, valued_actions_ref) = self.minimax(state=initial_state, player=1)
@@ -2881,11 +4207,8 @@ class MinimaxSearcher(Searcher):
 
         self.__evaluation_count += 1
 
-        pijersi_state = state.get_pijersi_state()
-        credit = pijersi_state.get_credit()
-        board_codes = pijersi_state.get_board_codes()
-
-        key = (depth, credit, *board_codes)
+        # >> the players make the key valid across searches from different states
+        key = (depth, state.get_credit(), state.get_current_maximizer_player(), state.get_current_player(), state.get_board_codes())
 
         try:
             value = self.__transposition_table_depth_0[key]
@@ -2972,6 +4295,12 @@ class MinimaxSearcher(Searcher):
         if depth is None:
             depth = self.__max_depth
 
+        node_counter = self.__node_counter
+        if node_counter[1] is not None and node_counter[0] >= node_counter[1]:
+            if node_counter[1] == MinimaxSearcher.__ABORTED_NODE_BUDGET:
+                raise SearchAborted()
+            raise NodeLimitReached()
+        node_counter[0] += 1
 
         if depth == 0 or state.is_terminal():
             state_value = self.evaluate_state_value(state, depth)
@@ -2979,7 +4308,7 @@ class MinimaxSearcher(Searcher):
 
 
         # >> HG: avoid state evaluation
-        state_key = (depth, state.get_pijersi_state().get_credit(), *state.get_pijersi_state().get_board_codes())
+        state_key = (depth, state.get_credit(), state.get_board_codes())
         try:
             state_value = self.__transposition_table_depth_n[state_key]
             if False and self.__debugging:
@@ -3010,9 +4339,7 @@ class MinimaxSearcher(Searcher):
 
         make_opening_file = False
 
-        if ( depth == self.__max_depth and depth >= 2 and
-            state.get_pijersi_state().get_turn() == 1 and
-            state.get_pijersi_state().get_setup() == Setup.T.CLASSIC and use_opening_file):
+        if depth == self.__max_depth and depth >= 2 and state.is_opening() and use_opening_file:
             opening_file_path = os.path.join(_package_home, f"openings-minimax-{depth}.txt")
 
             if not os.path.isfile(opening_file_path):
@@ -3055,7 +4382,7 @@ class MinimaxSearcher(Searcher):
         unique_action_keys = set()
 
         for action in actions:
-            action_key = (*action.next_board_codes,)
+            action_key = bytes(action.next_board_codes)
             if action_key not in unique_action_keys:
                 unique_action_keys.add(action_key)
                 unique_actions.append(action)
@@ -3104,6 +4431,9 @@ class MinimaxSearcher(Searcher):
 
         do_null_window_search = self.__max_depth >= 3 and depth >= 2
 
+        # >> without cap on the cached child states, the children are taken and released without any extra call
+        child_cache = self.__child_cache
+
         if player == 1:
 
             best_child_value = -math.inf
@@ -3119,7 +4449,8 @@ class MinimaxSearcher(Searcher):
 
                 action_count += 1
 
-                child_state = state.take_action(action, use_cache=True)
+                child_state = (state.take_action(action, use_cache=True) if child_cache is None else
+                               child_cache.take_action(state, action))
 
                 if not do_null_window_search or first_action:
                     first_action = False
@@ -3151,12 +4482,15 @@ class MinimaxSearcher(Searcher):
 
                 # >> HG: store value to avoid re-evaluation
                 if self.__null_windowing_count == 0:
-                    child_key = (depth - 1, child_state.get_pijersi_state().get_credit(), *action.next_board_codes)
+                    child_key = (depth - 1, child_state.get_credit(), child_state.get_board_codes())
                     self.__transposition_table_depth_n[child_key] = child_value
 
                 # >> free some memory once action is valued and will never be explored  by any searcher
                 if self.__searcher_parent is None:
-                    action.next_state = None
+                    if child_cache is None:
+                        action.next_node = None
+                    else:
+                        child_cache.release(action)
 
                 if make_valued_actions:
                     valued_actions.append(action)
@@ -3187,7 +4521,8 @@ class MinimaxSearcher(Searcher):
                         log(f"HC: pre-evaluating and sorting {len(actions_without_value)} actions without value at depth {depth}/{self.__max_depth} for player {player}")
 
                     for action in actions_without_value:
-                        child_state = state.take_action(action, use_cache=True)
+                        child_state = (state.take_action(action, use_cache=True) if child_cache is None else
+                                       child_cache.take_action(state, action))
                         action.value = STATE_EVALUATOR_MM2.evaluate_state_value(child_state, depth - 1)
 
                     self.__evaluation_count += len(actions_without_value)
@@ -3198,7 +4533,8 @@ class MinimaxSearcher(Searcher):
                 for action in actions_without_value:
                     action_count += 1
 
-                    child_state = state.take_action(action, use_cache=True)
+                    child_state = (state.take_action(action, use_cache=True) if child_cache is None else
+                                   child_cache.take_action(state, action))
 
                     (child_value, child_branch, _) = self.alphabeta_plus(state=child_state, player=-player, depth=depth - 1,
                                                                      alpha=alpha, beta=beta,
@@ -3209,12 +4545,15 @@ class MinimaxSearcher(Searcher):
 
                     # >> HG: store value to avoid re-evaluation
                     if self.__null_windowing_count == 0:
-                        child_key = (depth - 1, child_state.get_pijersi_state().get_credit(), *action.next_board_codes)
+                        child_key = (depth - 1, child_state.get_credit(), child_state.get_board_codes())
                         self.__transposition_table_depth_n[child_key] = child_value
 
                     # >> free some memory once action is valued and will never be explored  by any searcher
                     if self.__searcher_parent is None:
-                        action.next_state = None
+                        if child_cache is None:
+                            action.next_node = None
+                        else:
+                            child_cache.release(action)
 
                     if make_valued_actions:
                         valued_actions.append(action)
@@ -3257,7 +4596,8 @@ class MinimaxSearcher(Searcher):
 
                 action_count += 1
 
-                child_state = state.take_action(action, use_cache=True)
+                child_state = (state.take_action(action, use_cache=True) if child_cache is None else
+                               child_cache.take_action(state, action))
 
                 if not do_null_window_search or first_action:
                     first_action = False
@@ -3288,12 +4628,15 @@ class MinimaxSearcher(Searcher):
 
                 # >> HG: store value to avoid re-evaluation
                 if self.__null_windowing_count == 0:
-                    child_key = (depth - 1, child_state.get_pijersi_state().get_credit(), *action.next_board_codes)
+                    child_key = (depth - 1, child_state.get_credit(), child_state.get_board_codes())
                     self.__transposition_table_depth_n[child_key] = child_value
 
                 # >> free some memory once action is valued and will never be explored  by any searcher
                 if self.__searcher_parent is None:
-                    action.next_state = None
+                    if child_cache is None:
+                        action.next_node = None
+                    else:
+                        child_cache.release(action)
 
                 if make_valued_actions:
                     valued_actions.append(action)
@@ -3324,7 +4667,8 @@ class MinimaxSearcher(Searcher):
                         log(f"HC: pre-evaluating and sorting {len(actions_without_value)} actions without value at depth {depth}/{self.__max_depth} for player {player}")
 
                     for action in actions_without_value:
-                        child_state = state.take_action(action, use_cache=True)
+                        child_state = (state.take_action(action, use_cache=True) if child_cache is None else
+                                       child_cache.take_action(state, action))
                         action.value = STATE_EVALUATOR_MM2.evaluate_state_value(child_state, depth - 1)
 
                     self.__evaluation_count += len(actions_without_value)
@@ -3335,7 +4679,8 @@ class MinimaxSearcher(Searcher):
                 for action in actions_without_value:
                     action_count += 1
 
-                    child_state = state.take_action(action, use_cache=True)
+                    child_state = (state.take_action(action, use_cache=True) if child_cache is None else
+                                   child_cache.take_action(state, action))
 
                     (child_value, child_branch, _) = self.alphabeta_plus(state=child_state, player=-player, depth=depth - 1,
                                                                      alpha=alpha, beta=beta,
@@ -3346,12 +4691,15 @@ class MinimaxSearcher(Searcher):
 
                     # >> HG: store value to avoid re-evaluation
                     if self.__null_windowing_count == 0:
-                        child_key = (depth - 1, child_state.get_pijersi_state().get_credit(), *action.next_board_codes)
+                        child_key = (depth - 1, child_state.get_credit(), child_state.get_board_codes())
                         self.__transposition_table_depth_n[child_key] = child_value
 
                     # >> free some memory once action is valued and will never be explored  by any searcher
                     if self.__searcher_parent is None:
-                        action.next_state = None
+                        if child_cache is None:
+                            action.next_node = None
+                        else:
+                            child_cache.release(action)
 
                     if make_valued_actions:
                         valued_actions.append(action)
@@ -3400,12 +4748,146 @@ class MinimaxSearcher(Searcher):
 
 
 
-def minimax_search_task(depth, state):
+def minimax_search_task(depth, state, max_cached_nodes=None):
     """A static wrapper function used for multiprocessing"""
-    minimax_searcher = MinimaxSearcher(f"minimax-{depth}", max_depth=depth)
+    minimax_searcher = MinimaxSearcher(f"minimax-{depth}", max_depth=depth, max_cached_nodes=max_cached_nodes)
     return minimax_searcher.search(state)
 
 
+class Ponderer:
+    """Search on the opponent's time the state expected after the reply predicted by the principal variation
+
+    After a searcher has chosen its action, "start" searches in a background thread the state after this action
+    and after the predicted reply. At the next turn of the searcher, "take" gives the result of this search
+    if the actual state is the predicted one (ponder hit), waiting for its end if needed ;
+    otherwise it aborts the search (ponder miss) and the searcher searches the actual state as usual.
+    The searcher, and so its tables, is the same one for both searches.
+    Just a MinimaxSearcher without time limit can ponder, because its search can be aborted.
+    """
+
+    __slots__ = ('__searcher', '__state', '__thread', '__action', '__hit_count', '__miss_count')
+
+
+    def __init__(self):
+        self.__searcher = None
+        self.__state = None
+        self.__thread = None
+        self.__action = None
+        self.__hit_count = 0
+        self.__miss_count = 0
+
+
+    def get_stats(self) -> Mapping[str, int]:
+        return dict(hits=self.__hit_count, misses=self.__miss_count)
+
+
+    def is_pondering(self) -> bool:
+        return self.__thread is not None
+
+
+    def get_searcher(self) -> Optional[Searcher]:
+        """The pondering searcher, if any"""
+        return self.__searcher
+
+
+    def get_state(self) -> Optional[PijersiState]:
+        """The pondered state, if any"""
+        return self.__state
+
+
+    def start(self, searcher: Searcher, state: PijersiState, action: PijersiAction) -> bool:
+        """Ponder the reply to the action just chosen by the searcher in the state ; False when there is nothing to ponder"""
+
+        self.stop()
+
+        if not isinstance(searcher, MinimaxSearcher) or not searcher.can_abort_search():
+            return False
+
+        next_state = state.take_action_by_name(str(action))
+        if next_state.is_terminal():
+            return False
+
+        # >> the predicted reply is the one of the principal variation ; otherwise the best one at depth 1
+        principal_variation = searcher.get_principal_variation()
+
+        if len(principal_variation) >= 2 and principal_variation[0] == str(action):
+            reply_name = principal_variation[1]
+        else:
+            reply_name = str(MinimaxSearcher("ponder-prediction", max_depth=1).search(next_state, use_opening_file=False))
+
+        self.__state = next_state.take_action_by_name(reply_name)
+        if self.__state.is_terminal():
+            self.__state = None
+            return False
+
+        self.__searcher = searcher
+        self.__action = None
+
+        # >> a daemon thread does not hold the process beyond its end
+        self.__thread = threading.Thread(target=self.__ponder, daemon=True)
+        self.__thread.start()
+        return True
+
+
+    def take(self, searcher: Searcher, state: PijersiState) -> Optional[PijersiAction]:
+        """The pondered action, if the searcher and the state are the pondered ones ; otherwise None, after stopping the pondering"""
+
+        if self.__thread is None:
+            return None
+
+        is_hit = (searcher.get_name() == self.__searcher.get_name() and
+                  state.get_ugi_fen() == self.__state.get_ugi_fen())
+
+        if not is_hit:
+            self.__miss_count += 1
+            self.stop()
+            return None
+
+        self.__hit_count += 1
+
+        self.__thread.join()
+        self.__thread = None
+        self.__searcher.clear_search_abort()
+
+        pondered_action = self.__action
+        self.__action = None
+        self.__searcher = None
+        self.__state = None
+
+        if pondered_action is None:
+            return None
+
+        # >> the action of the given state, for the caller to play it
+        action = state.get_action_by_name(str(pondered_action))
+        action.value = pondered_action.value
+        return action
+
+
+    def stop(self):
+        """Abort the pondering, if any, and wait for its end"""
+
+        if self.__thread is not None:
+
+            # >> the abort is repeated, in case the search was just resetting its node budget
+            while self.__thread.is_alive():
+                self.__searcher.abort_search()
+                self.__thread.join(0.01)
+
+            self.__thread = None
+            self.__searcher.clear_search_abort()
+
+        self.__searcher = None
+        self.__state = None
+        self.__action = None
+
+
+    def __ponder(self):
+        try:
+            self.__action = self.__searcher.search(self.__state)
+        except SearchAborted:
+            self.__action = None
+
+
 class SearcherCatalog:
 
     __slots__ = ('__catalog')
@@ -3435,7 +4917,8 @@ class Game:
     __slots__ = ('__searcher',
                  '__pijersi_state', '__pijersi_setup', '__pijersi_setup_board_codes',
                  '__enabled_log', '__log', '__turn', '__last_action',
-                 '__turn_durations', '__turn_start', '__turn_end', '__time_control', '__time_ended', '__time_ended_for_white', '__time_ended_for_black')
+                 '__turn_durations', '__turn_start', '__turn_end', '__time_control', '__time_ended', '__time_ended_for_white', '__time_ended_for_black',
+                 '__virtual_nodes_per_second', '__start_board_codes', '__played_actions')
 
 
     def __init__(self, setup: Setup.T=Setup.T.CLASSIC, board_codes: Optional[BoardCodes]=None):
@@ -3456,7 +4939,9 @@ class Game:
         self.__time_ended = False
         self.__time_ended_for_white = False
         self.__time_ended_for_black = False
-
+        self.__virtual_nodes_per_second = None
+        self.__start_board_codes = None
+        self.__played_actions = []
 
 
     def enable_log(self, condition: bool):
@@ -3484,6 +4969,9 @@ class Game:
 
         self.__pijersi_state = PijersiState(setup=self.__pijersi_setup, board_codes=self.__pijersi_setup_board_codes)
 
+        self.__start_board_codes = PijersiState.copy_board_codes(self.__pijersi_state.get_board_codes())
+        self.__played_actions = []
+
         if self.__enabled_log:
             self.__pijersi_state.show()
             self.__log = "Game started"
@@ -3524,6 +5012,19 @@ class Game:
         return self.__last_action
 
 
+    def get_played_actions(self) -> Sequence[str]:
+        """Names of the actions played since the start, in order"""
+        return self.__played_actions
+
+
+    def get_setup(self) -> Setup.T:
+        return self.__pijersi_setup
+
+
+    def get_start_board_codes(self) -> Optional[BoardCodes]:
+        return self.__start_board_codes
+
+
     def get_summary(self) -> str:
         return self.__pijersi_state.get_summary()
 
@@ -3551,6 +5052,17 @@ class Game:
         self.__turn_end = turn_end
 
 
+    def set_virtual_clock(self, nodes_per_second: Optional[float]):
+        """Charge each turn by the nodes searched instead of the elapsed time
+
+        A searcher that does not count nodes is still charged by the elapsed time.
+        """
+        if nodes_per_second is not None:
+            assert nodes_per_second > 0
+
+        self.__virtual_nodes_per_second = nodes_per_second
+
+
     def set_turn_durations(self, turn_durations: Mapping[Player.T, float]):
         assert set(turn_durations.keys()) == set([Player.T.WHITE, Player.T.BLACK])
 
@@ -3637,17 +5149,34 @@ class Game:
                 player_name = f"{Player.to_name(player)}-{self.__searcher[player].get_name()}"
                 log()
                 log(f"Player {player_name} is thinking ...")
-                turn_start = time.time() if self.__turn_start is None else self.__turn_start
+
+            turn_start = time.time() if self.__turn_start is None else self.__turn_start
+
+            if self.__time_control is not None:
+                player_clocks = self.get_clocks()
+                self.__searcher[player].compute_dynamic_time_limit(player_clocks[player], self.__pijersi_state)
 
             action = self.__searcher[player].search(self.__pijersi_state)
 
             self.__last_action = str(action)
+            self.__played_actions.append(self.__last_action)
             self.__turn = self.__pijersi_state.get_turn()
 
-            if self.__enabled_log:
-                turn_end = time.time() if self.__turn_end is None else self.__turn_end
-                turn_duration = turn_end - turn_start
+            turn_end = time.time() if self.__turn_end is None else self.__turn_end
+            turn_duration = turn_end - turn_start
+
+            if self.__virtual_nodes_per_second is not None:
+                node_count = self.__searcher[player].get_node_count()
+
+                if node_count is not None:
+                    turn_duration = node_count/self.__virtual_nodes_per_second
+
+                self.__turn_durations[player].append(turn_duration)
+
+            elif self.__enabled_log:
                 self.__turn_durations[player].append(turn_duration)
+
+            if self.__enabled_log:
                 log(f"Player {player_name} is done after %.1f seconds" % turn_duration)
 
                 action_count = len(self.__pijersi_state.get_actions())
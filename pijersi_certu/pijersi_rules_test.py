@@ -17,11 +17,18 @@ You should have received a copy of the GNU General Public License along with thi
 """
 
 from collections import Counter
+import io
+import json
+import math
 import os
 import random
+import shutil
+import struct
 import sys
+import tempfile
 
 from typing import Optional
+from typing import Sequence
 
 import multiprocessing
 
@@ -33,11 +40,38 @@ from pijersi_rules import Game
 from pijersi_rules import HexState
 from pijersi_rules import HumanSearcher
 from pijersi_rules import MinimaxSearcher
+from pijersi_rules import MinimaxState
 from pijersi_rules import Player
 from pijersi_rules import PathStates
+from pijersi_rules import PieceSquareStateEvaluator
 from pijersi_rules import PijersiState
+from pijersi_rules import Ponderer
 from pijersi_rules import RandomSearcher
 from pijersi_rules import Reward
+from pijersi_rules import Setup
+from pijersi_rules import StateEvaluator
+from pijersi_rules import TimeManager
+
+from pijersi_analysis import analyse_fens
+
+from pijersi_analysis_cache import AnalysisCache
+
+from pijersi_analysis_server import AnalysisService
+
+from pijersi_match import MatchStats
+from pijersi_match import Sprt
+from pijersi_match import elo_to_score
+from pijersi_match import run_match
+
+from pijersi_positions import PositionDatabase
+
+from pijersi_tournament import Tournament
+
+from pijersi_records import GameRecordFormat
+from pijersi_records import GameRecordWriter
+from pijersi_records import Result
+from pijersi_records import iterate_game_records
+from pijersi_records import make_game_record_from_game
 
 from pijersi_ugi import UgiClient
 from pijersi_ugi import UgiSearcher
@@ -343,6 +377,256 @@ def test():
 
 
 
+    def test_piece_square_state_evaluator():
+
+        log("=============================================")
+        log(" test_piece_square_state_evaluator ...")
+        log("=============================================")
+
+        evaluator = PieceSquareStateEvaluator.make_from_weights(fighter_weight=64, cube_weight=16, dg_weight=32, dc_weight=8)
+        evaluator.add_pair_term(Player.T.WHITE, 0, HexState.make_single(Player.T.WHITE, Cube.T.ROCK).encode(),
+                                1, HexState.make_single(Player.T.WHITE, Cube.T.PAPER).encode(), 0.5)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, "evaluator.pst")
+            evaluator.save(file_path)
+            loaded_evaluator = PieceSquareStateEvaluator.load(file_path)
+
+        pijersi_state = PijersiState()
+
+        for player in Player.T:
+            assert (loaded_evaluator.evaluate_board_value(player, pijersi_state.get_board_codes()) ==
+                    evaluator.evaluate_board_value(player, pijersi_state.get_board_codes()))
+
+        values = [evaluator.evaluate_board_value(player, pijersi_state.get_board_codes()) for player in Player.T]
+
+        turn_count = 40
+        while not pijersi_state.is_terminal() and pijersi_state.get_turn() < turn_count:
+            action = random.choice(pijersi_state.get_actions())
+
+            for player in Player.T:
+                values[player] = evaluator.update_board_value(player, values[player],
+                                                              pijersi_state.get_board_codes(), action.next_board_codes,
+                                                              action.path_vertices)
+
+            pijersi_state = pijersi_state.take_action(action)
+
+            for player in Player.T:
+                assert abs(values[player] - evaluator.evaluate_board_value(player, pijersi_state.get_board_codes())) < 1e-3
+
+        pijersi_state = PijersiState()
+        minimax_state = MinimaxState(pijersi_state, Player.T.WHITE, value_evaluator=evaluator)
+
+        while not minimax_state.is_terminal() and turn_count > 0:
+            minimax_state = minimax_state.take_action(random.choice(minimax_state.get_actions()))
+            turn_count -= 1
+
+            assert abs(minimax_state.get_board_value(evaluator) -
+                       evaluator.evaluate_board_value(Player.T.WHITE, minimax_state.get_board_codes())) < 1e-3
+            assert minimax_state.get_board_value(loaded_evaluator) is None
+
+        game = Game()
+
+        game.set_white_searcher(MinimaxSearcher("minimax-2-pst", max_depth=2, state_evaluator=evaluator))
+        game.set_black_searcher(MinimaxSearcher("minimax-2", max_depth=2))
+
+        game.start()
+
+        turn_index = 0
+        turn_count = 4
+        while game.has_next_turn() and turn_index < turn_count:
+            turn_index += 1
+            game.next_turn()
+
+        log("=============================================")
+        log("test_piece_square_state_evaluator done")
+        log("=============================================")
+
+
+    def test_game_with_node_limit_and_virtual_clock(turn_count: int=4, node_limit: int=5_000, nodes_per_second: float=10_000):
+
+        log("=====================================================")
+        log(" test_game_with_node_limit_and_virtual_clock ...")
+        log("=====================================================")
+
+        game_actions = []
+        game_clocks = []
+
+        for _ in range(2):
+            random.seed(2024)
+
+            game = Game(setup=Setup.T.FULL_RANDOM)
+            game.enable_log(False)
+            game.set_virtual_clock(nodes_per_second)
+
+            white_searcher = MinimaxSearcher("minimax-3-nodes", max_depth=3, node_limit=node_limit)
+            black_searcher = MinimaxSearcher("minimax-4-nodes", max_depth=4, node_limit=node_limit)
+
+            game.set_white_searcher(white_searcher)
+            game.set_black_searcher(black_searcher)
+
+            game.start()
+
+            actions = []
+            expected_clocks = [0, 0]
+            while game.has_next_turn() and game.get_turn() < turn_count:
+                player = game.get_state().get_current_player()
+                game.next_turn()
+                actions.append(game.get_last_action())
+
+                searcher = white_searcher if player == Player.T.WHITE else black_searcher
+                expected_clocks[player] += searcher.get_node_count()/nodes_per_second
+                assert searcher.get_node_count() > 0
+
+            assert all(abs(clock - expected_clock) < 1e-9 for (clock, expected_clock) in zip(game.get_clocks(), expected_clocks))
+
+            game_actions.append(actions)
+            game_clocks.append(game.get_clocks())
+
+        # >> node budgets and virtual clocks do not depend on the machine load
+        assert game_actions[0] == game_actions[1]
+        assert game_clocks[0] == game_clocks[1]
+
+        log("=====================================================")
+        log("test_game_with_node_limit_and_virtual_clock done")
+        log("=====================================================")
+
+
+    def test_game_records(game_count: int=3):
+
+        log("=====================================")
+        log(" test_game_records ...")
+        log("=====================================")
+
+        games = []
+
+        for setup in (Setup.T.CLASSIC, Setup.T.HALF_RANDOM, Setup.T.FULL_RANDOM):
+            for _ in range(game_count):
+                game = Game(setup=setup)
+                game.enable_log(False)
+                game.set_white_searcher(RandomSearcher("random"))
+                game.set_black_searcher(RandomSearcher("random"))
+                game.start()
+                while game.has_next_turn():
+                    game.next_turn()
+                games.append(game)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            records_path = os.path.join(temp_dir, "games.pgr")
+
+            # >> two openings of the writer to check the appending
+            for game_slice in (games[:2], games[2:]):
+                with GameRecordWriter(records_path) as writer:
+                    for game in game_slice:
+                        writer.write(make_game_record_from_game(game,
+                                                                evaluations=[0.5]*len(game.get_played_actions())))
+
+            game_records = list(iterate_game_records(records_path))
+
+        assert len(game_records) == len(games)
+
+        for (game, game_record) in zip(games, game_records):
+            assert game_record.setup == game.get_setup()
+            assert game_record.board_codes == game.get_start_board_codes()
+            assert game_record.get_action_names() == game.get_played_actions()
+            assert game_record.result == Result.from_rewards(game.get_rewards())
+            assert game_record.evaluations == [0.5]*len(game.get_played_actions())
+            assert game_record.durations is None
+
+            *_, last_state = game_record.iterate_states()
+            assert last_state.get_board_codes() == game.get_state().get_board_codes()
+
+        # >> the arrays of a record are little-endian, like its headers, whatever the machine
+        action_indices = [1, 2, 300]
+        assert GameRecordFormat.pack_array('H', action_indices) == struct.pack('<3H', *action_indices)
+        assert GameRecordFormat.pack_array('f', [0.5, -2.]) == struct.pack('<2f', 0.5, -2.)
+        assert GameRecordFormat.unpack_array('H', struct.pack('<3H', *action_indices)) == action_indices
+
+        log("=====================================")
+        log("test_game_records done")
+        log("=====================================")
+
+
+    def test_position_database():
+
+        log("=====================================")
+        log(" test_position_database ...")
+        log("=====================================")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with PositionDatabase(os.path.join(temp_dir, "positions.sqlite")) as database:
+
+                assert database.add_game("game-1", Setup.T.CLASSIC, None, ["a5-b6=c6", "f6-f7=d6"], result=Result.WHITE_WIN)
+                assert database.add_game("game-2", Setup.T.CLASSIC, None, ["a5-b6=c6", "g5-f5=d6"], result=Result.DRAW)
+                assert database.add_game("game-3", Setup.T.CLASSIC, None, ["a2-b3=c3"], result=Result.BLACK_WIN)
+                assert not database.add_game("game-3", Setup.T.CLASSIC, None, ["a2-b3=c3"], result=Result.BLACK_WIN)
+
+                assert database.get_game_count() == 3
+
+                pijersi_state = PijersiState()
+                stats = database.get_position_stats(pijersi_state)
+                assert (stats.game_count, stats.white_win_count, stats.black_win_count, stats.draw_count) == (3, 1, 1, 1)
+
+                action_stats = database.get_action_stats(pijersi_state)
+                assert [action_name for (action_name, _) in action_stats] == ["a5-b6=c6", "a2-b3=c3"]
+                assert action_stats[0][1].get_score(Player.T.WHITE) == 0.75
+
+                next_state = pijersi_state.take_action_by_simple_name("a5-b6=c6")
+                assert database.get_position_stats(next_state).game_count == 2
+
+        log("=====================================")
+        log("test_position_database done")
+        log("=====================================")
+
+
+    def test_parse_action_names(game_count: int=5):
+
+        log("=====================================")
+        log(" test_parse_action_names ...")
+        log("=====================================")
+
+        random.seed(2024)
+
+        for _ in range(game_count):
+            pijersi_state = PijersiState(setup=Setup.T.FULL_RANDOM)
+
+            while not pijersi_state.is_terminal():
+                actions = pijersi_state.get_actions()
+                action_ugi_names = pijersi_state.get_action_ugi_names()
+
+                # >> a fresh state has no dictionary of actions, so its parsing is direct
+                parsing_state = PijersiState(board_codes=pijersi_state.get_board_codes(),
+                                             player=pijersi_state.get_current_player(),
+                                             credit=pijersi_state.get_credit(),
+                                             turn=pijersi_state.get_turn(),
+                                             setup=pijersi_state.get_setup())
+
+                for action in actions:
+                    parsed_action = parsing_state.parse_action_name(str(action))
+                    assert parsed_action is not None
+                    assert str(parsed_action) == str(action)
+                    assert parsed_action.next_board_codes == action.next_board_codes
+                    assert parsing_state.is_legal(str(action).replace('!', ''))
+
+                for action_ugi_name in action_ugi_names:
+                    assert str(parsing_state.parse_action_ugi_name(action_ugi_name)) == str(pijersi_state.get_action_by_ugi_name(action_ugi_name))
+
+                action_simple_names = set(pijersi_state.get_action_simple_names())
+                for action_simple_name in action_simple_names:
+                    for other_name in (action_simple_name[0:2] + '-' + action_simple_name[3:5],
+                                       action_simple_name[0:2] + '=' + action_simple_name[3:5]):
+                        assert parsing_state.is_legal(other_name) == (other_name in action_simple_names)
+
+                assert not parsing_state.is_legal("a1-g6")
+                assert parsing_state.parse_action_ugi_name("z9a1") is None
+
+                pijersi_state = pijersi_state.take_action(random.choice(actions))
+
+        log("=====================================")
+        log("test_parse_action_names done")
+        log("=====================================")
+
+
     def test_action_ugi_name():
 
         log("===========================")
@@ -362,6 +646,483 @@ def test():
         log("===========================")
 
 
+    def test_fen_analysis(process_count: int=2):
+
+        log("=====================================")
+        log(" test_fen_analysis ...")
+        log("=====================================")
+
+        random.seed(2024)
+
+        pijersi_states = [PijersiState(), PijersiState(setup=Setup.T.FULL_RANDOM)]
+        lines = [" ".join(pijersi_state.get_ugi_fen()) for pijersi_state in pijersi_states] + ["", "not a fen"]
+
+        output_file = io.StringIO()
+        assert analyse_fens(lines, output_file, max_depth=1, process_count=process_count) == 3
+
+        analysis_records = [json.loads(line) for line in output_file.getvalue().splitlines()]
+
+        # >> the records are in the input order, and the empty line is skipped
+        assert [analysis_record['line'] for analysis_record in analysis_records] == [0, 1, 3]
+
+        for (pijersi_state, analysis_record) in zip(pijersi_states, analysis_records):
+            assert pijersi_state.get_action_by_ugi_name(analysis_record['bestmove']) is not None
+            assert analysis_record['nodes'] > 0
+
+        assert 'error' in analysis_records[2]
+
+        log("=====================================")
+        log("test_fen_analysis done")
+        log("=====================================")
+
+
+    def test_analysis_service(process_count: int=2):
+
+        log("=====================================")
+        log(" test_analysis_service ...")
+        log("=====================================")
+
+        fen = " ".join(PijersiState().get_ugi_fen())
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with AnalysisCache(os.path.join(temp_dir, "analysis-cache.sqlite")) as cache:
+
+                service = AnalysisService(cache, process_count=process_count)
+                service.start()
+
+                try:
+                    job = service.submit(dict(fen=fen, depth=1, multipv=3))
+                    job = service.get_job(job['job_id'], wait_timeout=60)
+                    assert job['status'] == 'done'
+                    assert len(job['result']['pv']) == 3
+
+                    # >> the same request is answered from the cache, without queueing
+                    cached_job = service.submit(dict(fen=fen, depth=1, multipv=3))
+                    assert cached_job['status'] == 'done' and cached_job['cached']
+                    assert cached_job['result']['pv'] == job['result']['pv']
+                    assert cached_job['result']['nodes'] == 0
+
+                finally:
+                    service.stop()
+
+        log("=====================================")
+        log("test_analysis_service done")
+        log("=====================================")
+
+
+    def test_searcher_analysis_cache(max_depth: int=2):
+
+        log("=====================================")
+        log(" test_searcher_analysis_cache ...")
+        log("=====================================")
+
+        pijersi_state = PijersiState()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with AnalysisCache(os.path.join(temp_dir, "analysis-cache.sqlite"), max_entries=10) as cache:
+
+                searcher = MinimaxSearcher(f"minimax{max_depth}", max_depth=max_depth)
+                searcher.set_analysis_cache(cache)
+
+                evaluated_actions = searcher.evaluate_actions(pijersi_state)
+                action = searcher.search(pijersi_state, use_opening_file=False)
+
+                # >> another searcher with the same name and budget reuses the analyses, without searching
+                other_searcher = MinimaxSearcher(f"minimax{max_depth}", max_depth=max_depth)
+                other_searcher.set_analysis_cache(cache)
+
+                assert other_searcher.evaluate_actions(pijersi_state) == evaluated_actions
+                assert other_searcher.get_node_count() == 0
+
+                other_action = other_searcher.search(pijersi_state, use_opening_file=False)
+                assert str(other_action) == str(action) and other_action.value == action.value
+                assert other_searcher.get_node_count() == 0
+
+                assert cache.get_stats()['hits'] == 2
+
+                # >> another evaluator or another bound of the cached nodes gives another analysis
+                for other_searcher in [MinimaxSearcher(f"minimax{max_depth}", max_depth=max_depth,
+                                                       state_evaluator=StateEvaluator(fighter_weight=1)),
+                                       MinimaxSearcher(f"minimax{max_depth}", max_depth=max_depth, max_cached_nodes=1000)]:
+                    other_searcher.set_analysis_cache(cache)
+                    assert other_searcher.load_cached_action(pijersi_state) is None
+
+                # >> the least recently used entries are evicted beyond max_entries
+                for position_hash in range(20):
+                    cache.put(position_hash, "test", dict())
+                assert cache.get_entry_count() <= cache.get_max_entries()
+
+        log("=====================================")
+        log("test_searcher_analysis_cache done")
+        log("=====================================")
+
+
+    def test_evaluate_actions_multipv(max_depth: int=2, multipv: int=3):
+
+        log("=====================================")
+        log(" test_evaluate_actions_multipv ...")
+        log("=====================================")
+
+        pijersi_state = PijersiState()
+
+        reference_searcher = MinimaxSearcher(f"minimax{max_depth}", max_depth=max_depth)
+        (_, reference_actions) = reference_searcher.minimax(MinimaxState(pijersi_state, pijersi_state.get_current_player()), player=1)
+        reference_values = {str(action):action.value for action in reference_actions}
+
+        searcher = MinimaxSearcher(f"minimax{max_depth}-multipv{multipv}", max_depth=max_depth, multipv=multipv)
+        evaluated_actions = searcher.evaluate_actions(pijersi_state)
+
+        assert set(evaluated_actions.keys()) == set(reference_values.keys())
+
+        # >> exact values first, best first, and then upper bounds
+        evaluated_items = list(evaluated_actions.items())
+        exact_values = sorted(reference_values.values(), reverse=True)[:multipv]
+
+        assert [value for (_, value) in evaluated_items[:multipv]] == exact_values
+
+        for (action_name, value) in evaluated_items[:multipv]:
+            assert reference_values[action_name] == value
+
+        for (action_name, value) in evaluated_items[multipv:]:
+            assert reference_values[action_name] <= value + 0.001
+            assert value <= exact_values[-1]
+
+        log("=====================================")
+        log("test_evaluate_actions_multipv done")
+        log("=====================================")
+
+
+    def test_time_manager(time_control: int=30):
+
+        log("=====================================")
+        log(" test_time_manager ...")
+        log("=====================================")
+
+        pijersi_state = PijersiState()
+        time_manager = TimeManager()
+
+        # >> more time per move when fewer fighters are left
+        optimum_time = time_manager.start_turn(float(time_control), pijersi_state)
+        assert optimum_time == time_control/time_manager.estimate_moves_to_go(pijersi_state)
+        assert time_manager.estimate_moves_to_go(pijersi_state) > time_manager.estimate_moves_to_go()
+
+        # >> a change of the best action extends the optimum time, within the maximum time
+        time_manager.add_iteration("a1-a2", 0., 0.1)
+        time_manager.add_iteration("b1-b2", 0., 0.4)
+        assert optimum_time < time_manager.get_optimum_time() <= time_manager.get_maximum_time()
+
+        # >> the next depth, predicted to last 1.6 seconds, is not started when it cannot end in time
+        assert not time_manager.should_stop(0.4, next_start=0.)
+        assert time_manager.should_stop(0.4, next_start=time_manager.get_optimum_time() - 1.)
+
+        time_searcher = MinimaxSearcher("minimax3-managed", max_depth=3, time_manager=TimeManager())
+        assert time_searcher.compute_dynamic_time_limit(time_control, pijersi_state) == optimum_time
+
+        game = Game()
+        game.set_white_searcher(time_searcher)
+        game.set_black_searcher(MinimaxSearcher("minimax1", max_depth=1))
+        game.set_time_control(time_control)
+        game.start()
+
+        for _ in range(4):
+            game.next_turn()
+
+        (white_clock, _) = game.get_clocks()
+        assert white_clock > 0
+
+        log("=====================================")
+        log("test_time_manager done")
+        log("=====================================")
+
+
+    def test_searcher_max_cached_nodes(max_depth: int=2, max_cached_nodes: int=50):
+
+        log("=====================================")
+        log(" test_searcher_max_cached_nodes ...")
+        log("=====================================")
+
+        pijersi_state = PijersiState()
+
+        reference_searcher = MinimaxSearcher(f"minimax{max_depth}", max_depth=max_depth)
+        reference_values = reference_searcher.evaluate_actions(pijersi_state)
+        assert len(reference_searcher.get_memory_stats()) == 0
+
+        searcher = MinimaxSearcher(f"minimax{max_depth}-cached{max_cached_nodes}", max_depth=max_depth,
+                                   max_cached_nodes=max_cached_nodes, trace_memory=True)
+        evaluated_values = searcher.evaluate_actions(pijersi_state)
+
+        # >> the evicted child states may change the bounds of the non-best actions, but not the best value
+        assert max(evaluated_values.values()) == max(reference_values.values())
+
+        memory_stats = searcher.get_memory_stats()
+        log(f"memory_stats = {memory_stats}")
+
+        assert memory_stats['max_cached_nodes'] == max_cached_nodes
+        assert memory_stats['evicted_nodes'] > 0
+        assert memory_stats['traced_peak'] > 0
+
+        # >> no child state is kept after the search
+        assert memory_stats['cached_nodes'] == 0
+        assert all(action.next_node is None for action in pijersi_state.get_actions())
+
+        log("=====================================")
+        log("test_searcher_max_cached_nodes done")
+        log("=====================================")
+
+
+    def test_ponderer(max_depth: int=2):
+
+        log("=====================================")
+        log(" test_ponderer ...")
+        log("=====================================")
+
+        pijersi_state = PijersiState()
+
+        ponderer = Ponderer()
+        searcher = MinimaxSearcher(f"minimax{max_depth}", max_depth=max_depth)
+
+        action = searcher.search(pijersi_state)
+        assert ponderer.start(searcher, pijersi_state, action)
+        assert ponderer.is_pondering() and ponderer.get_searcher() is searcher
+
+        # >> ponder hit: the pondered state is the actual one, so the searcher gets the pondered action
+        pondered_state = ponderer.get_state()
+        pondered_action = ponderer.take(searcher, pondered_state)
+
+        assert pondered_action is not None and str(pondered_action) in pondered_state.get_action_names()
+        assert not ponderer.is_pondering()
+        assert ponderer.get_stats() == dict(hits=1, misses=0)
+
+        # >> ponder miss: another reply than the predicted one aborts the pondering
+        assert ponderer.start(searcher, pijersi_state, action)
+
+        next_state = pijersi_state.take_action(action)
+        other_state = next(next_state.take_action(reply) for reply in next_state.get_actions()
+                           if next_state.take_action(reply).get_ugi_fen() != ponderer.get_state().get_ugi_fen())
+
+        assert ponderer.take(searcher, other_state) is None
+        assert not ponderer.is_pondering() and ponderer.get_searcher() is None
+        assert ponderer.get_stats() == dict(hits=1, misses=1)
+
+        # >> the searcher can search again after the aborted pondering
+        assert str(searcher.search(other_state)) in other_state.get_action_names()
+
+        log("=====================================")
+        log("test_ponderer done")
+        log("=====================================")
+
+
+    def test_match_stats_and_sprt(max_game_count: int=10_000):
+
+        log("=====================================")
+        log(" test_match_stats_and_sprt ...")
+        log("=====================================")
+
+        # >> known counts: 60 wins, 20 draws and 20 losses
+        stats = MatchStats()
+        for (points, count) in [(2, 60), (1, 20), (0, 20)]:
+            for _ in range(count):
+                stats.add_points(points)
+
+        assert stats.get_counts() == (60, 20, 20)
+        assert abs(stats.get_score() - 0.7) < 1e-9
+        assert abs(stats.get_score_variance() - 0.16) < 1e-9
+
+        (elo, elo_low, elo_high) = stats.get_elo()
+        assert abs(elo - 400*math.log10(0.7/0.3)) < 1e-6
+        assert elo_low < elo < elo_high
+
+        sprt = Sprt(elo0=0, elo1=10)
+        score1 = elo_to_score(10)
+        assert abs(sprt.get_llr(stats) - 100*(score1 - 0.5)*(2*0.7 - 0.5 - score1)/(2*0.16)) < 1e-9
+
+        # >> synthetic streams: a stronger first searcher makes H1 accepted, an equal one makes H0 accepted
+        for (pattern, expected_decision) in [((2, 2, 1, 0), Sprt.Decision.ACCEPT_H1),
+                                             ((2, 1, 0), Sprt.Decision.ACCEPT_H0)]:
+            sprt = Sprt(elo0=0, elo1=50)
+            stats = MatchStats()
+
+            decision = Sprt.Decision.CONTINUE
+            while decision == Sprt.Decision.CONTINUE and stats.get_game_count() < max_game_count:
+                stats.add_points(pattern[stats.get_game_count() % len(pattern)])
+                decision = sprt.get_decision(stats)
+
+            assert decision == expected_decision
+
+        log("=====================================")
+        log("test_match_stats_and_sprt done")
+        log("=====================================")
+
+
+    def test_run_match_with_sprt(game_count: int=40, process_count: int=2):
+
+        log("=====================================")
+        log(" test_run_match_with_sprt ...")
+        log("=====================================")
+
+        sprt = Sprt(elo0=0, elo1=100)
+
+        stats = run_match(MinimaxSearcher("minimax1", max_depth=1), RandomSearcher("random"),
+                          game_count=game_count, sprt=sprt, process_count=process_count)
+
+        # >> the match stops as soon as the SPRT accepts the stronger first searcher
+        assert sprt.get_decision(stats) == Sprt.Decision.ACCEPT_H1
+        assert stats.get_game_count() < game_count
+
+        log("=====================================")
+        log("test_run_match_with_sprt done")
+        log("=====================================")
+
+
+    def test_tournament(round_count: int=2, process_count: int=1):
+
+        log("=====================================")
+        log(" test_tournament ...")
+        log("=====================================")
+
+        searcher_names = ["random", "cmalo-1", "cmalo-2", "cmalo-3"]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_path = os.path.join(temp_dir, "tournament.jsonl")
+
+            # >> pairings: each couple of searchers in a round robin, the gauntlet searcher against each other one
+            tournament = Tournament(searcher_names, output_path, round_count=round_count, setup=Setup.T.FULL_RANDOM, seed=1)
+            gauntlet = Tournament(searcher_names, output_path, mode=Tournament.Mode.GAUNTLET, gauntlet_name="cmalo-3",
+                                  round_count=round_count, setup=Setup.T.FULL_RANDOM, seed=1)
+
+            assert len(tournament.make_pairings()) == 6
+            assert len(gauntlet.make_pairings()) == 3
+            assert all("cmalo-3" in pairing for pairing in gauntlet.make_pairings())
+
+            game_specs = tournament.make_schedule()
+            assert len(game_specs) == 2*6*round_count
+            assert len(set(game_spec['game_id'] for game_spec in game_specs)) == len(game_specs)
+
+            # >> colors are balanced, and both games of a pairing in a round share their setup
+            for searcher_name in searcher_names:
+                white_count = sum(1 for game_spec in game_specs if game_spec['white'] == searcher_name)
+                black_count = sum(1 for game_spec in game_specs if game_spec['black'] == searcher_name)
+                assert white_count == black_count == 3*round_count
+
+            for (white_game_spec, black_game_spec) in zip(game_specs[0::2], game_specs[1::2]):
+                assert (white_game_spec['white'], white_game_spec['black']) == (black_game_spec['black'], black_game_spec['white'])
+                assert white_game_spec['board_codes'] == black_game_spec['board_codes']
+
+            # >> the setups only depend on the seed
+            same_tournament = Tournament(searcher_names, output_path, round_count=round_count, setup=Setup.T.FULL_RANDOM, seed=1)
+            other_tournament = Tournament(searcher_names, output_path, round_count=round_count, setup=Setup.T.FULL_RANDOM, seed=2)
+
+            assert same_tournament.make_schedule() == game_specs
+            assert ([game_spec['board_codes'] for game_spec in other_tournament.make_schedule()] !=
+                    [game_spec['board_codes'] for game_spec in game_specs])
+
+            # >> resuming from a partial file: the recorded games are not replayed, a truncated line is
+            short_tournament = Tournament(["random", "cmalo-1"], output_path, round_count=round_count,
+                                          setup=Setup.T.FULL_RANDOM, seed=1)
+            short_game_specs = short_tournament.make_schedule()
+
+            done_record = dict(short_game_specs[0], white_points=1, black_points=1, turn_count=0, actions=[], duration=0.)
+            with open(output_path, 'w') as output_file:
+                output_file.write(json.dumps(done_record) + "\n")
+                output_file.write(json.dumps(dict(short_game_specs[1]))[:20])
+
+            short_tournament.run(process_count=process_count)
+
+            records = short_tournament.load_records()
+            assert sorted(record['game_id'] for record in records) == sorted(game_spec['game_id'] for game_spec in short_game_specs)
+            assert records[0] == done_record
+
+        log("=====================================")
+        log("test_tournament done")
+        log("=====================================")
+
+
+    def test_training_scripts(game_names: Sequence[str]=("2022-0806-0949-Lucas-vs-Minimax-2.txt",
+                                                         "2023-0221-1423-Theophile-vs-Minimax-2-10s.txt")):
+
+        log("=====================================")
+        log(" test_training_scripts ...")
+        log("=====================================")
+
+        # >> the training scripts need numpy, which the rules engine does not
+        try:
+            import numpy as np
+        except ImportError:
+            log("numpy is missing ; test_training_scripts skipped")
+            return
+
+        sys.path.append(os.path.join(_package_home, "..", "docs", "optimize-minimax-weights"))
+
+        import export_training_dataset
+        import texel_tune_minimax_weights
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+
+            # >> Texel tuning on a couple of archived games
+            for game_name in game_names:
+                shutil.copy(os.path.join(_package_home, "..", "games", game_name), temp_dir)
+
+            (features, results) = texel_tune_minimax_weights.make_dataset_from_archive(games_home=temp_dir)
+            assert features.shape == (len(results), texel_tune_minimax_weights.FEATURE_COUNT) and len(results) > 0
+
+            weights = texel_tune_minimax_weights.fit_weights(features, results, iteration_count=100)
+            assert weights.shape == (texel_tune_minimax_weights.FEATURE_COUNT,) and np.all(np.isfinite(weights))
+
+            # >> export of one self-play game, read back through a memory map
+            positions = export_training_dataset.play_one_self_play_game(0, max_depth=1)
+            dataset_path = os.path.join(temp_dir, "training-positions.bin")
+
+            with export_training_dataset.PositionWriter(dataset_path, chunk_size=7) as writer:
+                writer.append(positions)
+
+            read_positions = export_training_dataset.open_positions(dataset_path)
+            assert len(read_positions) == len(positions) > 0
+            assert np.array_equal(read_positions['board_codes'], positions['board_codes'])
+
+            del read_positions
+
+        log("=====================================")
+        log("test_training_scripts done")
+        log("=====================================")
+
+
+    def test_minimax_state(game_count: int=4):
+
+        log("=====================================")
+        log(" test_minimax_state ...")
+        log("=====================================")
+
+        random.seed(game_count)
+
+        for _ in range(game_count):
+            pijersi_state = PijersiState()
+            node = MinimaxState(pijersi_state, pijersi_state.get_current_player())
+
+            assert node.is_opening()
+            assert node.get_actions() is pijersi_state.get_actions()
+
+            while not pijersi_state.is_terminal():
+                action = random.choice(pijersi_state.get_actions())
+
+                pijersi_state = pijersi_state.take_action(action)
+                node = node.take_action(action)
+
+                # >> the search node agrees with the PijersiState it stands for
+                assert not node.is_opening()
+                assert node.get_board_codes() == pijersi_state.get_board_codes()
+                assert node.get_current_player() == pijersi_state.get_current_player()
+                assert node.get_credit() == pijersi_state.get_credit()
+                assert node.is_terminal() == pijersi_state.is_terminal()
+                assert node.get_rewards() == pijersi_state.get_rewards()
+
+                assert [str(node_action) for node_action in node.get_actions()] == list(pijersi_state.get_action_names())
+                assert node.get_pijersi_state().get_position_hash() == pijersi_state.get_position_hash()
+
+        log("=====================================")
+        log("test_minimax_state done")
+        log("=====================================")
+
+
     def test_game_between_ugi_players(depth: int=1, time_limit: int=20):
 
         log("=====================================")
@@ -424,6 +1185,57 @@ def test():
     if True:
         test_two_turns_between_minimax_players()
 
+    if True:
+        test_piece_square_state_evaluator()
+
+    if True:
+        test_game_with_node_limit_and_virtual_clock()
+
+    if True:
+        test_game_records()
+
+    if True:
+        test_position_database()
+
+    if True:
+        test_parse_action_names()
+
+    if True:
+        test_fen_analysis()
+
+    if True:
+        test_analysis_service()
+
+    if True:
+        test_searcher_analysis_cache()
+
+    if True:
+        test_evaluate_actions_multipv()
+
+    if True:
+        test_time_manager()
+
+    if True:
+        test_searcher_max_cached_nodes()
+
+    if True:
+        test_ponderer()
+
+    if True:
+        test_match_stats_and_sprt()
+
+    if True:
+        test_run_match_with_sprt()
+
+    if True:
+        test_tournament()
+
+    if True:
+        test_training_scripts()
+
+    if True:
+        test_minimax_state()
+
     if True:
         test_action_ugi_name()
 
@@ -17,23 +17,21 @@ You should have received a copy of the GNU General Public License along with thi
 """
 
 from datetime import datetime
-import hashlib
 import os
 import sys
 import time
 
-from collections import Counter
 import multiprocessing
 
 _package_home = os.path.abspath(os.path.dirname(__file__))
 sys.path.append(_package_home)
 
 
-from pijersi_rules import Game
 from pijersi_rules import MinimaxSearcher
-from pijersi_rules import Player
 from pijersi_rules import Setup
-from pijersi_rules import Reward
+
+from pijersi_match import Sprt
+from pijersi_match import run_match
 
 from pijersi_ugi import UgiClient
 from pijersi_ugi import UgiSearcher
@@ -47,43 +45,8 @@ def log(msg: str=None):
             print(f"{line}", file=sys.stderr, flush=True)
 
 
-def run_one_game(setup, white_searcher, black_searcher):
-    game = Game(setup=setup)
-    game.enable_log(False)
-
-    game.set_white_searcher(white_searcher)
-    game.set_black_searcher(black_searcher)
-
-    game.start()
-    game_hasher = hashlib.sha256()
-
-    while game.has_next_turn():
-        game_hasher.update(game.get_state().get_board_codes())
-        game.next_turn()
-        
-    game_hasher.update(game.get_state().get_board_codes())
-    game_hash = game_hasher.digest()
-
-    rewards = game.get_rewards()
-    
-    (white_points, black_points) = (0, 0)
-
-    if rewards[Player.T.WHITE] == Reward.WIN:
-        white_points = 2
-
-    elif rewards[Player.T.WHITE] == Reward.DRAW:
-        white_points = 1
-
-    if rewards[Player.T.BLACK] == Reward.WIN:
-        black_points = 2
-
-    elif rewards[Player.T.BLACK] == Reward.DRAW:
-        black_points = 1
-
-    return (white_points, black_points, game_hash)
-
-
-def study(setup: Setup.T=Setup.T.CLASSIC, natsel_start=True, natsel_depth: int=None, cmalo_depth: int=None, depth: int=1, game_count: int=1):
+def study(setup: Setup.T=Setup.T.CLASSIC, natsel_start=True, natsel_depth: int=None, cmalo_depth: int=None, depth: int=1, game_count: int=1,
+          sprt: Sprt=None):
 
     study_start = time.time()
 
@@ -123,17 +86,19 @@ def study(setup: Setup.T=Setup.T.CLASSIC, natsel_start=True, natsel_depth: int=N
 
     log(f"setup: {Setup.to_name(setup)} / white player: {white_searcher.get_name()} / black player: {black_searcher.get_name()} / game_count: {game_count}")
 
-    with multiprocessing.Pool(processes=10) as pool:
-        game_outputs = pool.starmap(run_one_game, ((setup, white_searcher, black_searcher) for game_index in range(game_count)))
+    # >> the first searcher keeps white, in order to study each color
+    stats = run_match(white_searcher, black_searcher, game_count=game_count, setup=setup,
+                      sprt=sprt, alternate_colors=False, process_count=10)
 
-    searcher_points = Counter()
-    searcher_points[white_searcher.get_name()] = sum((white_points for (white_points, _, _) in game_outputs))
-    searcher_points[black_searcher.get_name()] = sum((black_points for (_, black_points, _) in game_outputs))
-    
-    game_hash_set = set((game_hash for (_, _, game_hash) in game_outputs))
+    (white_win_count, draw_count, black_win_count) = stats.get_counts()
+    searcher_game_count = stats.get_game_count()
+
+    searcher_points = {}
+    searcher_points[white_searcher.get_name()] = 2*white_win_count + draw_count
+    searcher_points[black_searcher.get_name()] = 2*black_win_count + draw_count
 
     log()
-    log(f"effective game count: {len(game_hash_set)}")
+    log(f"effective game count: {stats.get_effective_game_count()}")
 
     log()
     log(f"white_points: {searcher_points[white_searcher.get_name()]} / black_points: {searcher_points[black_searcher.get_name()]}")
@@ -143,13 +108,15 @@ def study(setup: Setup.T=Setup.T.CLASSIC, natsel_start=True, natsel_depth: int=N
 
     log()
     searcher_count = len(searcher_dict)
-    searcher_game_count = game_count
     log(f"number of searchers: {searcher_count}")
     log(f"number of games per searcher: {searcher_game_count}")
     log()
     for (searcher_name, points) in sorted(searcher_points.items()):
         log(f"searcher {searcher_name} has {points/searcher_game_count:.3f} average points per game")
 
+    log()
+    log(f"white versus black: {stats.get_summary()}")
+
     study_end = time.time()
     study_duration = study_end - study_start
 
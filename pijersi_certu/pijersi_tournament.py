@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""pijersi_tournament.py runs parallel self-play tournaments between AI searchers for the PIJERSI boardgame."""
+
+
+_COPYRIGHT_AND_LICENSE = """
+PIJERSI-CERTU implements a GUI and a rules engine for the PIJERSI boardgame.
+
+Copyright (C) 2019 Lucas Borboleta (lucas.borboleta@free.fr).
+
+This program is free software: you can redistribute it and/or modify it under the terms of the GNU General Public License as published by the Free Software Foundation, either version 3 of the License, or (at your option) any later version.
+
+This program is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with this program. If not, see <http://www.gnu.org/licenses>.
+"""
+
+from datetime import datetime
+import enum
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+from typing import Any
+from typing import Callable
+from typing import Mapping
+from typing import Optional
+from typing import Sequence
+
+import multiprocessing
+
+_package_home = os.path.abspath(os.path.dirname(__file__))
+sys.path.append(_package_home)
+
+from pijersi_rules import Game
+from pijersi_rules import MinimaxSearcher
+from pijersi_rules import PijersiState
+from pijersi_rules import Player
+from pijersi_rules import RandomSearcher
+from pijersi_rules import SearcherCatalog
+from pijersi_rules import Setup
+
+from pijersi_match import MatchStats
+from pijersi_match import reward_to_points
+
+
+def log(msg: str=None):
+    if msg is None:
+        print("", file=sys.stderr, flush=True)
+    else:
+        for line in msg.split('\n'):
+            print(f"{line}", file=sys.stderr, flush=True)
+
+
+GameSpec = Mapping[str, Any]
+GameRecord = Mapping[str, Any]
+
+
+def make_default_searcher_catalog() -> SearcherCatalog:
+    searcher_catalog = SearcherCatalog()
+
+    searcher_catalog.add( RandomSearcher("random") )
+    searcher_catalog.add( MinimaxSearcher("cmalo-1", max_depth=1) )
+    searcher_catalog.add( MinimaxSearcher("cmalo-2", max_depth=2) )
+    searcher_catalog.add( MinimaxSearcher("cmalo-3", max_depth=3) )
+
+    return searcher_catalog
+
+
+# >> searchers built once per worker process by init_worker, and reused for all its games
+_worker_data = {}
+
+
+def init_worker(make_searcher_catalog: Callable[[], SearcherCatalog]):
+    _worker_data['searcher_catalog'] = make_searcher_catalog()
+
+
+def play_game_task(game_spec: GameSpec) -> GameRecord:
+    searcher_catalog = _worker_data['searcher_catalog']
+
+    game = Game(setup=Setup.from_name(game_spec['setup']), board_codes=bytearray(game_spec['board_codes']))
+    game.enable_log(False)
+
+    game.set_white_searcher(searcher_catalog.get(game_spec['white']))
+    game.set_black_searcher(searcher_catalog.get(game_spec['black']))
+
+    game_start = time.time()
+
+    actions = []
+    game.start()
+
+    while game.has_next_turn():
+        game.next_turn()
+        actions.append(game.get_last_action())
+
+    game_duration = time.time() - game_start
+
+    rewards = game.get_rewards()
+
+    game_record = dict(game_spec)
+    game_record['white_points'] = reward_to_points(rewards[Player.T.WHITE])
+    game_record['black_points'] = reward_to_points(rewards[Player.T.BLACK])
+    game_record['turn_count'] = game.get_turn()
+    game_record['actions'] = actions
+    game_record['duration'] = game_duration
+
+    return game_record
+
+
+class Tournament:
+    """Schedule, play and report a tournament whose games are streamed to a JSON-lines file
+
+    The games of a same round and pairing are played on the same setup, once with each color,
+    so that a random setup does not favor one searcher. Games already in the file are not replayed,
+    which allows resuming an interrupted tournament.
+    """
+
+    @enum.unique
+    class Mode(enum.Enum):
+        ROUND_ROBIN = 'round-robin'
+        GAUNTLET = 'gauntlet'
+
+
+    __slots__ = ('__searcher_names', '__mode', '__gauntlet_name', '__round_count', '__setup', '__seed',
+                 '__output_path', '__make_searcher_catalog', '__records')
+
+
+    def __init__(self, searcher_names: Sequence[str], output_path: str,
+                 mode: Mode=Mode.ROUND_ROBIN, gauntlet_name: Optional[str]=None,
+                 round_count: int=1, setup: Setup.T=Setup.T.FULL_RANDOM, seed: int=0,
+                 make_searcher_catalog: Callable[[], SearcherCatalog]=make_default_searcher_catalog):
+
+        assert len(searcher_names) >= 2
+        assert len(set(searcher_names)) == len(searcher_names)
+        assert round_count > 0
+
+        if mode == Tournament.Mode.GAUNTLET:
+            assert gauntlet_name in searcher_names
+
+        self.__searcher_names = list(searcher_names)
+        self.__mode = mode
+        self.__gauntlet_name = gauntlet_name
+        self.__round_count = round_count
+        self.__setup = setup
+        self.__seed = seed
+        self.__output_path = output_path
+        self.__make_searcher_catalog = make_searcher_catalog
+        self.__records = []
+
+
+    def make_pairings(self) -> Sequence[Sequence[str]]:
+
+        if self.__mode == Tournament.Mode.ROUND_ROBIN:
+            return list(itertools.combinations(self.__searcher_names, 2))
+
+        else:
+            return [(self.__gauntlet_name, searcher_name)
+                    for searcher_name in self.__searcher_names if searcher_name != self.__gauntlet_name]
+
+
+    def make_schedule(self) -> Sequence[GameSpec]:
+
+        game_specs = []
+
+        # >> the setups only depend on the seed, so that a resumed tournament finds the same games
+        setup_random = random.Random(self.__seed)
+
+        for round_index in range(self.__round_count):
+            for (pairing_index, (first_name, second_name)) in enumerate(self.make_pairings()):
+
+                random_state = random.getstate()
+                random.seed(setup_random.getrandbits(64))
+                board_codes = list(PijersiState.setup_board_codes(self.__setup))
+                random.setstate(random_state)
+
+                for (white_name, black_name) in ((first_name, second_name), (second_name, first_name)):
+                    game_specs.append({'game_id':f"{round_index}-{pairing_index}-{white_name}-{black_name}",
+                                       'round':round_index,
+                                       'white':white_name,
+                                       'black':black_name,
+                                       'setup':Setup.to_name(self.__setup),
+                                       'board_codes':board_codes})
+
+        return game_specs
+
+
+    def load_records(self) -> Sequence[GameRecord]:
+
+        self.__records = []
+
+        if os.path.isfile(self.__output_path):
+            with open(self.__output_path, 'r') as output_file:
+                for line in output_file:
+                    line = line.strip()
+
+                    # >> a line truncated by an interruption is ignored and its game is replayed
+                    try:
+                        self.__records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        pass
+
+        return self.__records
+
+
+    def run(self, process_count: Optional[int]=None, log_period: int=10):
+
+        process_count = process_count if process_count is not None else os.cpu_count()
+
+        done_game_ids = set(record['game_id'] for record in self.load_records())
+        game_specs = [game_spec for game_spec in self.make_schedule() if game_spec['game_id'] not in done_game_ids]
+
+        tournament_start = time.time()
+
+        log(f"tournament {self.__mode.value} / {len(self.__searcher_names)} searchers / setup {Setup.to_name(self.__setup)}" +
+            f" / {len(game_specs)} games to play and {len(done_game_ids)} already played / {process_count} processes" +
+            f" / start = {datetime.fromtimestamp(tournament_start).isoformat()}")
+
+        played_game_count = 0
+
+        with multiprocessing.Pool(processes=process_count,
+                                  initializer=init_worker, initargs=(self.__make_searcher_catalog,)) as pool:
+
+            with open(self.__output_path, 'a') as output_file:
+
+                # >> a line truncated by an interruption is ended, so that the next record starts on its own line
+                if not self.__ends_with_newline():
+                    output_file.write("\n")
+
+                for game_record in pool.imap_unordered(play_game_task, game_specs):
+                    output_file.write(json.dumps(game_record) + "\n")
+                    output_file.flush()
+
+                    self.__records.append(game_record)
+                    played_game_count += 1
+
+                    if played_game_count % log_period == 0:
+                        log(f"{played_game_count} / {len(game_specs)} games" +
+                            f" / {self.get_games_per_hour(played_game_count, time.time() - tournament_start):.1f} games/hour")
+
+        tournament_duration = time.time() - tournament_start
+
+        log()
+        log(self.get_report())
+        log()
+        log(f"{played_game_count} games played in {tournament_duration:.0f} s" +
+            f" / {self.get_games_per_hour(played_game_count, tournament_duration):.1f} games/hour")
+
+
+    def __ends_with_newline(self) -> bool:
+        with open(self.__output_path, 'rb') as output_file:
+            if output_file.seek(0, os.SEEK_END) == 0:
+                return True
+
+            output_file.seek(-1, os.SEEK_END)
+            return output_file.read(1) == b"\n"
+
+
+    @staticmethod
+    def get_games_per_hour(game_count: int, duration: float) -> float:
+        return 3_600*game_count/duration if duration > 0 else 0.
+
+
+    def get_report(self) -> str:
+
+        points = {searcher_name:0 for searcher_name in self.__searcher_names}
+        game_counts = {searcher_name:0 for searcher_name in self.__searcher_names}
+        pairing_stats = {pairing:MatchStats() for pairing in self.make_pairings()}
+
+        for record in self.__records:
+            (white_name, black_name) = (record['white'], record['black'])
+
+            points[white_name] += record['white_points']
+            points[black_name] += record['black_points']
+            game_counts[white_name] += 1
+            game_counts[black_name] += 1
+
+            if (white_name, black_name) in pairing_stats:
+                pairing_stats[(white_name, black_name)].add_points(record['white_points'])
+            else:
+                pairing_stats[(black_name, white_name)].add_points(record['black_points'])
+
+        lines = []
+
+        for searcher_name in sorted(self.__searcher_names, key=lambda x: -points[x]):
+            average_points = points[searcher_name]/game_counts[searcher_name] if game_counts[searcher_name] > 0 else 0.
+            lines.append(f"searcher {searcher_name} has {points[searcher_name]} points" +
+                         f" in {game_counts[searcher_name]} games / {average_points:.3f} average points per game")
+
+        lines.append("")
+
+        for ((first_name, second_name), stats) in pairing_stats.items():
+            lines.append(f"{first_name} versus {second_name}: {stats.get_summary()}")
+
+        total_duration = sum(record['duration'] for record in self.__records)
+        if total_duration > 0:
+            lines.append("")
+            lines.append(f"{self.get_games_per_hour(len(self.__records), total_duration):.1f} games/hour per process")
+
+        return "\n".join(lines)
+
+
+def main():
+
+    if True:
+        tournament = Tournament(searcher_names=["random", "cmalo-1", "cmalo-2"],
+                                output_path=os.path.join(_package_home, "tournament-round-robin.jsonl"),
+                                mode=Tournament.Mode.ROUND_ROBIN, round_count=10, setup=Setup.T.FULL_RANDOM)
+        tournament.run()
+
+    if False:
+        tournament = Tournament(searcher_names=["cmalo-1", "cmalo-2", "cmalo-3"],
+                                output_path=os.path.join(_package_home, "tournament-gauntlet.jsonl"),
+                                mode=Tournament.Mode.GAUNTLET, gauntlet_name="cmalo-3", round_count=50, setup=Setup.T.HALF_RANDOM)
+        tournament.run()
+
+
+if __name__ == "__main__":
+
+    log()
+    log("Hello")
+    log()
+    log(f"Python sys.version = {sys.version}")
+
+    main()
+
+    log()
+    log("Bye")
@@ -16,26 +16,44 @@ This program is distributed in the hope that it will be useful, but WITHOUT ANY
 You should have received a copy of the GNU General Public License along with this program. If not, see <http://www.gnu.org/licenses>.
 """
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+import json
 import math
 import os
+import queue
+import random
+import socket
+import socketserver
 from subprocess import PIPE
 from subprocess import Popen
 import sys
+import tempfile
+import time
+import zlib
 
+from typing import Any
 from typing import List
 from typing import Mapping
 from typing import Optional
+from typing import Sequence
 from typing import Self
 from typing import TextIO
 from typing import Tuple
 
+import argparse
 from multiprocessing import freeze_support
+from multiprocessing.managers import BaseManager
+import threading
 
 _package_home = os.path.abspath(os.path.dirname(__file__))
 sys.path.append(_package_home)
 
 import pijersi_rules as rules
 
+from pijersi_analysis_cache import AnalysisCache
+
 
 def log(msg: str=None):
     if msg is None:
@@ -66,6 +84,12 @@ class UgiChannel:
         return  UgiChannel(cin=self.__cout, cout=self.__cin)
 
 
+    @staticmethod
+    def make_socket_channel(connection: socket.socket) -> Self:
+        stream = connection.makefile('rw', encoding='utf-8', newline=UgiChannel.TERMINATOR)
+        return  UgiChannel(cin=stream, cout=stream)
+
+
     def send(self, data: List[str]):
         assert len(data) != 0
 
@@ -78,6 +102,10 @@ class UgiChannel:
         line = self.__cin.readline()
         self.__cin.flush()
 
+        # >> the peer has closed the channel
+        if len(line) == 0:
+            raise EOFError("UGI channel closed")
+
         cleaned_line = line.strip(UgiChannel.SEPARATOR + UgiChannel.TERMINATOR)
 
         if len(cleaned_line) == 0:
@@ -103,7 +131,7 @@ class UgiClient:
 
     __slots__ = ('__name', '__server_executable_path', '__permanent',
                  '__running', '__prepared',
-                 '__server_process', '__channel',
+                 '__server_process', '__server_connection', '__channel',
                  '__debugging', '__server_name', '__server_author', '__options')
 
     def __init__(self, name: str, server_executable_path: str, permanent: bool=False):
@@ -115,6 +143,7 @@ class UgiClient:
         self.__prepared = False
 
         self.__server_process = None
+        self.__server_connection = None
         self.__channel = None
 
         self.__debugging = False
@@ -132,6 +161,13 @@ class UgiClient:
         return self.__running
 
 
+    def is_alive(self) -> bool:
+        """Running with a server process that has not exited, or with a server connection"""
+        if self.__server_connection is not None:
+            return self.__running
+        return self.__running and self.__server_process.poll() is None
+
+
     def is_prepared(self) -> bool:
         return self.__prepared
 
@@ -140,6 +176,10 @@ class UgiClient:
         return self.__name
 
 
+    def get_server_executable_path(self) -> str:
+        return self.__server_executable_path
+
+
     def get_server_name(self) -> str:
         assert self.__server_name is not None
         return self.__server_name
@@ -152,9 +192,16 @@ class UgiClient:
 
     def run(self) -> None:
         if not self.__running:
-            (server_process, server_channel) = make_ugi_server_process(self.__server_executable_path)
-            self.__server_process = server_process
-            self.__channel = server_channel.make_dual_channel()
+            # >> a server address, like 'tcp:localhost:5701' or 'unix:/tmp/cmalo.sock', joins a resident socket server
+            if parse_ugi_server_address(self.__server_executable_path) is not None:
+                self.__server_connection = connect_ugi_server(self.__server_executable_path)
+                self.__channel = UgiChannel.make_socket_channel(self.__server_connection)
+
+            else:
+                (server_process, server_channel) = make_ugi_server_process(self.__server_executable_path)
+                self.__server_process = server_process
+                self.__channel = server_channel.make_dual_channel()
+
             self.__running = True
 
 
@@ -243,6 +290,14 @@ class UgiClient:
         self.__send(['go', 'manual', move])
 
 
+    def go_nodes_and_wait(self, node_count: int) -> Tuple[str, List[List[str]]]:
+        assert node_count >= 1
+        self.__send(['go', 'nodes', str(node_count)])
+
+        bestmove_and_infos = self.__handle_bestmove_reply()
+        return bestmove_and_infos
+
+
     def go_movetime_and_wait(self, time_ms: float) -> Tuple[str, List[List[str]]]:
         assert time_ms > 0
         self.__send(['go', 'movetime', str(time_ms)])
@@ -317,115 +372,810 @@ class UgiClient:
 
             self.__send(['quit'])
 
+            if self.__server_connection is not None:
+                # >> only the session ends ; the resident server keeps running
+                self.__server_connection.close()
+                self.__server_connection = None
+
             # wait just for nicely logging when debugging
-            if self.__debugging:
+            elif self.__debugging:
                 try:
                     _ = self.__server_process.wait(timeout=0.01)
                 except:
                     pass
 
-            else:
-                try:
-                    self.__server_process.terminate()
-                except:
-                    pass
+            else:
+                try:
+                    self.__server_process.terminate()
+                except:
+                    pass
+
+            self.__server_process = None
+            self.__channel = None
+            self.__running = False
+            self.__prepared = False
+
+
+    def uginewgame(self):
+        self.__send(['uginewgame'])
+
+
+    def setoption(self, name: str, value: str):
+        self.__send(['setoption', 'name', name, 'value', value])
+
+
+    def bench(self, depth: Optional[int]=None) -> Tuple[List[str], List[List[str]]]:
+        """Run the 'bench' extension of the cmalo server ; return its final reply and its infos"""
+
+        self.__send(['bench'] if depth is None else ['bench', 'depth', str(depth)])
+
+        infos = []
+
+        while True:
+            reply = self.__recv()
+
+            if reply[0] == 'bench':
+                return (reply, infos)
+
+            infos.append(reply)
+
+
+    def stop(self) -> str:
+        self.__log_error("stop: not implemented !")
+        assert False
+
+        self.__send(['stop'])
+        bestmove = self.__handle_bestmove_reply()
+        return bestmove
+
+
+    def ugi(self):
+        self.__log_debug("ugi: ...")
+        self.__send(['ugi'])
+
+        while True:
+            reply = self.__recv()
+            self.__log_debug(f"ugi: reply {reply}")
+
+            reply_head = reply[0]
+            reply_tail = reply[1:]
+
+            if reply_head == 'ugiok':
+
+                if len(reply_tail) != 0:
+                    self.__log_info(f"ugi: ignoring extra tokens in reply '{reply}'")
+                break
+
+            elif reply_head == 'id':
+
+                if len(reply) < 3:
+                    self.__log_info(f"ugi: expected at least 3 tokens ; ignoring reply '{reply}'")
+                    continue
+
+                elif reply_tail[0] == 'name':
+                    self.__server_name = ''.join(reply_tail[1:])
+
+                elif reply_tail[0] == 'author':
+                    self.__server_author = ''.join(reply_tail[1:])
+
+                else:
+                    self.__log_info(f"ugi: unexpected token '{reply_tail[0]}' ; ignoring reply '{reply}'")
+                    continue
+
+            elif reply_head == 'info':
+                self.__log_debug(f"ugi: '{reply}'")
+
+            elif reply_head == 'option':
+
+                if len(reply_tail) < 2 or reply_tail[0] != 'name':
+                    self.__log_debug(f"ugi: cannot find/match token 'name' ; ignoring reply '{reply}'")
+                    continue
+
+                option_name = reply_tail[1]
+                option_props = reply_tail[2:]
+
+                if len(option_props) % 2 != 0:
+                    self.__log_info(f"ugi: cannot pair property tokens ; ignoring reply '{reply}'")
+                    continue
+
+                option_prop_keys = option_props[0::2]
+                option_prop_vals = option_props[1::2]
+                self.__options[option_name] = {key:val for (key, val) in zip(option_prop_keys, option_prop_vals)}
+
+            else:
+                self.__log_info(f"ugi: unexpected head '{reply_head}' ; ignoring reply '{reply}'")
+                continue
+
+        self.__log_debug(f"ugi: server_name = '{self.__server_name}' ; server_author = '{self.__server_author}'")
+        self.__log_debug(f"ugi: options = '{self.__options}'")
+
+        self.__log_debug("ugi: done")
+
+
+
+class UgiEnginePool:
+    """Permanent UGI clients, grouped by engine name, leased for one request at a time
+
+    The pool lives in the process of a UgiEnginePoolManager, so that the pipes of the clients are never pickled:
+    searchers in other processes only hold a proxy to the pool and send it requests.
+    The engines are started on their first request and restarted when they died or failed a request.
+    """
+
+    # >> methods of UgiClient that a request may call
+    REQUEST_METHODS = frozenset(('go_depth_and_wait', 'go_manual', 'go_movetime_and_wait', 'go_nodes_and_wait',
+                                 'isready', 'position_fen', 'position_startpos',
+                                 'query_fen', 'query_gameover', 'query_islegal', 'query_p1turn', 'query_result',
+                                 'setoption', 'uginewgame'))
+
+    __slots__ = ('__engines', '__idle_clients', '__started_counts', '__restart_counts', '__lock')
+
+
+    def __init__(self):
+        self.__engines = {}
+        self.__idle_clients = {}
+        self.__started_counts = {}
+        self.__restart_counts = {}
+        self.__lock = threading.Lock()
+
+
+    def add_engine(self, engine_name: str, server_executable_path: str, size: int=1):
+        assert size >= 1
+
+        with self.__lock:
+            assert engine_name not in self.__engines
+            self.__engines[engine_name] = (server_executable_path, size)
+            self.__idle_clients[engine_name] = queue.Queue()
+            self.__started_counts[engine_name] = 0
+            self.__restart_counts[engine_name] = 0
+
+
+    def get_engine_names(self) -> List[str]:
+        return list(self.__engines.keys())
+
+
+    def get_engine_size(self, engine_name: str) -> int:
+        return self.__engines[engine_name][1]
+
+
+    def get_server_executable_path(self, engine_name: str) -> str:
+        return self.__engines[engine_name][0]
+
+
+    def get_restart_count(self, engine_name: str) -> int:
+        return self.__restart_counts[engine_name]
+
+
+    def __start_client(self, engine_name: str) -> UgiClient:
+        (server_executable_path, _) = self.__engines[engine_name]
+
+        ugi_client = UgiClient(name=engine_name, server_executable_path=server_executable_path, permanent=True)
+        ugi_client.run()
+        ugi_client.prepare()
+
+        return ugi_client
+
+
+    def __restart_client(self, engine_name: str, ugi_client: UgiClient) -> UgiClient:
+        try:
+            ugi_client.quit()
+        except Exception:
+            pass
+
+        with self.__lock:
+            self.__restart_counts[engine_name] += 1
+
+        return self.__start_client(engine_name)
+
+
+    def __lease(self, engine_name: str) -> UgiClient:
+        idle_clients = self.__idle_clients[engine_name]
+
+        with self.__lock:
+            can_start = idle_clients.empty() and self.__started_counts[engine_name] < self.get_engine_size(engine_name)
+            if can_start:
+                self.__started_counts[engine_name] += 1
+
+        if can_start:
+            try:
+                return self.__start_client(engine_name)
+            except Exception:
+                with self.__lock:
+                    self.__started_counts[engine_name] -= 1
+                raise
+
+        # >> wait for a client released by another request
+        return idle_clients.get()
+
+
+    def __release(self, engine_name: str, ugi_client: UgiClient):
+        self.__idle_clients[engine_name].put(ugi_client)
+
+
+    def run_request(self, engine_name: str, commands: List[Tuple[str, Tuple]]) -> List[Any]:
+        """Call the (method name, arguments) commands on a leased client and return their results
+
+        A request that fails, typically because its engine crashed, is replayed once on a restarted engine.
+        """
+
+        assert all(method_name in UgiEnginePool.REQUEST_METHODS for (method_name, _) in commands)
+
+        ugi_client = self.__lease(engine_name)
+
+        try:
+            if not ugi_client.is_alive():
+                ugi_client = self.__restart_client(engine_name, ugi_client)
+
+            try:
+                return [getattr(ugi_client, method_name)(*method_args) for (method_name, method_args) in commands]
+
+            except Exception:
+                ugi_client = self.__restart_client(engine_name, ugi_client)
+                return [getattr(ugi_client, method_name)(*method_args) for (method_name, method_args) in commands]
+
+        finally:
+            self.__release(engine_name, ugi_client)
+
+
+    def check_health(self) -> Mapping[str, int]:
+        """Ping the idle engines and restart the unresponsive ones ; return the restart count per engine"""
+
+        restart_counts = {}
+
+        for engine_name in self.__engines:
+            idle_clients = self.__idle_clients[engine_name]
+            checked_clients = []
+            restart_count = 0
+
+            while True:
+                try:
+                    ugi_client = idle_clients.get_nowait()
+                except queue.Empty:
+                    break
+
+                try:
+                    healthy = ugi_client.is_alive() and ugi_client.isready() == ['readyok']
+                except Exception:
+                    healthy = False
+
+                if not healthy:
+                    ugi_client = self.__restart_client(engine_name, ugi_client)
+                    restart_count += 1
+
+                checked_clients.append(ugi_client)
+
+            for ugi_client in checked_clients:
+                idle_clients.put(ugi_client)
+
+            restart_counts[engine_name] = restart_count
+
+        return restart_counts
+
+
+    def close(self):
+        for engine_name in self.__engines:
+            idle_clients = self.__idle_clients[engine_name]
+
+            while True:
+                try:
+                    ugi_client = idle_clients.get_nowait()
+                except queue.Empty:
+                    break
+
+                try:
+                    ugi_client.quit()
+                except Exception:
+                    pass
+
+            with self.__lock:
+                self.__started_counts[engine_name] = 0
+
+
+class UgiEnginePoolManager(BaseManager):
+    pass
+
+
+UgiEnginePoolManager.register('UgiEnginePool', UgiEnginePool)
+
+
+def start_ugi_engine_pool(engines: Mapping[str, Tuple[str, int]]) -> Tuple[UgiEnginePoolManager, UgiEnginePool]:
+    """Start the helper process of the pool and add the engines given as {name: (executable path, size)}"""
+
+    manager = UgiEnginePoolManager()
+    manager.start()
+
+    engine_pool = manager.UgiEnginePool()
+
+    for (engine_name, (server_executable_path, size)) in engines.items():
+        engine_pool.add_engine(engine_name, server_executable_path, size)
+
+    return (manager, engine_pool)
+
+
+class UgiPooledClient:
+    """Stand-in for a permanent UgiClient, whose commands are run by an engine of a UgiEnginePool
+
+    The commands without reply are buffered and sent with the next command with a reply,
+    so that a position and its search run on the same leased engine.
+    The client holds a proxy to the pool and can be pickled, for instance into a PoolExecutor.
+    """
+
+    __slots__ = ('__engine_pool', '__engine_name', '__pending_commands')
+
+
+    def __init__(self, engine_pool: UgiEnginePool, engine_name: str):
+        self.__engine_pool = engine_pool
+        self.__engine_name = engine_name
+        self.__pending_commands = []
+
+
+    def get_name(self) -> str:
+        return self.__engine_name
+
+
+    def get_engine_size(self) -> int:
+        """Number of engines of the pool that may run requests of this client concurrently"""
+        return self.__engine_pool.get_engine_size(self.__engine_name)
+
+
+    def get_server_executable_path(self) -> str:
+        return self.__engine_pool.get_server_executable_path(self.__engine_name)
+
+
+    def make_sibling(self) -> Self:
+        """Another client of the same engine, with its own buffer of pending commands"""
+        return UgiPooledClient(self.__engine_pool, self.__engine_name)
+
+
+    def is_permanent(self) -> bool:
+        return True
+
+
+    def is_running(self) -> bool:
+        return True
+
+
+    def is_prepared(self) -> bool:
+        return True
+
+
+    def run(self) -> None:
+        pass
+
+
+    def prepare(self) -> None:
+        pass
+
+
+    def quit(self) -> None:
+        self.__pending_commands = []
+
+
+    def __buffer(self, method_name: str, *method_args) -> None:
+        self.__pending_commands.append((method_name, method_args))
+
+
+    def __request(self, method_name: str, *method_args) -> Any:
+        commands = self.__pending_commands + [(method_name, method_args)]
+        self.__pending_commands = []
+        return self.__engine_pool.run_request(self.__engine_name, commands)[-1]
+
+
+    def go_manual(self, move: str) -> None:
+        self.__buffer('go_manual', move)
+
+
+    def position_fen(self, fen: Optional[List[str]]=None, moves: Optional[List[str]]=None) -> None:
+        self.__buffer('position_fen', fen, moves)
+
+
+    def position_startpos(self, moves: Optional[List[str]]) -> None:
+        self.__buffer('position_startpos', moves)
+
+
+    def setoption(self, name: str, value: str) -> None:
+        self.__buffer('setoption', name, value)
+
+
+    def uginewgame(self) -> None:
+        self.__buffer('uginewgame')
+
+
+    def go_depth_and_wait(self, depth: int) -> Tuple[str, List[List[str]]]:
+        return self.__request('go_depth_and_wait', depth)
+
+
+    def go_movetime_and_wait(self, time_ms: float) -> Tuple[str, List[List[str]]]:
+        return self.__request('go_movetime_and_wait', time_ms)
+
+
+    def go_nodes_and_wait(self, node_count: int) -> Tuple[str, List[List[str]]]:
+        return self.__request('go_nodes_and_wait', node_count)
+
+
+    def isready(self) -> List[str]:
+        return self.__request('isready')
+
+
+    def query_fen(self) -> List[str]:
+        return self.__request('query_fen')
+
+
+    def query_gameover(self) -> List[str]:
+        return self.__request('query_gameover')
+
+
+    def query_islegal(self, move: str) -> List[str]:
+        return self.__request('query_islegal', move)
+
+
+    def query_p1turn(self) -> List[str]:
+        return self.__request('query_p1turn')
+
+
+    def query_result(self) -> List[str]:
+        return self.__request('query_result')
+
+
+class AsyncUgiClient:
+    """Asyncio counterpart of a permanent UgiClient, whose engine runs as an asyncio subprocess
+
+    Awaiting a reply only suspends the calling coroutine, so that one controller process
+    can drive many engines at the same time. The commands of one client must be awaited
+    one after the other ; like for UgiClient, "stop" is not implemented, because UgiServer does not read
+    its commands during a search.
+    """
+
+    __slots__ = ('__name', '__server_executable_path', '__server_process', '__server_name', '__server_author', '__options')
+
+
+    def __init__(self, name: str, server_executable_path: str):
+        self.__name = name
+        self.__server_executable_path = server_executable_path
+        self.__server_process = None
+
+        self.__server_name = None
+        self.__server_author = None
+        self.__options = {}
+
+
+    def get_name(self) -> str:
+        return self.__name
+
+
+    def get_server_name(self) -> str:
+        assert self.__server_name is not None
+        return self.__server_name
+
+
+    def get_server_author(self) -> str:
+        assert self.__server_author is not None
+        return self.__server_author
+
+
+    def is_running(self) -> bool:
+        return self.__server_process is not None and self.__server_process.returncode is None
+
+
+    async def run(self) -> None:
+        if self.__server_process is None:
+            self.__server_process = await asyncio.create_subprocess_exec(*make_ugi_server_args(self.__server_executable_path),
+                                                                         stdin=asyncio.subprocess.PIPE,
+                                                                         stdout=asyncio.subprocess.PIPE)
+
+
+    async def prepare(self) -> None:
+        await self.ugi()
+
+        isready = await self.isready()
+        assert isready == ['readyok']
+
+        await self.uginewgame()
+
+
+    async def quit(self) -> None:
+        if self.__server_process is not None:
+            try:
+                await self.__send(['quit'])
+                await asyncio.wait_for(self.__server_process.wait(), timeout=1)
+
+            except (OSError, asyncio.TimeoutError):
+                self.__server_process.kill()
+                await self.__server_process.wait()
+
+            self.__server_process = None
+
+
+    async def __recv(self) -> List[str]:
+        line = await self.__server_process.stdout.readline()
+        assert len(line) != 0, f"AsyncUgiClient: engine '{self.__name}' closed its output"
+
+        cleaned_line = line.decode().strip(UgiChannel.SEPARATOR + UgiChannel.TERMINATOR)
+
+        data = cleaned_line.split(UgiChannel.SEPARATOR) if len(cleaned_line) != 0 else []
+        assert len(data) != 0
+        return data
+
+
+    async def __send(self, data: List[str]) -> None:
+        assert len(data) != 0
+
+        line = UgiChannel.SEPARATOR.join(data) + UgiChannel.TERMINATOR
+        self.__server_process.stdin.write(line.encode())
+        await self.__server_process.stdin.drain()
+
+
+    async def __handle_bestmove_reply(self) -> Tuple[str, List[List[str]]]:
+
+        infos = []
+
+        while True:
+            reply = await self.__recv()
+
+            if reply[0] == 'bestmove':
+                assert len(reply) >= 2
+                return (reply[1], infos)
+
+            elif reply[0] == 'info':
+                infos.append(reply)
+
+
+    async def go_depth(self, depth: int) -> Tuple[str, List[List[str]]]:
+        assert depth >= 1
+        await self.__send(['go', 'depth', str(depth)])
+        return await self.__handle_bestmove_reply()
+
+
+    async def go_manual(self, move: str) -> None:
+        await self.__send(['go', 'manual', move])
+
+
+    async def go_movetime(self, time_ms: float) -> Tuple[str, List[List[str]]]:
+        assert time_ms > 0
+        await self.__send(['go', 'movetime', str(time_ms)])
+        return await self.__handle_bestmove_reply()
+
+
+    async def go_nodes(self, node_count: int) -> Tuple[str, List[List[str]]]:
+        assert node_count >= 1
+        await self.__send(['go', 'nodes', str(node_count)])
+        return await self.__handle_bestmove_reply()
+
+
+    async def isready(self) -> List[str]:
+        await self.__send(['isready'])
+        return await self.__recv()
+
+
+    async def position_fen(self, fen: Optional[List[str]]=None, moves: Optional[List[str]]=None) -> None:
+        send_args = ['position', 'fen']
+
+        if fen is not None:
+            send_args += fen
+
+        if moves is not None and len(moves) != 0:
+            send_args += ['moves'] + moves
+
+        await self.__send(send_args)
+
+
+    async def position_startpos(self, moves: Optional[List[str]]=None) -> None:
+        if moves is None or len(moves) == 0:
+            await self.__send(['position', 'startpos'])
+        else:
+            await self.__send(['position', 'startpos', 'moves'] + moves)
+
+
+    async def query_fen(self) -> List[str]:
+        await self.__send(['query', 'fen'])
+        return await self.__recv()
+
+
+    async def query_gameover(self) -> List[str]:
+        await self.__send(['query', 'gameover'])
+        return await self.__recv()
+
+
+    async def query_islegal(self, move: str) -> List[str]:
+        await self.__send(['query', 'islegal', move])
+        return await self.__recv()
+
+
+    async def query_p1turn(self) -> List[str]:
+        await self.__send(['query', 'p1turn'])
+        return await self.__recv()
+
+
+    async def query_result(self) -> List[str]:
+        await self.__send(['query', 'result'])
+        return await self.__recv()
+
+
+    async def setoption(self, name: str, value: str) -> None:
+        await self.__send(['setoption', 'name', name, 'value', value])
+
+
+    async def stop(self) -> None:
+        assert False, "AsyncUgiClient: stop: not implemented !"
+
+        await self.__send(['stop'])
+
+
+    async def ugi(self) -> None:
+        await self.__send(['ugi'])
+
+        while True:
+            reply = await self.__recv()
+
+            (reply_head, reply_tail) = (reply[0], reply[1:])
+
+            if reply_head == 'ugiok':
+                break
+
+            elif reply_head == 'id' and len(reply_tail) >= 2:
+
+                if reply_tail[0] == 'name':
+                    self.__server_name = ''.join(reply_tail[1:])
+
+                elif reply_tail[0] == 'author':
+                    self.__server_author = ''.join(reply_tail[1:])
+
+            elif reply_head == 'option' and len(reply_tail) >= 2 and reply_tail[0] == 'name':
+                option_props = reply_tail[2:]
+                self.__options[reply_tail[1]] = {key:val for (key, val) in zip(option_props[0::2], option_props[1::2])}
+
+
+    async def uginewgame(self) -> None:
+        await self.__send(['uginewgame'])
+
+
+async def play_async_ugi_game(white_client: AsyncUgiClient, black_client: AsyncUgiClient, max_depth: int,
+                              pijersi_state: Optional[rules.PijersiState]=None) -> Tuple[List[str], Tuple[rules.Reward, rules.Reward]]:
+    """Play one game between two prepared engines ; return the played action names and the rewards"""
+
+    pijersi_state = pijersi_state if pijersi_state is not None else rules.PijersiState()
+    clients = {rules.Player.T.WHITE: white_client, rules.Player.T.BLACK: black_client}
+    action_names = []
+
+    while not pijersi_state.is_terminal():
+        ugi_client = clients[pijersi_state.get_current_player()]
+
+        await ugi_client.position_fen(fen=pijersi_state.get_ugi_fen())
+        (best_ugi_action, _) = await ugi_client.go_depth(max_depth)
+
+        action = pijersi_state.get_action_by_ugi_name(best_ugi_action)
+        action_names.append(str(action))
+        pijersi_state = pijersi_state.take_action(action)
+
+    return (action_names, pijersi_state.get_rewards())
+
+
+async def play_async_ugi_games(server_executable_paths: Sequence[Tuple[str, str]], max_depth: int
+                               ) -> List[Tuple[List[str], Tuple[rules.Reward, rules.Reward]]]:
+    """Play concurrently one game per (white, black) pair of engine executables, from one process"""
 
-            self.__server_process = None
-            self.__channel = None
-            self.__running = False
-            self.__prepared = False
+    async def play_one_game(game_index: int, white_path: str, black_path: str):
+        white_client = AsyncUgiClient(name=f"white-{game_index}", server_executable_path=white_path)
+        black_client = AsyncUgiClient(name=f"black-{game_index}", server_executable_path=black_path)
 
+        try:
+            for ugi_client in (white_client, black_client):
+                await ugi_client.run()
+                await ugi_client.prepare()
 
-    def uginewgame(self):
-        self.__send(['uginewgame'])
+            return await play_async_ugi_game(white_client, black_client, max_depth)
 
+        finally:
+            await white_client.quit()
+            await black_client.quit()
 
-    def setoption(self, name: str, value: str):
-        self.__send(['setoption', 'name', name, 'value', value])
+    return await asyncio.gather(*(play_one_game(game_index, white_path, black_path)
+                                  for (game_index, (white_path, black_path)) in enumerate(server_executable_paths)))
 
 
-    def stop(self) -> str:
-        self.__log_error("stop: not implemented !")
-        assert False
+def make_pijersi_state_from_ugi_fen(fen: Sequence[str]) -> rules.PijersiState:
+    """State of the four tokens of a UGI fen, as returned by PijersiState.get_ugi_fen"""
 
-        self.__send(['stop'])
-        bestmove = self.__handle_bestmove_reply()
-        return bestmove
+    (fen_positions, player, half_move, full_move) = fen
+    half_move = int(half_move)
+    full_move = int(full_move)
 
+    pijersi_board_codes = rules.PijersiState.setup_from_ugi_fen(fen_positions)
 
-    def ugi(self):
-        self.__log_debug("ugi: ...")
-        self.__send(['ugi'])
+    if player == 'w':
+        pijersi_player = rules.Player.T.WHITE
 
-        while True:
-            reply = self.__recv()
-            self.__log_debug(f"ugi: reply {reply}")
+    elif player == 'b':
+        pijersi_player = rules.Player.T.BLACK
 
-            reply_head = reply[0]
-            reply_tail = reply[1:]
+    else:
+        assert player in ['w', 'b']
 
-            if reply_head == 'ugiok':
+    pijersi_credit = rules.PijersiState.get_max_credit() - half_move
 
-                if len(reply_tail) != 0:
-                    self.__log_info(f"ugi: ignoring extra tokens in reply '{reply}'")
-                break
+    pijersi_turn = 2*full_move
+    if pijersi_player == rules.Player.T.BLACK:
+        pijersi_turn += 1
 
-            elif reply_head == 'id':
+    return rules.PijersiState(board_codes=pijersi_board_codes,
+                              player=pijersi_player,
+                              credit=pijersi_credit,
+                              turn=pijersi_turn,
+                              setup=rules.Setup.T.GIVEN)
 
-                if len(reply) < 3:
-                    self.__log_info(f"ugi: expected at least 3 tokens ; ignoring reply '{reply}'")
-                    continue
 
-                elif reply_tail[0] == 'name':
-                    self.__server_name = ''.join(reply_tail[1:])
+# >> (UGI fen, depth) of the bench positions: classic and random setups, then middle games and near-terminal positions from the games folder
+BENCH_POSITIONS = (
+    ('s-p-r-s-p-r-/p-r-s-wwr-s-p-/6/7/6/P-S-R-WWS-R-P-/R-P-S-R-P-S- w 0 1', 2),
+    ('r-p-s-w-s-s-/w-r-s-prp-p-r-/6/7/6/R-P-P-PRS-R-W-/S-S-W-S-P-R- w 0 1', 2),
+    ('r-r-s-s-p-w-/r-r-p-wps-p-s-/6/7/6/R-P-P-PRS-R-W-/S-S-W-S-P-R- w 0 1', 2),
+    ('r-p-w-s-w-r-/r-p-s-spr-p-s-/6/7/6/P-R-R-WSR-S-W-/P-R-P-S-S-P- w 0 1', 2),
+    ('s-1r-1p-1/2w-1r-2/2w-1p-s-/3W-r-2/2WS1SPP-/2P-4/R-P-S-R-2 w 2 11', 3),
+    ('s-5/4wr2/2w-prS-1/3W-s-2/3S-W-1/2P-4/R-P-S-R-2 b 0 15', 3),
+    ('s-4rp/p-1s-r-p-wwr-/1r-2P-S-/1PR3P-1/6/1S-R-WW3/1P-S-3 w 4 11', 2),
+    ('s-4rp/p-1s-r-p-wwr-/1r-4/1PR2PSP-1/6/1S-R-WW3/1P-S-3 b 17 17', 2),
+    ('3s-w-s-/1p-r-2p-r-/w-R-4/3SSp-2/6/5P-W-/1W-S-R-1P- w 0 11', 3),
+    ('2w-3/2r-3s-/w-p-4/3rs3/3p-1W-/3R-3/6 w 6 21', 3),
+    ('1w-4/2r-W-2s-/w-p-4/3rs3/3p-2/7/2R-3 b 17 26', 3),
+    )
 
-                elif reply_tail[0] == 'author':
-                    self.__server_author = ''.join(reply_tail[1:])
 
-                else:
-                    self.__log_info(f"ugi: unexpected token '{reply_tail[0]}' ; ignoring reply '{reply}'")
-                    continue
+def run_bench(depth: Optional[int]=None, report=None) -> Mapping[str, Any]:
+    """Search the bench positions at their depths, or all at the given depth, and count the nodes
 
-            elif reply_head == 'info':
-                self.__log_debug(f"ugi: '{reply}'")
+    The signature is a CRC32 of the node counts and best moves: it changes with any functional change
+    of the search, whereas nodes/second measures its speed. The report function receives one line per position.
+    """
 
-            elif reply_head == 'option':
+    total_node_count = 0
+    total_duration = 0
+    signature = 0
 
-                if len(reply_tail) < 2 or reply_tail[0] != 'name':
-                    self.__log_debug(f"ugi: cannot find/match token 'name' ; ignoring reply '{reply}'")
-                    continue
+    for (position_index, (fen, position_depth)) in enumerate(BENCH_POSITIONS):
+        pijersi_state = make_pijersi_state_from_ugi_fen(fen.split())
+        search_depth = depth if depth is not None else position_depth
 
-                option_name = reply_tail[1]
-                option_props = reply_tail[2:]
+        # >> the searcher breaks ties at random
+        random_state = random.getstate()
+        random.seed(position_index)
 
-                if len(option_props) % 2 != 0:
-                    self.__log_info(f"ugi: cannot pair property tokens ; ignoring reply '{reply}'")
-                    continue
+        searcher = rules.MinimaxSearcher(f"bench-minimax{search_depth}", max_depth=search_depth)
 
-                option_prop_keys = option_props[0::2]
-                option_prop_vals = option_props[1::2]
-                self.__options[option_name] = {key:val for (key, val) in zip(option_prop_keys, option_prop_vals)}
+        search_start = time.perf_counter()
+        action = searcher.search(pijersi_state, use_opening_file=False)
+        search_duration = time.perf_counter() - search_start
 
-            else:
-                self.__log_info(f"ugi: unexpected head '{reply_head}' ; ignoring reply '{reply}'")
-                continue
+        random.setstate(random_state)
 
-        self.__log_debug(f"ugi: server_name = '{self.__server_name}' ; server_author = '{self.__server_author}'")
-        self.__log_debug(f"ugi: options = '{self.__options}'")
+        node_count = searcher.get_node_count()
+        bestmove = pijersi_state.to_ugi_name(action)
 
-        self.__log_debug("ugi: done")
+        total_node_count += node_count
+        total_duration += search_duration
+        signature = zlib.crc32(f"{node_count} {bestmove};".encode(), signature)
+
+        if report is not None:
+            report(f"position {position_index + 1}/{len(BENCH_POSITIONS)} depth {search_depth} nodes {node_count} bestmove {bestmove}" +
+                   f" time {search_duration*1_000:.0f}")
+
+    return dict(nodes=total_node_count,
+                signature=f"{signature:08x}",
+                time=total_duration,
+                nps=round(total_node_count/total_duration) if total_duration > 0 else 0)
 
 
 class UgiServer:
 
     __slots__ = ('__channel', '__running', '__debugging',
                  '__server_name', '__server_author', '__options', '__option_converters',
-                 '__pijersi_state')
+                 '__pijersi_state', '__position_base', '__position_moves', '__searchers', '__analysis_cache', '__ponderer')
 
-    def __init__(self, channel: UgiChannel):
+    def __init__(self, channel: UgiChannel, analysis_cache: Optional[AnalysisCache]=None):
         self.__channel = channel
         self.__running = False
 
+        # >> optional cache of analyses, shared with the other sessions and tools
+        self.__analysis_cache = analysis_cache
+
         self.__debugging = False
 
         self.__server_name = 'cmalo'
@@ -438,8 +1188,21 @@ class UgiServer:
         self.__options['depth'] = 2
         self.__option_converters['depth'] = int
 
+        self.__options['ponder'] = False
+        self.__option_converters['ponder'] = lambda value: value == 'true'
+
         self.__pijersi_state = None
 
+        # >> the last 'position' command, as its base tokens and its moves, plus the moves played by 'go manual'
+        self.__position_base = None
+        self.__position_moves = []
+
+        # >> searchers and their caches are kept for the game, until 'uginewgame'
+        self.__searchers = {}
+
+        # >> with the 'ponder' option, the reply predicted after each 'bestmove' is searched until the next command 'go'
+        self.__ponderer = rules.Ponderer()
+
 
     def __log(self, message: str, category=''):
         for line in message.split('\n'):
@@ -485,8 +1248,14 @@ class UgiServer:
             commands['ugi'] = self.__ugi
             commands['uginewgame'] = self.__uginewgame
 
+            # >> extension of the protocol
+            commands['bench'] = self.__bench
+
             while self.__running:
-                data = self.__recv()
+                try:
+                    data = self.__recv()
+                except EOFError:
+                    break
 
                 cmd_name = data[0]
                 cmd_args = data[1:]
@@ -503,6 +1272,31 @@ class UgiServer:
 
     def terminate(self) -> None:
         self.__running = False
+        self.__ponderer.stop()
+
+
+    def __get_searcher(self, searcher_key: tuple, make_searcher) -> rules.Searcher:
+        if searcher_key not in self.__searchers:
+            searcher = make_searcher()
+            searcher.set_analysis_cache(self.__analysis_cache)
+            self.__searchers[searcher_key] = searcher
+        return self.__searchers[searcher_key]
+
+
+    def __search(self, searcher: rules.Searcher) -> rules.PijersiAction:
+        """Search the current state, unless it has been pondered by the same searcher, and ponder the expected reply"""
+
+        action = self.__ponderer.take(searcher, self.__pijersi_state)
+
+        if action is None:
+            action = searcher.search(self.__pijersi_state)
+
+        self.__log_debug(f"__search: ponder {self.__ponderer.get_stats()}")
+
+        if self.__options['ponder']:
+            self.__ponderer.start(searcher, self.__pijersi_state, action)
+
+        return action
 
 
     def __go(self, args: List[str]) -> None:
@@ -521,13 +1315,32 @@ class UgiServer:
             move = args[1]
             new_pijersi_state = self.__pijersi_state.take_action_by_ugi_name(move)
             self.__pijersi_state = new_pijersi_state
+            self.__position_moves.append(move)
 
         elif args[0] == 'depth':
             depth = int(args[1])
-            searcher = rules.MinimaxSearcher(f"minimax{depth}-inf", max_depth=depth)
+            searcher = self.__get_searcher(('depth', depth),
+                                           lambda: rules.MinimaxSearcher(f"minimax{depth}-inf", max_depth=depth,
+                                                                         persistent_evaluations=True))
 
-            action = searcher.search(self.__pijersi_state)
+            action = self.__search(searcher)
+            bestmove = self.__pijersi_state.to_ugi_name(action)
+            self.__send(['info', 'depth', str(depth), 'nodes', str(searcher.get_node_count())])
+            self.__send(['bestmove', bestmove])
+
+        elif args[0] == 'nodes':
+            node_limit = int(args[1])
+
+            # >> iterative deepening up to the fixed depth 4, the upper bound advertised for the 'depth' option,
+            # >> and stopped by the node budget ; the value of the 'depth' option is ignored, so that the budget alone sets the strength
+            depth = 4
+            searcher = self.__get_searcher(('nodes', node_limit),
+                                           lambda: rules.MinimaxSearcher(f"minimax{depth}-nodes{node_limit}", max_depth=depth,
+                                                                         node_limit=node_limit, persistent_evaluations=True))
+
+            action = self.__search(searcher)
             bestmove = self.__pijersi_state.to_ugi_name(action)
+            self.__send(['info', 'nodes', str(searcher.get_node_count())])
             self.__send(['bestmove', bestmove])
 
         elif args[0] == 'movetime':
@@ -546,6 +1359,9 @@ class UgiServer:
 
             searcher = rules.MinimaxSearcher(f"minimax{depth}-{time_s:.0f}s", max_depth=depth, time_limit=time_s)
 
+            # >> the time-limited search runs in other processes, which cannot be aborted, so it never ponders
+            self.__ponderer.stop()
+
             action = searcher.search(self.__pijersi_state)
             bestmove = self.__pijersi_state.to_ugi_name(action)
             self.__send(['bestmove', bestmove])
@@ -571,7 +1387,7 @@ class UgiServer:
             return
 
         if args[0] == 'startpos':
-            self.__pijersi_state = rules.PijersiState()
+            position_base = ('startpos',)
 
             if len(args) >= 2:
                 if args[1] != 'moves':
@@ -579,11 +1395,7 @@ class UgiServer:
                     self.terminate()
                     return
 
-                moves = args[2:]
-                for move in moves:
-                    new_pijersi_state = self.__pijersi_state.take_action_by_ugi_name(move)
-                    self.__pijersi_state = new_pijersi_state
-
+            moves = args[2:]
 
         elif args[0] == 'fen':
 
@@ -594,50 +1406,43 @@ class UgiServer:
                 fen = args[1:]
                 moves = []
 
-            if len(fen) == 0:
-                self.__pijersi_state = rules.PijersiState()
-            else:
+            if len(fen) != 0 and len(fen) != 4:
+                self.__log_error(f"""missing 'fen' tokens in 'position {" ".join(args)}' ; UGI server terminates itself !""")
+                self.terminate()
+                return
 
-                if len(fen) != 4:
-                    self.__log_error(f"""missing 'fen' tokens in 'position {" ".join(args)}' ; UGI server terminates itself !""")
-                    self.terminate()
-                    return
+            position_base = ('startpos',) if len(fen) == 0 else ('fen', *fen)
 
-                fen_positions = fen[0]
-                player = fen[1]
-                half_move = int(fen[2])
-                full_move = int(fen[3])
+        else:
+            self.__log_error(f"""unexpected argument '{args[0]}' in 'position {" ".join(args)}' ; UGI server terminates itself !""")
+            self.terminate()
+            return
 
-                pijersi_board_codes = rules.PijersiState.setup_from_ugi_fen(fen_positions)
+        previous_moves = self.__position_moves
 
-                if player == 'w':
-                    pijersi_player = rules.Player.T.WHITE
+        # >> when the moves extend the previous ones, from the same base, only the new moves are played
+        if (self.__pijersi_state is not None and position_base == self.__position_base and
+            len(moves) >= len(previous_moves) and moves[:len(previous_moves)] == previous_moves):
+            new_moves = moves[len(previous_moves):]
 
-                elif player == 'b':
-                    pijersi_player = rules.Player.T.BLACK
+        else:
+            self.__pijersi_state = self.__make_base_state(position_base)
+            new_moves = moves
 
-                else:
-                    assert player in ['w', 'b']
+        for move in new_moves:
+            new_pijersi_state = self.__pijersi_state.take_action_by_ugi_name(move)
+            self.__pijersi_state = new_pijersi_state
 
-                pijersi_credit = self.__pijersi_state.get_max_credit() - half_move
+        self.__position_base = position_base
+        self.__position_moves = list(moves)
 
-                pijersi_turn = 2*full_move
-                if pijersi_player == rules.Player.T.BLACK:
-                    pijersi_turn += 1
 
-                self.__pijersi_state = rules.PijersiState(board_codes=pijersi_board_codes,
-                                                          player=pijersi_player,
-                                                          credit=pijersi_credit,
-                                                          turn=pijersi_turn,
-                                                          setup=rules.Setup.T.GIVEN)
-            for move in moves:
-                new_pijersi_state = self.__pijersi_state.take_action_by_ugi_name(move)
-                self.__pijersi_state = new_pijersi_state
+    def __make_base_state(self, position_base: Tuple[str, ...]) -> rules.PijersiState:
 
-        else:
-            self.__log_error(f"""unexpected argument '{args[0]}' in 'position {" ".join(args)}' ; UGI server terminates itself !""")
-            self.terminate()
-            return
+        if position_base[0] == 'startpos':
+            return rules.PijersiState()
+
+        return make_pijersi_state_from_ugi_fen(position_base[1:])
 
 
     def __query(self, args: List[str]) -> None:
@@ -713,12 +1518,7 @@ class UgiServer:
                 self.terminate()
                 return
 
-            if self.__pijersi_state.is_terminal():
-                legal_moves = []
-            else:
-                legal_moves = self.__pijersi_state.get_action_ugi_names()
-
-            if move in legal_moves:
+            if not self.__pijersi_state.is_terminal() and self.__pijersi_state.parse_action_ugi_name(move) is not None:
                 self.__send(['true'])
             else:
                 self.__send(['false'])
@@ -759,6 +1559,9 @@ class UgiServer:
             else:
                 self.__options[option_name] = self.__option_converters[option_name](option_value)
 
+                if not self.__options['ponder']:
+                    self.__ponderer.stop()
+
         self.__log_debug(f"__setoption: __options = {self.__options}")
 
 
@@ -776,37 +1579,93 @@ class UgiServer:
                                'min', '1',
                                'max', '4'])
 
+        self.__send(['option', 'name', 'ponder',
+                               'type', 'check',
+                               'default', 'false'])
+
         self.__send(['ugiok'])
 
 
+    def __bench(self, args: List[str]) -> None:
+
+        depth = None
+
+        if len(args) == 2 and args[0] == 'depth':
+            depth = int(args[1])
+
+        elif len(args) != 0:
+            self.__log_info(f"""ignoring extra tokens in command 'bench {" ".join(args)}'""")
+
+        # >> the pondering would disturb the measure
+        self.__ponderer.stop()
+
+        bench = run_bench(depth=depth, report=lambda line: self.__send(['info', 'string'] + line.split()))
+
+        self.__send(['bench', 'nodes', str(bench['nodes']), 'signature', bench['signature'],
+                              'time', str(round(bench['time']*1_000)), 'nps', str(bench['nps'])])
+
+
     def __uginewgame(self, args: List[str]) -> None:
 
         if len(args) != 0:
             self.__log_info(f"""ignoring extra tokens in command 'uginewgame {" ".join(args)}'""")
 
+        self.__ponderer.stop()
+
         self.__pijersi_state = rules.PijersiState()
+        self.__position_base = ('startpos',)
+        self.__position_moves = []
+        self.__searchers = {}
 
 
 class UgiSearcher(rules.Searcher):
 
-    __slots__ = ('__ugi_client', '__ugi_permanent', '__max_depth')
+    __slots__ = ('__ugi_client', '__ugi_permanent', '__max_depth', '__node_limit', '__node_count')
 
 
-    def __init__(self, name: str, ugi_client: UgiClient, max_depth: int=None, time_limit: Optional[float]=None, clock_fraction: Optional[float]=None):
-        super().__init__(name=name, time_limit=time_limit, clock_fraction=clock_fraction)
+    def __init__(self, name: str, ugi_client: UgiClient, max_depth: int=None, time_limit: Optional[float]=None, clock_fraction: Optional[float]=None,
+                 node_limit: Optional[int]=None, time_manager: Optional[rules.TimeManager]=None):
+        super().__init__(name=name, time_limit=time_limit, clock_fraction=clock_fraction, time_manager=time_manager)
 
         self.__ugi_client = ugi_client
         self.__ugi_permanent = self.__ugi_client.is_permanent()
 
-        assert max_depth is None or time_limit is None
-        assert not (max_depth is None and time_limit is None)
+        assert [max_depth, time_limit, node_limit].count(None) == 2
         self.__max_depth = max_depth
+        self.__node_limit = node_limit
+        self.__node_count = None
+
+
+    @staticmethod
+    def extract_node_count(infos: List[List[str]]) -> Optional[int]:
+        """extract the last "nodes" from "infos" """
+        node_count = None
+        for info in infos:
+            # example: ['info', 'depth', '2', 'nodes', '1234']
+            for (token, next_token) in zip(info[:-1], info[1:]):
+                if token == 'nodes':
+                    node_count = int(next_token)
+        return node_count
+
+
+    def get_node_limit(self) -> Optional[int]:
+        return self.__node_limit
+
+
+    def get_node_count(self) -> Optional[int]:
+        return self.__node_count
 
 
     def get_max_depth(self) -> Optional[int]:
         return self.__max_depth
 
 
+    def get_analysis_budget(self) -> str:
+        # >> the engine executable, whose name tells its version, is part of the budget
+        engine = os.path.basename(self.__ugi_client.get_server_executable_path())
+        return f"engine={engine};depth={self.__max_depth};time={self.get_time_limit()};nodes={self.__node_limit}"
+
+
     def get_ugi_client(self) -> UgiClient:
         return self.__ugi_client
 
@@ -837,11 +1696,16 @@ class UgiSearcher(rules.Searcher):
 
         time_limit = self.get_time_limit()
 
-        if time_limit is not None:
-            (ugi_action, _) = self.__ugi_client.go_movetime_and_wait(round(time_limit*1_000))
+        if self.__node_limit is not None:
+            (ugi_action, infos) = self.__ugi_client.go_nodes_and_wait(self.__node_limit)
+
+        elif time_limit is not None:
+            (ugi_action, infos) = self.__ugi_client.go_movetime_and_wait(round(time_limit*1_000))
 
         elif self.__max_depth is not None:
-            (ugi_action, _) = self.__ugi_client.go_depth_and_wait(self.__max_depth)
+            (ugi_action, infos) = self.__ugi_client.go_depth_and_wait(self.__max_depth)
+
+        self.__node_count = self.extract_node_count(infos)
 
         if False:
             log(f"debug: answer of UGI agent ; action: {ugi_action}")
@@ -854,17 +1718,114 @@ class UgiSearcher(rules.Searcher):
         return action
 
 
+class NatselCalibrationCache:
+    """JSON file of the calibration scores of NatselSearcher, by engine executable and search budget
+
+    The executable is identified by its path, size and modification time, so that a new version
+    of the engine never reuses the scores of the previous one.
+    The writers, of any thread or process, are serialized by a lock file and merge their entry
+    into the ones already written ; the readers only see whole files.
+    """
+
+    __slots__ = ('__path',)
+
+    # >> a lock file older than this delay is left by a dead writer
+    __LOCK_TIMEOUT = 5.
+
+
+    def __init__(self, path: str):
+        self.__path = path
+
+
+    @staticmethod
+    def make_key(server_executable_path: str, budget: str) -> str:
+        server_executable_path = os.path.abspath(server_executable_path)
+        executable_stat = os.stat(server_executable_path)
+        return f"{server_executable_path}|{executable_stat.st_size}|{executable_stat.st_mtime_ns}|{budget}"
+
+
+    def __read(self) -> Mapping[str, Mapping[str, float]]:
+        try:
+            with open(self.__path, 'r') as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+
+
+    def get(self, key: str) -> Optional[Mapping[str, float]]:
+        return self.__read().get(key)
+
+
+    def put(self, key: str, scores: Mapping[str, float]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.__path))
+        os.makedirs(directory, exist_ok=True)
+
+        lock_fd = self.__acquire_lock()
+        try:
+            # >> read under the lock, so that the entries written meanwhile by other writers are kept
+            entries = self.__read()
+            entries[key] = dict(scores)
+
+            # >> write then rename, so that concurrent readers never see a partial file
+            (temporary_fd, temporary_path) = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(temporary_fd, 'w') as cache_file:
+                    json.dump(entries, cache_file, indent=1, sort_keys=True)
+                os.replace(temporary_path, self.__path)
+
+            except OSError:
+                if os.path.exists(temporary_path):
+                    os.remove(temporary_path)
+                raise
+
+        finally:
+            self.__release_lock(lock_fd)
+
+
+    def __acquire_lock(self) -> int:
+        lock_path = self.__path + ".lock"
+        lock_start = time.time()
+
+        while True:
+            try:
+                return os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+
+            except FileExistsError:
+                if time.time() - lock_start > NatselCalibrationCache.__LOCK_TIMEOUT:
+                    try:
+                        os.remove(lock_path)
+                    except FileNotFoundError:
+                        pass
+                else:
+                    time.sleep(0.01)
+
+
+    def __release_lock(self, lock_fd: int) -> None:
+        os.close(lock_fd)
+        os.remove(self.__path + ".lock")
+
+
+NATSEL_CALIBRATION_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".pijersi-certu", "natsel-calibration.json")
+
+
 class NatselSearcher(UgiSearcher):
 
-    __slots__ = ('__ugi_client', '__ugi_permanent', '__win_score', '__loss_score', '__draw_score', '__small_score', '__a1', '__a2', '__b1', '__b2')
+    __slots__ = ('__ugi_client', '__ugi_permanent', '__calibration_cache',
+                 '__win_score', '__loss_score', '__draw_score', '__small_score', '__a1', '__a2', '__b1', '__b2')
 
 
-    def __init__(self, name: str, ugi_client: str, max_depth: int=None, time_limit: Optional[float]=None, clock_fraction: Optional[float]=None):
-        super().__init__(name=name, ugi_client=ugi_client, max_depth=max_depth, time_limit=time_limit, clock_fraction=clock_fraction)
+    def __init__(self, name: str, ugi_client: str, max_depth: int=None, time_limit: Optional[float]=None, clock_fraction: Optional[float]=None,
+                 node_limit: Optional[int]=None, calibration_cache_path: Optional[str]=NATSEL_CALIBRATION_CACHE_PATH,
+                 time_manager: Optional[rules.TimeManager]=None):
+        super().__init__(name=name, ugi_client=ugi_client, max_depth=max_depth, time_limit=time_limit, clock_fraction=clock_fraction,
+                         node_limit=node_limit, time_manager=time_manager)
 
         self.__ugi_client = self.get_ugi_client()
         self.__ugi_permanent = self.__ugi_client.is_permanent()
 
+        # >> None disables the on-disk cache of the calibration scores
+        self.__calibration_cache = NatselCalibrationCache(calibration_cache_path) if calibration_cache_path is not None else None
+
         self.__win_score = None
         self.__loss_score = None
         self.__draw_score = None
@@ -876,6 +1837,58 @@ class NatselSearcher(UgiSearcher):
         self.__b2 = None
 
 
+    def __get_calibration_key(self) -> str:
+        time_limit = self.get_time_limit()
+        max_depth = self.get_max_depth()
+        node_limit = self.get_node_limit()
+
+        # >> same precedence as in __evaluate_state_score
+        if node_limit is not None:
+            budget = f"nodes={node_limit}"
+
+        elif time_limit is not None:
+            budget = f"time={time_limit}"
+
+        else:
+            budget = f"depth={max_depth}"
+
+        return NatselCalibrationCache.make_key(self.__ugi_client.get_server_executable_path(), budget)
+
+
+    def __load_calibration(self) -> bool:
+        """Load the calibration scores from the cache ; return False when they are missing"""
+
+        if self.__calibration_cache is None:
+            return False
+
+        try:
+            scores = self.__calibration_cache.get(self.__get_calibration_key())
+        except OSError:
+            return False
+
+        if scores is None:
+            return False
+
+        self.__win_score = scores['win']
+        self.__loss_score = scores['loss']
+        self.__draw_score = scores['draw']
+        self.__small_score = scores['small']
+        return True
+
+
+    def __save_calibration(self) -> None:
+
+        if self.__calibration_cache is None:
+            return
+
+        scores = dict(win=self.__win_score, loss=self.__loss_score, draw=self.__draw_score, small=self.__small_score)
+
+        try:
+            self.__calibration_cache.put(self.__get_calibration_key(), scores)
+        except OSError as error:
+            log(f"NatselSearcher: calibration not cached: {error}")
+
+
     def __init_transform_score(self):
 
         if self.__a1 is None or self.__a2 is None or self.__b1 is None or self.__b2 is None:
@@ -1027,11 +2040,15 @@ class NatselSearcher(UgiSearcher):
 
         time_limit = self.get_time_limit()
         max_depth = self.get_max_depth()
+        node_limit = self.get_node_limit()
 
         fen = state.get_ugi_fen()
         self.__ugi_client.position_fen(fen=fen)
 
-        if time_limit is not None:
+        if node_limit is not None:
+            (best_ugi_action, infos) = self.__ugi_client.go_nodes_and_wait(node_limit)
+
+        elif time_limit is not None:
             (best_ugi_action, infos) = self.__ugi_client.go_movetime_and_wait(time_limit*1_000)
 
         elif max_depth is not None:
@@ -1048,7 +2065,33 @@ class NatselSearcher(UgiSearcher):
         return score
 
 
+    def __search_action_score(self, ugi_client: UgiClient, fen: List[str], ugi_action: str,
+                              search_budget: Tuple[str, int]) -> float:
+        """Score of the position reached by the action, from the point of view of its player to move"""
+
+        (go_method_name, go_argument) = search_budget
+
+        ugi_client.position_fen(fen=fen)
+        ugi_client.go_manual(ugi_action)
+        (_, infos) = getattr(ugi_client, go_method_name)(go_argument)
+
+        score = self.__extract_score(infos)
+        assert score is not None
+        return score
+
+
     def evaluate_actions(self, state: rules.PijersiState) -> Mapping[rules.PijersiAction, float]:
+
+        evaluated_actions = self.load_cached_evaluations(state)
+
+        if evaluated_actions is None:
+            evaluated_actions = self.__evaluate_actions(state)
+            self.save_cached_evaluations(state, evaluated_actions)
+
+        return evaluated_actions
+
+
+    def __evaluate_actions(self, state: rules.PijersiState) -> Mapping[rules.PijersiAction, float]:
         evaluated_actions = {}
 
         if not self.__ugi_permanent or not self.__ugi_client.is_running():
@@ -1057,20 +2100,27 @@ class NatselSearcher(UgiSearcher):
         if not self.__ugi_client.is_prepared():
             self.__ugi_client.prepare()
 
+        calibration_is_new = self.__a1 is None and not self.__load_calibration()
+
         win_score = self.__evaluate_win_score()
         loss_score = self.__evaluate_loss_score()
         draw_score = self.__evaluate_draw_score()
 
         self.__init_transform_score()
 
+        if calibration_is_new:
+            self.__save_calibration()
+
         time_limit = self.get_time_limit()
         max_depth = self.get_max_depth()
+        node_limit = self.get_node_limit()
 
         fen = state.get_ugi_fen()
         player = state.get_current_player()
         other_player = state.get_other_player()
 
         actions = state.get_actions()
+        searched_actions = []
 
         for action in actions:
 
@@ -1092,22 +2142,41 @@ class NatselSearcher(UgiSearcher):
                 evaluated_actions[str(action)] = score
 
             else:
-                self.__ugi_client.position_fen(fen=fen)
-                ugi_action = state.to_ugi_name(action)
-                self.__ugi_client.go_manual(ugi_action)
+                searched_actions.append(action)
+
+        # >> a pooled client spreads the searches over the engines of its pool
+        if isinstance(self.__ugi_client, UgiPooledClient):
+            engine_count = max(1, min(self.__ugi_client.get_engine_size(), len(searched_actions)))
+        else:
+            engine_count = 1
+
+        if node_limit is not None:
+            # >> (.../len(actions) because one iterates on actions
+            search_budget = ('go_nodes_and_wait', max(1, node_limit//len(actions)))
 
-                if time_limit is not None:
-                    # >> (.../len(actions) because one iterates on actions
-                    (best_ugi_action, infos) = self.__ugi_client.go_movetime_and_wait(round(time_limit*1_000/len(actions)))
+        elif time_limit is not None:
+            # >> (.../len(actions) because one iterates on actions
+            # >> (engine_count*...) because the engines share the time limit by running at the same time
+            search_budget = ('go_movetime_and_wait', round(engine_count*time_limit*1_000/len(actions)))
 
-                elif max_depth is not None:
-                    # >> (max_depth - 1) because one iterates on actions
-                    (best_ugi_action, infos) = self.__ugi_client.go_depth_and_wait(max_depth - 1)
+        elif max_depth is not None:
+            # >> (max_depth - 1) because one iterates on actions
+            search_budget = ('go_depth_and_wait', max_depth - 1)
 
-                score = self.__extract_score(infos)
-                assert score is not None
+        if engine_count == 1:
+            for action in searched_actions:
+                score = self.__search_action_score(self.__ugi_client, fen, state.to_ugi_name(action), search_budget)
                 evaluated_actions[str(action)] = -score
 
+        else:
+            with ThreadPoolExecutor(max_workers=engine_count) as executor:
+                futures = {executor.submit(self.__search_action_score, self.__ugi_client.make_sibling(),
+                                           fen, state.to_ugi_name(action), search_budget): action
+                           for action in searched_actions}
+
+                for future in as_completed(futures):
+                    evaluated_actions[str(futures[future])] = -future.result()
+
         if not self.__ugi_permanent:
             self.__ugi_client.quit()
 
@@ -1122,12 +2191,17 @@ class NatselSearcher(UgiSearcher):
         return evaluated_actions
 
 
-def make_ugi_server_process(server_executable_path: str) -> Tuple[Popen, UgiChannel]:
+def make_ugi_server_args(server_executable_path: str) -> List[str]:
 
     if server_executable_path.endswith(".py"):
-        popen_args = [sys.executable, server_executable_path]
+        return [sys.executable, server_executable_path]
     else:
-        popen_args = [server_executable_path]
+        return [server_executable_path]
+
+
+def make_ugi_server_process(server_executable_path: str) -> Tuple[Popen, UgiChannel]:
+
+    popen_args = make_ugi_server_args(server_executable_path)
 
     server_process = Popen(args=popen_args,
                            shell=False,
@@ -1139,14 +2213,86 @@ def make_ugi_server_process(server_executable_path: str) -> Tuple[Popen, UgiChan
     return (server_process, server_channel)
 
 
-def run_ugi_server_implementation() -> None:
+def parse_ugi_server_address(server_address: str) -> Optional[Tuple[int, Any]]:
+    """(socket family, socket address) of 'tcp:HOST:PORT' or 'unix:PATH' ; None for an executable path"""
+
+    if server_address.startswith('tcp:'):
+        (host, port) = server_address[len('tcp:'):].rsplit(':', 1)
+        return (socket.AF_INET, (host, int(port)))
+
+    elif server_address.startswith('unix:'):
+        return (socket.AF_UNIX, server_address[len('unix:'):])
+
+    return None
+
+
+def connect_ugi_server(server_address: str) -> socket.socket:
+    (socket_family, socket_address) = parse_ugi_server_address(server_address)
+
+    connection = socket.socket(socket_family, socket.SOCK_STREAM)
+    connection.connect(socket_address)
+    return connection
+
+
+class UgiSessionHandler(socketserver.BaseRequestHandler):
+    """One UGI session of a socket server, with its own UgiServer, so its own position, options and searchers"""
+
+    def handle(self):
+        server = UgiServer(channel=UgiChannel.make_socket_channel(self.request), analysis_cache=self.server.analysis_cache)
+        server.run()
+
+
+class ThreadingUgiTcpServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+
+    class ThreadingUgiUnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+def make_ugi_socket_server(server_address: str, analysis_cache: Optional[AnalysisCache]=None) -> socketserver.BaseServer:
+    """Socket server accepting concurrent UGI sessions at 'tcp:HOST:PORT' or 'unix:PATH'
+
+    The sessions are threads of the same process, so that the rules tables, and the optional cache of analyses,
+    are shared by all of them.
+    """
+
+    (socket_family, socket_address) = parse_ugi_server_address(server_address)
+
+    if socket_family == socket.AF_UNIX:
+        if os.path.exists(socket_address):
+            os.remove(socket_address)
+        socket_server = ThreadingUgiUnixServer(socket_address, UgiSessionHandler)
+
+    else:
+        socket_server = ThreadingUgiTcpServer(socket_address, UgiSessionHandler)
+
+    socket_server.analysis_cache = analysis_cache
+    return socket_server
+
+
+def run_ugi_socket_server(server_address: str, analysis_cache: Optional[AnalysisCache]=None) -> None:
+
+    with make_ugi_socket_server(server_address, analysis_cache=analysis_cache) as socket_server:
+        log(f"UGI socket server listening at {server_address}")
+
+        try:
+            socket_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+def run_ugi_server_implementation(analysis_cache: Optional[AnalysisCache]=None) -> None:
 
     if False:
         log()
         log(f"Hello from PIJERSI-CMALO-UGI-SERVER-v{rules.__version__}")
 
     server_channel = UgiChannel.make_std_channel()
-    server = UgiServer(channel=server_channel)
+    server = UgiServer(channel=server_channel, analysis_cache=analysis_cache)
     server.run()
 
     if False:
@@ -1159,7 +2305,28 @@ if __name__ == "__main__":
     # >> otherwise when starting another process by "PoolExecutor" a second GUI windows is created
     freeze_support()
 
-    run_ugi_server_implementation()
+    parser = argparse.ArgumentParser(description="UGI server of the cmalo engine ; without argument, one session over stdin/stdout")
+    parser.add_argument('--tcp', metavar='HOST:PORT', help="serve concurrent sessions over a TCP socket")
+    parser.add_argument('--unix', metavar='PATH', help="serve concurrent sessions over a Unix socket")
+    parser.add_argument('--bench', action='store_true', help="search the bench positions and print nodes, signature and nodes/second")
+    parser.add_argument('--bench-depth', type=int, metavar='DEPTH', help="search all the bench positions at this depth")
+    parser.add_argument('--analysis-cache', metavar='PATH', help="sqlite file of analyses, consulted before each search")
+    args = parser.parse_args()
+
+    analysis_cache = AnalysisCache(args.analysis_cache) if args.analysis_cache is not None else None
+
+    if args.bench:
+        bench = run_bench(depth=args.bench_depth, report=print)
+        print(f"nodes {bench['nodes']} signature {bench['signature']} time {bench['time']*1_000:.0f} ms nps {bench['nps']}")
+
+    elif args.tcp is not None:
+        run_ugi_socket_server(f"tcp:{args.tcp}", analysis_cache=analysis_cache)
+
+    elif args.unix is not None:
+        run_ugi_socket_server(f"unix:{args.unix}", analysis_cache=analysis_cache)
+
+    else:
+        run_ugi_server_implementation(analysis_cache=analysis_cache)
 
     sys.exit()
 
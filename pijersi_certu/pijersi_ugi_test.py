@@ -16,10 +16,15 @@ This program is distributed in the hope that it will be useful, but WITHOUT ANY
 You should have received a copy of the GNU General Public License along with this program. If not, see <http://www.gnu.org/licenses>.
 """
 
+import asyncio
+import json
 import os
 import platform
 import re
 import sys
+import tempfile
+import threading
+import zlib
 
 from multiprocessing import freeze_support
 import multiprocessing
@@ -28,7 +33,19 @@ _package_home = os.path.abspath(os.path.dirname(__file__))
 sys.path.append(_package_home)
 
 
+from pijersi_ugi import BENCH_POSITIONS
+from pijersi_ugi import AsyncUgiClient
+from pijersi_ugi import NatselCalibrationCache
+from pijersi_ugi import NatselSearcher
 from pijersi_ugi import UgiClient
+from pijersi_ugi import UgiPooledClient
+from pijersi_ugi import UgiSearcher
+from pijersi_ugi import make_ugi_socket_server
+from pijersi_ugi import run_bench
+from pijersi_ugi import play_async_ugi_games
+from pijersi_ugi import start_ugi_engine_pool
+from pijersi_rules import MinimaxSearcher
+from pijersi_rules import PijersiState
 from pijersi_rules import __version__ as cmalo_version
 
 
@@ -111,6 +128,16 @@ def test_ugi_protocol():
         fen = client.query_fen()
         assert fen == ['s-p-r-s-2/p-r-s-wwr-pr1/6/4RS2/5P-/P-S-R-WWS-2/R-P-S-R-P-1', 'w', '1', '3']
 
+        # >> positions extending the previous moves, then going back
+        client.position_startpos(['b7c6', 'f7f6d5'])
+        assert client.query_fen() == ['s-p-r-s-p-r-/p-r-s-wwr-2/6/4sp2/5P-/P-S-R-WWS-R-1/R-P-S-R-P-S-', 'w', '2', '2']
+
+        client.position_startpos(['b7c6', 'f7f6d5', 'a6b6d5', 'g6g5f6'])
+        assert client.query_fen() == ['s-p-r-s-2/p-r-s-wwr-pr1/6/4RS2/5P-/P-S-R-WWS-2/R-P-S-R-P-1', 'w', '1', '3']
+
+        client.position_startpos(['b7c6'])
+        assert client.query_fen() == ['s-p-r-s-p-r-/p-r-s-wwr-s-p-/6/7/5P-/P-S-R-WWS-R-1/R-P-S-R-P-S-', 'b', '1', '1']
+
 
         client.uginewgame()
 
@@ -129,6 +156,10 @@ def test_ugi_protocol():
         (bestmove, _) = client.go_movetime_and_wait(2_000)
         # assert bestmove == 'a5b6c6' # >> best opening move from minimax-4
 
+        (bestmove, infos) = client.go_nodes_and_wait(5_000)
+        assert client.query_islegal(bestmove) == ['true']
+        assert any('nodes' in info for info in infos)
+
         if True:
             log()
             client.uginewgame()
@@ -259,6 +290,363 @@ def test_ugi_protocol():
 
 
 
+def test_ugi_engine_pool():
+
+    log()
+    log("test_ugi_engine_pool: ...")
+
+    cmalo_server_executable_path = os.path.join(_package_home, "pijersi_ugi.py")
+
+    (manager, engine_pool) = start_ugi_engine_pool({"ugi-cmalo": (cmalo_server_executable_path, 2)})
+
+    try:
+        assert engine_pool.get_engine_names() == ["ugi-cmalo"]
+
+        searcher = UgiSearcher(name="ugi-cmalo-1", ugi_client=UgiPooledClient(engine_pool, "ugi-cmalo"), max_depth=1)
+
+        pijersi_state = PijersiState()
+
+        for _ in range(4):
+            action = searcher.search(pijersi_state)
+            assert str(action) in pijersi_state.get_action_names()
+            pijersi_state = pijersi_state.take_action(action)
+
+        # >> the leased engines survive across searches
+        assert engine_pool.check_health() == {"ugi-cmalo": 0}
+        assert engine_pool.get_restart_count("ugi-cmalo") == 0
+
+        pooled_client = UgiPooledClient(engine_pool, "ugi-cmalo")
+        pooled_client.position_startpos(['b7c6'])
+        assert pooled_client.query_fen() == ['s-p-r-s-p-r-/p-r-s-wwr-s-p-/6/7/5P-/P-S-R-WWS-R-1/R-P-S-R-P-S-', 'b', '1', '1']
+
+    finally:
+        engine_pool.close()
+        manager.shutdown()
+
+    log()
+    log("test_ugi_engine_pool: done")
+
+
+def test_async_ugi_client():
+
+    log()
+    log("test_async_ugi_client: ...")
+
+    cmalo_server_executable_path = os.path.join(_package_home, "pijersi_ugi.py")
+
+    async def check_commands():
+        ugi_client = AsyncUgiClient(name="async-cmalo", server_executable_path=cmalo_server_executable_path)
+
+        await ugi_client.run()
+        await ugi_client.prepare()
+
+        try:
+            assert ugi_client.get_server_name() == "cmalo"
+
+            await ugi_client.position_startpos(['b7c6'])
+            assert await ugi_client.query_fen() == ['s-p-r-s-p-r-/p-r-s-wwr-s-p-/6/7/5P-/P-S-R-WWS-R-1/R-P-S-R-P-S-', 'b', '1', '1']
+            assert await ugi_client.query_p1turn() == ['false']
+
+            (best_ugi_action, _) = await ugi_client.go_depth(1)
+            assert (await ugi_client.query_islegal(best_ugi_action)) == ['true']
+
+        finally:
+            await ugi_client.quit()
+
+        assert not ugi_client.is_running()
+
+    asyncio.run(check_commands())
+
+    # >> the games of several engine pairs are played at the same time by a single process
+    game_results = asyncio.run(play_async_ugi_games([(cmalo_server_executable_path, cmalo_server_executable_path)]*2, max_depth=1))
+
+    assert len(game_results) == 2
+    for (action_names, rewards) in game_results:
+        assert len(action_names) != 0
+        assert len(rewards) == 2
+
+    log()
+    log("test_async_ugi_client: done")
+
+
+def test_ugi_socket_server():
+
+    log()
+    log("test_ugi_socket_server: ...")
+
+    # >> port 0 lets the system choose a free port
+    socket_server = make_ugi_socket_server("tcp:127.0.0.1:0")
+    server_thread = threading.Thread(target=socket_server.serve_forever, daemon=True)
+    server_thread.start()
+
+    try:
+        (host, port) = socket_server.server_address
+        server_address = f"tcp:{host}:{port}"
+
+        first_client = UgiClient(name="socket-cmalo-1", server_executable_path=server_address, permanent=True)
+        second_client = UgiClient(name="socket-cmalo-2", server_executable_path=server_address, permanent=True)
+
+        for ugi_client in (first_client, second_client):
+            ugi_client.run()
+            ugi_client.prepare()
+            assert ugi_client.get_server_name() == "cmalo"
+
+        # >> each session has its own position
+        first_client.position_startpos(['b7c6'])
+        second_client.position_startpos(None)
+
+        assert first_client.query_p1turn() == ['false']
+        assert second_client.query_p1turn() == ['true']
+
+        (best_ugi_action, _) = second_client.go_depth_and_wait(1)
+        assert second_client.query_islegal(best_ugi_action) == ['true']
+
+        first_client.quit()
+        second_client.quit()
+
+    finally:
+        socket_server.shutdown()
+        socket_server.server_close()
+
+    log()
+    log("test_ugi_socket_server: done")
+
+
+def test_ugi_bench():
+
+    log()
+    log("test_ugi_bench: ...")
+
+    cmalo_server_executable_path = os.path.join(_package_home, "pijersi_ugi.py")
+
+    ugi_client = UgiClient(name="ugi-cmalo", server_executable_path=cmalo_server_executable_path, permanent=True)
+    ugi_client.run()
+    ugi_client.prepare()
+
+    try:
+        (bench_reply, bench_infos) = ugi_client.bench(depth=1)
+
+    finally:
+        ugi_client.quit()
+
+    bench = run_bench(depth=1)
+
+    # >> the node counts, so the signature, are reproducible from one run to another
+    assert bench_reply[:5] == ['bench', 'nodes', str(bench['nodes']), 'signature', bench['signature']]
+    assert len(bench_infos) == len(BENCH_POSITIONS)
+
+    log()
+    log("test_ugi_bench: done")
+
+
+def test_ugi_ponder(depth: int=2, turn_count: int=6):
+
+    log()
+    log("test_ugi_ponder: ...")
+
+    cmalo_server_executable_path = os.path.join(_package_home, "pijersi_ugi.py")
+
+    ugi_client = UgiClient(name="ugi-cmalo", server_executable_path=cmalo_server_executable_path, permanent=True)
+    ugi_client.run()
+    ugi_client.prepare()
+
+    # >> the replies of a local searcher are sometimes the predicted ones (ponder hit) and sometimes not (ponder miss)
+    local_searcher = MinimaxSearcher("minimax1", max_depth=1)
+
+    pijersi_state = PijersiState()
+    moves = []
+
+    try:
+        ugi_client.setoption('ponder', 'true')
+        ugi_client.uginewgame()
+
+        for turn in range(turn_count):
+            if pijersi_state.is_terminal():
+                break
+
+            if turn % 2 == 0:
+                ugi_client.position_startpos(moves)
+                (bestmove, _) = ugi_client.go_depth_and_wait(depth)
+                move = bestmove
+            else:
+                move = pijersi_state.to_ugi_name(local_searcher.search(pijersi_state))
+
+            pijersi_state = pijersi_state.take_action_by_ugi_name(move)
+            moves.append(move)
+
+        # >> the server stays responsive while pondering
+        assert ugi_client.isready() == ['readyok']
+
+    finally:
+        ugi_client.quit()
+
+    log()
+    log("test_ugi_ponder: done")
+
+
+class ScriptedPooledClient(UgiPooledClient):
+    """Pooled client without engine, standing for a pool of engine_count engines
+
+    Its searches reply at once a score derived from the position and the played move, and record their go commands.
+    """
+
+    def __init__(self, server_executable_path: str, engine_count: int, go_commands: list):
+        # >> no call to UgiPooledClient.__init__, because no engine pool is used
+        self.server_executable_path = server_executable_path
+        self.engine_count = engine_count
+        self.go_commands = go_commands
+        self.fen = None
+        self.move = None
+
+
+    def get_engine_size(self) -> int:
+        return self.engine_count
+
+
+    def get_server_executable_path(self) -> str:
+        return self.server_executable_path
+
+
+    def make_sibling(self):
+        return ScriptedPooledClient(self.server_executable_path, self.engine_count, self.go_commands)
+
+
+    def quit(self) -> None:
+        pass
+
+
+    def position_fen(self, fen=None, moves=None) -> None:
+        self.fen = fen
+        self.move = None
+
+
+    def go_manual(self, move: str) -> None:
+        self.move = move
+
+
+    def go_depth_and_wait(self, depth: int):
+        return self.reply('depth', depth)
+
+
+    def go_movetime_and_wait(self, time_ms: float):
+        return self.reply('movetime', time_ms)
+
+
+    def go_nodes_and_wait(self, node_count: int):
+        return self.reply('nodes', node_count)
+
+
+    def reply(self, go_name: str, go_argument):
+        self.go_commands.append((go_name, go_argument, self.move))
+
+        if self.move is None:
+            # >> calibration positions: the won ones have 2 cubes, the other ones 3
+            score = 1_000 if sum(1 for char in self.fen[0] if char.isalpha()) == 2 else 10
+        else:
+            score = zlib.crc32(" ".join(list(self.fen) + [self.move]).encode()) % 2_001 - 1_000
+
+        return ('a1a2', [['info', 'depth', '1', 'score', str(score)]])
+
+
+def test_natsel_searcher_engine_pool(time_limit: int=1):
+
+    log()
+    log("test_natsel_searcher_engine_pool: ...")
+
+    pijersi_state = PijersiState()
+    action_count = len(pijersi_state.get_actions())
+
+    evaluated_actions = {}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        server_executable_path = os.path.join(temp_dir, "natsel.exe")
+        open(server_executable_path, 'w').close()
+
+        for engine_count in (1, 2):
+            go_commands = []
+            searcher = NatselSearcher(name=f"natsel-{engine_count}",
+                                      ugi_client=ScriptedPooledClient(server_executable_path, engine_count, go_commands),
+                                      time_limit=time_limit, calibration_cache_path=None)
+
+            evaluated_actions[engine_count] = searcher.evaluate_actions(pijersi_state)
+
+            # >> one search per action, whose time is the one of engine_count engines running at the same time
+            action_commands = [go_command for go_command in go_commands if go_command[2] is not None]
+            assert len(action_commands) == action_count
+            assert all(go_command[:2] == ('movetime', round(engine_count*time_limit*1_000/action_count))
+                       for go_command in action_commands)
+
+    # >> the engines of the pool give the scores of the sequential searches
+    assert len(evaluated_actions[2]) == action_count
+    assert evaluated_actions[2] == evaluated_actions[1]
+
+    log()
+    log("test_natsel_searcher_engine_pool: done")
+
+
+def test_natsel_calibration_cache(max_depth: int=2):
+
+    log()
+    log("test_natsel_calibration_cache: ...")
+
+    pijersi_state = PijersiState()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        server_executable_path = os.path.join(temp_dir, "natsel.exe")
+        open(server_executable_path, 'w').close()
+
+        cache_path = os.path.join(temp_dir, "natsel-calibration.json")
+
+        def count_calibration_searches(calibration_cache_path):
+            go_commands = []
+            searcher = NatselSearcher(name="natsel", ugi_client=ScriptedPooledClient(server_executable_path, 1, go_commands),
+                                      max_depth=max_depth, calibration_cache_path=calibration_cache_path)
+            assert len(searcher.evaluate_actions(pijersi_state)) == len(pijersi_state.get_actions())
+            return sum(1 for go_command in go_commands if go_command[2] is None)
+
+        # >> miss then hit
+        assert count_calibration_searches(cache_path) == 4
+        assert count_calibration_searches(cache_path) == 0
+
+        # >> a new executable, known by its modification time, misses ; its entry is merged with the previous one
+        executable_stat = os.stat(server_executable_path)
+        os.utime(server_executable_path, ns=(executable_stat.st_atime_ns, executable_stat.st_mtime_ns + 1_000_000_000))
+
+        assert count_calibration_searches(cache_path) == 4
+        assert count_calibration_searches(cache_path) == 0
+
+        with open(cache_path, 'r') as cache_file:
+            assert len(json.load(cache_file)) == 2
+
+        # >> concurrent writers keep the entries of each other
+        writer_threads = [threading.Thread(target=NatselCalibrationCache(cache_path).put, args=(f"key-{index}", dict(win=index)))
+                          for index in range(8)]
+        for writer_thread in writer_threads:
+            writer_thread.start()
+        for writer_thread in writer_threads:
+            writer_thread.join()
+
+        with open(cache_path, 'r') as cache_file:
+            assert len(json.load(cache_file)) == 2 + len(writer_threads)
+
+        # >> a cache that cannot be written is tolerated: the scores are just computed again
+        unwritable_cache_path = os.path.join(server_executable_path, "natsel-calibration.json")
+
+        try:
+            NatselCalibrationCache(unwritable_cache_path).put("key", dict(win=1))
+            assert False
+        except OSError:
+            pass
+
+        assert count_calibration_searches(unwritable_cache_path) == 4
+        assert count_calibration_searches(unwritable_cache_path) == 4
+
+        assert sorted(os.listdir(temp_dir)) == ["natsel-calibration.json", "natsel.exe"]
+
+    log()
+    log("test_natsel_calibration_cache: done")
+
+
 def make_artefact_platform_id() -> str:
     artefact_system = platform.system().lower()
     artefact_extension = ".exe" if artefact_system == "windows" else ""
@@ -278,6 +666,13 @@ if __name__ == "__main__":
     freeze_support()
 
     test_ugi_protocol()
+    test_ugi_engine_pool()
+    test_async_ugi_client()
+    test_ugi_socket_server()
+    test_ugi_bench()
+    test_ugi_ponder()
+    test_natsel_searcher_engine_pool()
+    test_natsel_calibration_cache()
 
     # >> clean any residual process
     if len(multiprocessing.active_children()) > 0: